@@ -2,35 +2,35 @@
 import sys
 import os
 import streamlit as st
-import pandas as pd
-from dotenv import load_dotenv
-from pandas.api.types import is_numeric_dtype
 
 # make src importable
 sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
-from src.data_handler.fetch_manager import fetch_from_api
-from src.query_engine.executor import compare_states  # keep using it if present
-
-load_dotenv()
-
-# -------------------------
-# Dataset mapping (resource IDs)
-# -------------------------
-DATASETS = {
-    "All India Rainfall (1901-2015)": "8196f6cc-83ff-4b56-8581-2630de9d4a5e",
-    "Sub-Divisional Rainfall (1901-2017)": "722e2530-dcb1-4104-bd8f-5a0b22e68999",
-    "District Crop Production (1997)": "35be999b-0208-4354-b557-f6ca9a5355de",
-    "Sub-division rainfall": "8e0bd482-4aba-4d99-9cb9-ff124f6f1c2f",
-    "Max/Min Temp-rainfall": "6df1ecaa-5ebe-477d-9ffe-4e1b87dd71e3",
-    "District-rainfall": "d0419b03-b41b-4226-b48b-0bc92bf139f8",
-    "Rainfall-Central India": "40e1b431-eae6-4ab2-8587-b8ddbdd6bf1c",
-    "Different-Crops(2019)": "f20d7d45-e3d8-4603-bc79-15a3d0db1f9a",
-    "Area_production": "62bdce72-56c6-4d12-b875-27aff49275e3",
-    "Principal Crops": "e540df91-65d2-45a1-8b2d-b4f11023a042",
-    "Paddy-crop arrival": "1ec5d89e-6cff-4358-958c-67432e7a73f9",
-    "Vegetable production": "1e82c76f-ba78-4492-9799-2f6bc05430fe",
-    "Vegetable-crops": "d6e5315d-d4a7-4f1f-ab23-c2adcac3e1e7"
-}
+# .env is read once per process, before modules read their settings; reruns skip it
+from src.utils.config import settings
+settings.load()
+from src.data_handler.catalog import DATASETS
+from src.data_handler.exporter import EXPORT_FORMATS, export_bytes
+from src.data_handler.fetch_manager import FIELD_PROFILE_ROWS, fetch_chunked, fetch_field_profile, fetch_from_api
+from src.data_handler.http_client import APIError
+from src.data_handler.profiler import (
+    MAX_CATEGORY_OPTIONS, build_filter_candidates, column_suggestions, get_fingerprint, get_profile,
+)
+from src.data_handler.schema_registry import schema_fields, schema_registry, shared_fields
+from src.data_handler.warmer import fetch_options, profile_fields, start_refresher
+from src.query_engine.chunked import OUT_OF_CORE_ROWS, answer_chunked, compare_chunked, get_chunked_dataset
+from src.query_engine.executor import answer_question, compare_states
+from src.query_engine.filter_engine import get_filter_engine
+from src.query_engine.joiner import get_join, get_join_keys
+from src.query_engine.parser import QueryParseError
+from src.query_engine.planner import PREVIEW_ROWS, plan_filters, pushable_fields
+from src.query_engine.search import search_index
+from src.utils.logger import metrics_snapshot, span
+from src.visualizer.plotter import render_time_series
+from src.visualizer.result_view import render_result_view
+from src.visualizer.summary import get_time_series
+
+# Opt-in: warm the catalog in the background and keep it current (only when CATALOG_REFRESH_SECONDS is set)
+start_refresher()
 
 # -------------------------
 # Page config & small CSS
@@ -83,101 +83,48 @@ st.markdown(
 st.title("🚀 Project Samarth")
 st.markdown("_An intelligent data exploration platform powered by open government datasets._")
 st.markdown('<div class="samarth-card">Use smart filters to narrow results quickly and export only what matters.</div>', unsafe_allow_html=True)
+if settings.offline:
+    st.info("Offline mode: no API_KEY is set (or DATA_GOV_OFFLINE=1), so only cached datasets can be loaded.")
 
 # -------------------------
 # Helpers
 # -------------------------
 def clear_fetched_data():
-    for k in ("df", "col_suggestions", "filtered_df"):
+    for k in ("df", "col_suggestions", "filtered_df", "pushdown_fields", "pushdown_profile",
+              "pushdown_profile_complete", "total_rows", "chunked_path"):
         st.session_state.pop(k, None)
 
-def is_month_col_name(col_name: str) -> bool:
-    c = col_name.lower()
-    months = ("jan","feb","mar","apr","may","jun","jul","aug","sep","sept","oct","nov","dec",
-              "january","february","march","april","may","june","july","august","september","october","november","december")
-    return any(m in c for m in months)
-
-def looks_like_value_column(series: pd.Series) -> bool:
-    # True when the column is numeric OR has many unique numeric-like values
-    if pd.api.types.is_numeric_dtype(series):
-        return True
-    try:
-        unique = series.dropna().astype(str).unique()
-        # if most unique values are numeric-like and there are many, consider value column
-        if len(unique) > 50 and sum(1 for v in unique if v.replace('.', '', 1).isdigit()) / len(unique) > 0.6:
-            return True
-    except Exception:
-        pass
-    return False
-
-def normalize_text(value):
-    """Normalize values for resilient, case-insensitive categorical matching."""
-    if pd.isna(value):
-        return None
-    text = str(value).strip()
-    return text.casefold() if text else None
-
-def build_filter_candidates(df: pd.DataFrame):
-    categorical_candidates = []
-    numeric_candidates = []
-    skipped_columns = []
-
-    for col in df.columns:
-        try:
-            series = df[col]
-            n_unique = series.nunique(dropna=True)
-            if n_unique == 0:
-                skipped_columns.append((col, "all values missing"))
-                continue
-
-            if is_month_col_name(col) or looks_like_value_column(series):
-                numeric_candidates.append(col)
-                continue
-
-            if n_unique <= 200 and (series.dtype == "object" or n_unique <= 50):
-                categorical_candidates.append(col)
-            elif is_numeric_dtype(series):
-                numeric_candidates.append(col)
-            else:
-                skipped_columns.append((col, f"high cardinality ({n_unique} unique)"))
-        except Exception as err:
-            skipped_columns.append((col, f"analysis error: {err}"))
-
-    return categorical_candidates, numeric_candidates, skipped_columns
-
-def apply_categorical_filter(dataframe: pd.DataFrame, column: str, selected_values):
-    if not selected_values:
-        return dataframe, None
-
-    try:
-        normalized_selected = {normalize_text(v) for v in selected_values if normalize_text(v) is not None}
-        if not normalized_selected:
-            return dataframe, f"Skipped `{column}` because no valid filter values were selected."
-
-        normalized_column = dataframe[column].map(normalize_text)
-        mask = normalized_column.isin(normalized_selected)
-        return dataframe[mask], None
-    except KeyError:
-        return dataframe, f"Skipped `{column}` because the column is missing after previous filter operations."
-    except Exception as err:
-        return dataframe, f"Could not apply categorical filter on `{column}`: {err}"
-
-def apply_numeric_filter(dataframe: pd.DataFrame, column: str, selected_range):
-    try:
-        numeric_series = pd.to_numeric(dataframe[column], errors="coerce")
-        if numeric_series.dropna().empty:
-            return dataframe, f"Skipped numeric filter for `{column}` because values are not numeric."
-
-        low, high = selected_range
-        if low > high:
-            return dataframe, f"Skipped `{column}` due to invalid range ({low} > {high})."
-
-        mask = numeric_series.between(low, high, inclusive="both")
-        return dataframe[mask], None
-    except KeyError:
-        return dataframe, f"Skipped `{column}` because the column is missing after previous filter operations."
-    except Exception as err:
-        return dataframe, f"Could not apply numeric filter on `{column}`: {err}"
+
+def load_chunked(resource_id, refresh=False):
+    """
+    Download a resource out of core; keeps a preview in memory and the store path in the session.
+    Returns (preview DataFrame, column suggestions), like fetch_from_api.
+    """
+    path = fetch_chunked(resource_id, refresh=refresh)
+    if path is None:
+        return None, {}
+    chunked = get_chunked_dataset(path)
+    st.session_state["chunked_path"] = str(path)
+    st.session_state["total_rows"] = chunked.num_rows
+    return chunked.head(PREVIEW_ROWS), column_suggestions(chunked.profile())
+
+
+def open_dataset(name):
+    st.session_state["dataset_select"] = name
+
+# -------------------------
+# Keyword search across cached datasets
+# -------------------------
+search_query = st.text_input("🔎 Search cached datasets (e.g. \"ragi karnataka\")", key="search_query")
+if search_query.strip():
+    hits = search_index.search(search_query)
+    if not hits:
+        st.caption("No cached dataset matches every word. Fetch or warm more datasets to widen the search.")
+    for i, hit in enumerate(hits):
+        cols = st.columns([4, 1])
+        cols[0].markdown(f"**{hit.dataset}** — {hit.num_rows:,} of {hit.total_rows:,} rows  \n{hit.describe()}")
+        if hit.dataset in DATASETS:
+            cols[1].button("Open", key=f"search_open_{i}", on_click=open_dataset, args=(hit.dataset,))
 
 # -------------------------
 # Dataset selection
@@ -189,13 +136,47 @@ if st.session_state.get("last_dataset") != selected_dataset:
     clear_fetched_data()
     st.session_state["last_dataset"] = selected_dataset
 
+# Schema from a single one-row request (cached in the schema registry), before any download
+schema = schema_registry.get(DATASETS[selected_dataset])
+if schema:
+    total = schema.get("total")
+    with st.expander(f"🧾 Schema — {len(schema_fields(schema))} fields"
+                     + (f", {int(total):,} records" if total is not None else ""), expanded=False):
+        st.dataframe(schema_fields(schema), width="stretch")
+        if schema.get("updated"):
+            st.caption(f"Last updated upstream: {schema['updated']}")
+
 # -------------------------
 # Fetch data button
 # -------------------------
+refresh_cache = st.checkbox("Refresh from data.gov.in (ignore cached copy)", value=False, key="refresh_cache")
 if st.button("Fetch Data", key="fetch_data_btn"):
     resource_id = DATASETS[selected_dataset]
     with st.spinner(f"Fetching data for **{selected_dataset}**..."):
-        df, col_suggestions = fetch_from_api(resource_id)
+        metadata = schema_registry.get(resource_id, refresh=refresh_cache) or {}
+        options = fetch_options(metadata)
+        st.session_state.pop("chunked_path", None)
+        if options.get("out_of_core"):
+            # too large for memory: stored as Parquet on disk, processed chunk by chunk
+            df, col_suggestions = load_chunked(resource_id, refresh_cache)
+            st.session_state.pop("pushdown_fields", None)
+            st.session_state.pop("pushdown_profile", None)
+            st.session_state.pop("pushdown_profile_complete", None)
+        else:
+            df, col_suggestions = fetch_from_api(resource_id, refresh=refresh_cache, **options)
+        if "limit" in options and df is not None:
+            # large resource: selections are pushed down to the API; options and slider bounds of the
+            # filterable and numeric fields come from the whole resource, not from the preview
+            profile, complete = fetch_field_profile(resource_id, profile_fields(metadata, df))
+            st.session_state["pushdown_fields"] = pushable_fields(metadata)
+            st.session_state["pushdown_profile"] = profile
+            st.session_state["pushdown_profile_complete"] = complete
+            st.session_state["total_rows"] = int(metadata["total"])
+        elif not options.get("out_of_core"):
+            st.session_state.pop("pushdown_fields", None)
+            st.session_state.pop("pushdown_profile", None)
+            st.session_state.pop("pushdown_profile_complete", None)
+            st.session_state.pop("total_rows", None)
     st.session_state["df"] = df
     st.session_state["col_suggestions"] = col_suggestions
     st.session_state.pop("filtered_df", None)
@@ -204,10 +185,43 @@ if st.button("Fetch Data", key="fetch_data_btn"):
 # Show UI only when df exists
 # -------------------------
 if "df" in st.session_state and st.session_state["df"] is not None and not st.session_state["df"].empty:
-    df = st.session_state["df"].copy()
+    # shared, read-only frame from the fetch coordinator — filtering builds new frames, never mutate in place
+    df = st.session_state["df"]
     col_suggestions = st.session_state.get("col_suggestions", {})
 
-    st.success(f"✅ Successfully fetched {len(df)} records for **{selected_dataset}**")
+    pushdown_fields = st.session_state.get("pushdown_fields", set())
+    total_rows = st.session_state.get("total_rows", len(df))
+    chunked_path = st.session_state.get("chunked_path")
+    chunked = get_chunked_dataset(chunked_path) if chunked_path else None
+
+    if chunked is not None:
+        st.success(f"✅ Stored {total_rows:,} records for **{selected_dataset}** on disk")
+        st.caption("Filters, profiles, questions and category totals scan the whole dataset in chunks; "
+                   f"joins use the first {len(df):,} rows.")
+    elif pushdown_fields:
+        st.success(f"✅ Loaded a {len(df)}-row preview of {total_rows} records for **{selected_dataset}**")
+        st.caption("Single-value selections on "
+                   + ", ".join(f"`{f}`" for f in sorted(pushdown_fields))
+                   + " are filtered by data.gov.in; other filters run on the downloaded rows.")
+        if not st.session_state.get("pushdown_profile_complete", True):
+            st.caption(f"Filter options come from {FIELD_PROFILE_ROWS:,} records sampled across the resource; "
+                       "run the catalog warmer to list every value.")
+        if st.button("Load full dataset", key="load_full_btn"):
+            with st.spinner(f"Fetching all {total_rows} records..."):
+                if total_rows > OUT_OF_CORE_ROWS:
+                    df, col_suggestions = load_chunked(DATASETS[selected_dataset])
+                else:
+                    df, col_suggestions = fetch_from_api(DATASETS[selected_dataset], paginate=True)
+            st.session_state["df"] = df
+            st.session_state["col_suggestions"] = col_suggestions
+            st.session_state.pop("pushdown_fields", None)
+            st.session_state.pop("pushdown_profile", None)
+            st.session_state.pop("pushdown_profile_complete", None)
+            if "chunked_path" not in st.session_state:
+                st.session_state.pop("total_rows", None)
+            st.rerun()
+    else:
+        st.success(f"✅ Successfully fetched {len(df)} records for **{selected_dataset}**")
 
     # Compact column suggestions in an expander
     with st.expander("📋 Column Overview", expanded=False):
@@ -222,11 +236,17 @@ if "df" in st.session_state and st.session_state["df"] is not None and not st.se
     # -------------------------
     st.markdown("### 🎛️ Filters")
     # initialize filtered_df so it's always defined
-    filtered_df = df.copy()
-
-    # Determine candidate categorical and numeric columns
-    categorical_candidates, numeric_candidates, skipped_columns = build_filter_candidates(df)
+    filtered_df = df
+
+    # Determine candidate categorical and numeric columns (profile is cached per dataset, so reruns are free)
+    profile = chunked.profile() if chunked is not None else get_profile(df)
+    if pushdown_fields:
+        profile = {**profile, **{c: info for c, info in st.session_state.get("pushdown_profile", {}).items()
+                                 if c in profile}}
+    categorical_candidates, numeric_candidates, skipped_columns = build_filter_candidates(profile)
     filter_errors = []
+    categorical_selections = {}
+    numeric_selections = {}
 
     if not categorical_candidates and not numeric_candidates:
         st.info("No suitable filters found for this dataset.")
@@ -235,17 +255,15 @@ if "df" in st.session_state and st.session_state["df"] is not None and not st.se
             # Categorical filters (multiselect) — defaults to empty so not preselecting everything
             for col in categorical_candidates:
                 try:
-                    options = df[col].dropna().astype(str).unique().tolist()
-                    options = sorted(options, key=lambda x: (str(x).lower()))
-                    if len(options) <= 500:  # safety guard
+                    options = profile[col]["options"]
+                    if options is not None:  # safety guard: None when over MAX_CATEGORY_OPTIONS
                         sel = st.multiselect(f"{col}", options, default=[], key=f"filter_{col}")
                         if sel:
-                            filtered_df, err = apply_categorical_filter(filtered_df, col, sel)
-                            if err:
-                                filter_errors.append(err)
+                            categorical_selections[col] = sel
                     else:
                         filter_errors.append(
-                            f"Skipped `{col}` because it has too many options ({len(options)} unique values)."
+                            f"Skipped `{col}` because it has too many options "
+                            f"({profile[col]['num_unique']} unique values, limit {MAX_CATEGORY_OPTIONS})."
                         )
                 except Exception as err:
                     filter_errors.append(f"Could not render categorical filter `{col}`: {err}")
@@ -253,23 +271,42 @@ if "df" in st.session_state and st.session_state["df"] is not None and not st.se
             # Numeric filters (sliders)
             for col in numeric_candidates:
                 try:
-                    # numeric columns may be floats/ints stored as strings — try to coerce where possible
-                    ser = pd.to_numeric(df[col], errors="coerce") if not is_numeric_dtype(df[col]) else df[col]
-                    if ser.dropna().empty:
-                        continue
-                    min_val = float(ser.min())
-                    max_val = float(ser.max())
-                    if min_val == max_val:
+                    # min/max come from the profile, including text columns that parse as numbers
+                    min_val, max_val = profile[col]["min"], profile[col]["max"]
+                    if min_val is None or max_val is None or min_val == max_val:
                         continue
                     sel_range = st.slider(f"{col} range", min_val, max_val, (min_val, max_val), key=f"slider_{col}")
                     # apply only if slider moved
                     if sel_range != (min_val, max_val):
-                        filtered_df, err = apply_numeric_filter(filtered_df, col, sel_range)
-                        if err:
-                            filter_errors.append(err)
+                        numeric_selections[col] = sel_range
                 except Exception as err:
                     filter_errors.append(f"Could not render numeric filter `{col}`: {err}")
 
+    # Plan: single-value selections on exposed fields go to the API, the rest run locally
+    # values are sent with their upstream spelling: the API matches exactly, local filters ignore case
+    plan = plan_filters(categorical_selections, pushdown_fields,
+                        {c: profile[c]["options"] for c in pushdown_fields if c in profile})
+    fetch_error = None
+    if plan.api_filters:
+        with st.spinner("Filtering on data.gov.in ..."):
+            try:
+                filtered_df, _ = fetch_from_api(DATASETS[selected_dataset], paginate=True,
+                                                filters=plan.api_filters, raise_errors=True)
+            except APIError as e:
+                fetch_error = e
+                filtered_df = df.iloc[0:0]
+    elif pushdown_fields and (categorical_selections or numeric_selections):
+        st.info(f"Filters below apply to the {len(df)}-row preview. "
+                "Pick a single value on a server-filterable field or load the full dataset.")
+
+    if chunked is not None:
+        # predicates become a Parquet scan filter; at most MAX_RESULT_ROWS matches are loaded
+        filtered_df, total_rows = chunked.filter(categorical_selections, numeric_selections)
+    else:
+        # indexes and per-predicate masks are cached per dataset, so only changed predicates cost anything
+        filtered_df, errors = get_filter_engine(filtered_df).apply(plan.local_filters, numeric_selections)
+        filter_errors.extend(errors)
+
     if skipped_columns:
         with st.expander("ℹ️ Filter diagnostics", expanded=False):
             for col_name, reason in skipped_columns:
@@ -287,39 +324,117 @@ if "df" in st.session_state and st.session_state["df"] is not None and not st.se
     # Results & download
     # -------------------------
     st.markdown("### 🔹 Filtered Results")
-    if filtered_df.empty:
+    if fetch_error is not None:
+        st.error(f"❌ Filtering on data.gov.in failed: {fetch_error}")
+    elif filtered_df.empty:
         st.warning("No records match the selected filters.")
     else:
-        st.caption(f"Showing {len(filtered_df)} of {len(df)} rows after filtering.")
-        st.dataframe(filtered_df)
-
-    csv = filtered_df.to_csv(index=False).encode("utf-8")
-    st.download_button("Download results as CSV",
-                       data=csv,
-                       file_name=f"{selected_dataset.replace(' ', '_')}_results.csv",
-                       mime="text/csv",
+        if chunked is not None:
+            st.caption(f"{total_rows:,} of {chunked.num_rows:,} rows match; showing the first {len(filtered_df):,} "
+                       "(downloads include every match).")
+        else:
+            st.caption(f"Showing {len(filtered_df)} of {total_rows} rows after filtering.")
+        with span("render.results", rows=len(filtered_df)):
+            render_result_view(filtered_df, key="results_view")
+
+    # the export is rendered only when the button is clicked, then reused for the same filter state
+    export_format = st.selectbox("Export format", list(EXPORT_FORMATS), key="export_format")
+    export_state = {"api": plan.api_filters, "categorical": plan.local_filters, "numeric": numeric_selections}
+    export_dataset = chunked.version if chunked is not None else get_fingerprint(df)
+    export_data = filtered_df
+    if chunked is not None and total_rows > len(filtered_df):
+        # more matches than were loaded for display: stream all of them from the Parquet scan
+        export_data = lambda: chunked.iter_chunks(None, categorical_selections, numeric_selections)
+    st.download_button(f"Download results as {export_format}",
+                       data=lambda: export_bytes(export_data, export_format, export_dataset, export_state),
+                       file_name=f"{selected_dataset.replace(' ', '_')}_results{EXPORT_FORMATS[export_format][1]}",
+                       mime=EXPORT_FORMATS[export_format][0],
                        key="download_btn")
 
+    # -------------------------
+    # Time series (month-column datasets such as sub-division rainfall)
+    # -------------------------
+    if get_time_series(filtered_df) is not None:
+        st.markdown("### 📈 Time series")
+        render_time_series(filtered_df, key="time_series")
+
+    # -------------------------
+    # Natural-language questions (parsed offline into a cached plan)
+    # -------------------------
+    st.markdown("### 💬 Ask a question")
+    question = st.text_input("e.g. average June rainfall in Kerala 1950-2000", key="question_input")
+    if question.strip():
+        if pushdown_fields:
+            st.caption(f"Answering from the {len(df)}-row preview; load the full dataset for complete answers.")
+        try:
+            if chunked is not None:
+                plan, answer = answer_chunked(chunked, question)
+            else:
+                plan, answer = answer_question(df, question)
+            st.caption(f"Plan: `{plan.describe()}`")
+            for note in plan.notes:
+                st.caption(note)
+            st.dataframe(answer)
+        except QueryParseError as err:
+            st.warning(str(err))
+        except Exception as err:
+            st.error(f"Could not answer the question: {err}")
+
     # -------------------------
     # Robust comparison
     # -------------------------
     st.markdown("### 🔍 Compare with another dataset (Optional)")
+    if schema:
+        # only schemas already in the registry are used, so this costs no requests
+        candidates = []
+        for name, rid in DATASETS.items():
+            other = schema_registry.get(rid, fetch=False)
+            if name != selected_dataset and other:
+                common = shared_fields(schema, other)
+                if common:
+                    candidates.append({"dataset": name, "shared fields": len(common), "fields": ", ".join(common)})
+        if candidates:
+            with st.expander("Datasets sharing fields with this one", expanded=False):
+                st.dataframe(sorted(candidates, key=lambda c: -c["shared fields"]), width="stretch")
+
     compare_choice = st.selectbox("Compare with:", ["None"] + list(DATASETS.keys()), key="compare_select")
     if compare_choice != "None":
         compare_id = DATASETS[compare_choice]
+        common = shared_fields(schema, schema_registry.get(compare_id))
+        if schema and common:
+            st.caption("Shared fields: " + ", ".join(f"`{f}`" for f in common))
+        other = None
         with st.spinner(f"Fetching comparison dataset: {compare_choice} ..."):
-            df2, _ = fetch_from_api(compare_id)
+            if fetch_options(schema_registry.get(compare_id) or {}).get("out_of_core"):
+                other_path = fetch_chunked(compare_id)
+                other = get_chunked_dataset(other_path) if other_path is not None else None
+                df2 = other.head(PREVIEW_ROWS) if other is not None else None
+            else:
+                df2, _ = fetch_from_api(compare_id, paginate=True)
 
         if df2 is not None and not df2.empty:
             try:
-                # do not mutate original df names: create normalized copies for matching
-                df_norm = df.copy()
-                df2_norm = df2.copy()
-                df_norm.columns = [c.strip().lower() for c in df_norm.columns]
-                df2_norm.columns = [c.strip().lower() for c in df2_norm.columns]
-
-                common_cols = list(set(df_norm.columns).intersection(set(df2_norm.columns)))
-                if not common_cols:
+                if chunked is not None or other is not None:
+                    # out-of-core sides are summed chunk by chunk; the row-level join below uses previews
+                    left = chunked if chunked is not None else df
+                    right = other if other is not None else df2
+                    shared = [c for c in left.columns if c in right.columns]
+                    categories = [c for c in shared if profile.get(c, {}).get("role") == "category"]
+                    metrics = [c for c in shared if profile.get(c, {}).get("role") in ("value", "month")]
+                    if categories and metrics:
+                        st.markdown("#### Totals by category")
+                        c1, c2 = st.columns(2)
+                        category_col = c1.selectbox("Category", categories, key="compare_category")
+                        metric_col = c2.selectbox("Metric", metrics, key="compare_metric")
+                        with st.spinner("Summing both datasets ..."):
+                            totals = compare_chunked(left, right, category_col, metric_col)
+                        st.dataframe(totals, width="stretch")
+                    st.caption(f"Totals cover every row; the join below uses the first {PREVIEW_ROWS:,} rows "
+                               "of datasets stored on disk.")
+                # rank shared columns (names matched case-insensitively) by overlap and uniqueness;
+                # cached per pair of datasets like the join itself
+                key_candidates = get_join_keys(df, df2)
+                if not key_candidates:
                     st.error("❌ No common columns found between the two datasets. Showing side-by-side preview instead.")
                     c1, c2 = st.columns(2)
                     with c1:
@@ -329,13 +444,16 @@ if "df" in st.session_state and st.session_state["df"] is not None and not st.se
                         st.write(f"**{compare_choice}** preview")
                         st.dataframe(df2.head(50))
                 else:
-                    st.info(f"Common columns: {', '.join(common_cols[:10])}")
-                    # prefer year-like columns for merge
-                    pref = next((c for c in ["year", "yr"] if c in common_cols), None)
-                    key_col = pref if pref else common_cols[0]
-                    # merge using normalized column name, but show readable results
-                    merged = pd.merge(df_norm, df2_norm, on=key_col, how="inner", suffixes=("_left", "_right"))
-                    if merged.empty:
+                    st.info(f"Common columns: {', '.join(c['name'] for c in key_candidates[:10])}")
+                    labels = [
+                        f"{c['name']} (overlap {c['overlap']:.0%}, ~{c['estimated_rows']:,} rows)"
+                        for c in key_candidates
+                    ]
+                    choice = st.selectbox("Join key", range(len(key_candidates)),
+                                          format_func=lambda i: labels[i], key="join_key_select")
+                    key = key_candidates[choice]
+                    joined = get_join(df, df2, key["left"], key["right"])
+                    if len(joined) == 0:
                         st.warning("Merge resulted in no rows. Showing side-by-side preview.")
                         c1, c2 = st.columns(2)
                         with c1:
@@ -343,13 +461,33 @@ if "df" in st.session_state and st.session_state["df"] is not None and not st.se
                         with c2:
                             st.dataframe(df2.head(50))
                     else:
-                        st.success(f"✅ Merged on `{key_col}` — showing first 100 rows")
-                        st.dataframe(merged.head(100))
+                        if joined.pre_aggregated:
+                            st.warning(f"A row-level join on `{key['name']}` would produce "
+                                       f"{key['estimated_rows']:,} rows; both datasets were aggregated per key first.")
+                        page = st.number_input(f"Page (of {joined.num_pages})", min_value=1,
+                                               max_value=joined.num_pages, value=1, key="join_page")
+                        st.success(f"✅ Merged on `{key['name']}` — {len(joined):,} rows, showing page {page}")
+                        st.dataframe(joined.page(int(page) - 1))
             except Exception as e:
                 st.error(f"Error while comparing: {e}")
         else:
             st.error("Could not fetch the comparison dataset.")
 
+# -------------------------
+# Debug panel (DEBUG_PANEL=1 or ?debug=1)
+# -------------------------
+if os.getenv("DEBUG_PANEL") == "1" or st.query_params.get("debug") == "1":
+    with st.expander("🛠 Performance metrics"):
+        snapshot = metrics_snapshot()
+        ratio = snapshot["cache_hit_ratio"]
+        st.caption(f"Cache hit ratio: {ratio:.0%}" if ratio is not None else "Cache hit ratio: n/a")
+        if snapshot["stages"]:
+            st.dataframe(
+                [{"stage": stage, **summary} for stage, summary in snapshot["stages"].items()],
+                width="stretch",
+            )
+        st.json(snapshot["counters"])
+
 # -------------------------
 # Footer
 # -------------------------
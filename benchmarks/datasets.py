@@ -0,0 +1,97 @@
+# benchmarks/datasets.py
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ENTITY_FILE = Path(__file__).parents[1] / "src" / "data_handler" / "data" / "entities.json"
+
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+SEASONS = ["Kharif", "Rabi", "Whole Year", "Summer", "Autumn", "Winter"]
+# Share of cells sent as "NA", the way data.gov.in marks missing values
+MISSING_RATIO = 0.01
+
+
+def _names(kind):
+    kinds = json.loads(ENTITY_FILE.read_text(encoding="utf-8"))["kinds"]
+    return [e["name"] for e in kinds[kind]]
+
+
+def _with_missing(values, rng):
+    values = values.astype(object)
+    values[rng.random(len(values)) < MISSING_RATIO] = "NA"
+    return values
+
+
+def rainfall_dataset(rows, seed=0):
+    """
+    Sub-division rainfall in the shape of the IMD resource: subdivision, year,
+    one column per month plus annual and seasonal totals.
+    Returns a DataFrame of strings, as the API sends them.
+    """
+    rng = np.random.default_rng(seed)
+    subdivisions = np.array(_names("subdivision"), dtype=object)
+    data = {
+        "subdivision": subdivisions[np.arange(rows) % len(subdivisions)],
+        "year": (1901 + (np.arange(rows) // len(subdivisions)) % 125).astype(str),
+    }
+    # Monsoon months get most of the rain
+    scale = np.array([20, 25, 30, 45, 80, 250, 330, 300, 200, 110, 45, 20], dtype=float)
+    monthly = rng.gamma(2.0, scale / 2.0, size=(rows, 12)).round(1)
+    for i, month in enumerate(MONTHS):
+        data[month] = _with_missing(monthly[:, i].astype(str), rng)
+    data["annual"] = monthly.sum(axis=1).round(1).astype(str)
+    data["jan_feb"] = monthly[:, 0:2].sum(axis=1).round(1).astype(str)
+    data["mar_may"] = monthly[:, 2:5].sum(axis=1).round(1).astype(str)
+    data["jun_sep"] = monthly[:, 5:9].sum(axis=1).round(1).astype(str)
+    data["oct_dec"] = monthly[:, 9:12].sum(axis=1).round(1).astype(str)
+    return pd.DataFrame(data)
+
+
+def crop_dataset(rows, seed=0):
+    """
+    District-wise crop production in the shape of the agriculture ministry
+    resource: state, district, year, season, crop, area and production.
+    Returns a DataFrame of strings, as the API sends them.
+    """
+    rng = np.random.default_rng(seed)
+    states = _names("state")
+    # ~20 districts per state, named the way the upstream data spells them
+    districts = np.array([f"{state} District {i + 1}" for state in states for i in range(20)], dtype=object)
+    district_state = np.repeat(np.array(states, dtype=object), 20)
+    crops = np.array(_names("crop"), dtype=object)
+
+    district = rng.integers(0, len(districts), rows)
+    area = rng.lognormal(7, 1.5, rows).round(0)
+    yield_ = rng.gamma(2.0, 1.2, rows)
+    return pd.DataFrame({
+        "state_name": district_state[district],
+        "district_name": districts[district],
+        "crop_year": rng.integers(1997, 2024, rows).astype(str),
+        "season": np.array(SEASONS, dtype=object)[rng.integers(0, len(SEASONS), rows)],
+        "crop": crops[rng.integers(0, len(crops), rows)],
+        "area_": area.astype(str),
+        "production_": _with_missing((area * yield_).round(0).astype(str), rng),
+    })
+
+
+GENERATORS = {
+    "rainfall": rainfall_dataset,
+    "crop": crop_dataset,
+}
+
+# Columns data.gov.in accepts as `filters[...]` for each dataset
+FILTER_FIELDS = {
+    "rainfall": ("subdivision", "year"),
+    "crop": ("state_name", "district_name", "crop_year", "season", "crop"),
+}
+
+
+def make_dataset(kind, rows, seed=0):
+    """
+    Build a synthetic dataset by name ("rainfall" or "crop").
+    """
+    if kind not in GENERATORS:
+        raise ValueError(f"Unknown dataset '{kind}', expected one of {sorted(GENERATORS)}")
+    return GENERATORS[kind](rows, seed)
@@ -0,0 +1,180 @@
+# benchmarks/mock_server.py
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.datasets import FILTER_FIELDS, make_dataset
+
+# data.gov.in caps a single page at this many records
+MAX_PAGE_LIMIT = 10000
+UPDATED = "2024-01-01T00:00:00"
+
+
+class MockDataGov:
+    """
+    Local stand-in for https://api.data.gov.in/resource/{id}.
+
+    Resource ids are "<dataset>-<rows>" (e.g. "rainfall-100000"); the synthetic
+    frame is generated on first use and kept for the life of the server.
+    Supports limit/offset pagination, `filters[field]=value`, a fixed
+    per-request latency and a share of requests answered with 429.
+
+        with MockDataGov(latency_ms=20, error_rate=0.05) as server:
+            os.environ["DATA_GOV_BASE_URL"] = server.base_url
+    """
+
+    def __init__(self, latency_ms=0, error_rate=0.0, retry_after=0, seed=0, host="127.0.0.1", port=0):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.seed = seed
+        self.stats = {"requests": 0, "throttled": 0, "records": 0}
+        self._datasets = {}
+        self._filtered = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/resource/"
+
+    def dataset(self, resource_id):
+        kind, _, rows = resource_id.rpartition("-")
+        if not kind or not rows.isdigit():
+            raise KeyError(resource_id)
+        with self._lock:
+            if resource_id not in self._datasets:
+                self._datasets[resource_id] = make_dataset(kind, int(rows), self.seed)
+            return self._datasets[resource_id]
+
+    def _select(self, resource_id, filters):
+        df = self.dataset(resource_id)
+        if not filters:
+            return df
+        key = (resource_id, tuple(sorted(filters.items())))
+        with self._lock:
+            cached = self._filtered.get(key)
+        if cached is None:
+            mask = None
+            for field, value in filters.items():
+                match = df[field].str.casefold() == value.casefold()
+                mask = match if mask is None else mask & match
+            cached = df[mask].reset_index(drop=True)
+            with self._lock:
+                self._filtered[key] = cached
+        return cached
+
+    def _throttle(self):
+        with self._lock:
+            self.stats["requests"] += 1
+            throttled = self.error_rate > 0 and self._random.random() < self.error_rate
+            if throttled:
+                self.stats["throttled"] += 1
+        return throttled
+
+    def payload(self, resource_id, query):
+        kind = resource_id.rpartition("-")[0]
+        exposed = FILTER_FIELDS.get(kind, ())
+        filters = {}
+        for name, values in query.items():
+            if name.startswith("filters[") and name.endswith("]"):
+                field = name[len("filters["):-1]
+                if field not in exposed:
+                    raise ValueError(f"Field '{field}' cannot be filtered")
+                filters[field] = values[0]
+
+        df = self._select(resource_id, filters)
+        limit = min(int(query.get("limit", ["10"])[0]), MAX_PAGE_LIMIT)
+        offset = int(query.get("offset", ["0"])[0])
+        records = df.iloc[offset:offset + limit].to_dict("records")
+        with self._lock:
+            self.stats["records"] += len(records)
+
+        fields = [{"id": c, "name": c.replace("_", " ").strip().title(), "type": "keyword"} for c in df.columns]
+        return {
+            "index_name": resource_id,
+            "title": f"Synthetic {kind} dataset",
+            "updated": UPDATED,
+            "total": len(df),
+            "count": len(records),
+            "limit": str(limit),
+            "offset": str(offset),
+            "field": fields,
+            "field_exposed": [f for f in fields if f["id"] in exposed],
+            "records": records,
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if server.latency:
+                    time.sleep(server.latency)
+                if not url.path.startswith("/resource/"):
+                    return self._send(404, {"error": "Not found"})
+                if server._throttle():
+                    return self._send(429, {"error": "Too many requests"},
+                                      {"Retry-After": str(server.retry_after)})
+                try:
+                    body = server.payload(url.path[len("/resource/"):], parse_qs(url.query))
+                except KeyError:
+                    return self._send(404, {"error": "Unknown resource"})
+                except ValueError as e:
+                    return self._send(400, {"error": str(e)})
+                self._send(200, body)
+
+            def _send(self, status, body, headers=None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve synthetic data.gov.in resources locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    mock = MockDataGov(latency_ms=args.latency_ms, error_rate=args.error_rate, port=args.port)
+    print(f"Serving on {mock.base_url}  (e.g. {mock.base_url}rainfall-10000?limit=10)")
+    try:
+        mock._server.serve_forever()
+    except KeyboardInterrupt:
+        mock.stop()
@@ -0,0 +1,259 @@
+# benchmarks/run.py
+"""
+Benchmark the data paths against a local data.gov.in stand-in.
+
+    python -m benchmarks.run                              # default sizes, compare to baseline.json
+    python -m benchmarks.run --sizes 10000,1000000 --datasets rainfall
+    python -m benchmarks.run --latency-ms 30 --error-rate 0.05
+    python -m benchmarks.run --save-baseline              # record this machine's numbers
+
+Each stage is timed --repeat times (best run kept) and run once more under
+tracemalloc for its peak memory. The exit status is 1 when a stage is slower
+or heavier than the baseline by more than --tolerance.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Keep benchmark caches out of the working tree and the rate limiter out of the timings
+_WORK_DIR = Path(tempfile.mkdtemp(prefix="samarth-bench-"))
+os.environ.setdefault("DATASET_CACHE_DIR", str(_WORK_DIR / "datasets"))
+os.environ.setdefault("EXPORT_CACHE_DIR", str(_WORK_DIR / "exports"))
+os.environ.setdefault("CUBE_CACHE_DIR", str(_WORK_DIR / "cubes"))
+os.environ.setdefault("API_RATE_LIMIT", "0")
+os.environ.setdefault("API_KEY", "benchmark")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+import pandas as pd
+
+from benchmarks.datasets import make_dataset
+from benchmarks.mock_server import MockDataGov
+from src.data_handler import http_client
+from src.data_handler.exporter import write_export
+from src.data_handler.fetch_manager import fetch_from_api
+from src.data_handler.preprocessor import compact_dataframe
+from src.data_handler.profiler import build_filter_candidates, profile_dataframe
+from src.query_engine import aggregator, parallel
+from src.query_engine.executor import compare_states
+from src.query_engine.filter_engine import FilterEngine
+
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+DEFAULT_SIZES = "10000,100000"
+# Differences below these are treated as noise whatever the tolerance
+MIN_SECONDS_DELTA = 0.005
+MIN_MB_DELTA = 1.0
+
+# Columns each dataset is filtered and compared on
+WORKLOADS = {
+    "rainfall": {
+        "category": "subdivision",
+        "metric": "annual",
+        "split": "year",
+        "categorical": {"subdivision": ["Kerala", "Coastal Karnataka", "Konkan & Goa"]},
+        "numeric": {"jul": (100.0, 400.0)},
+    },
+    "crop": {
+        "category": "state_name",
+        "metric": "production_",
+        "split": "crop_year",
+        "categorical": {"crop": ["Rice", "Wheat"], "season": ["Kharif"]},
+        "numeric": {"area_": (100.0, 50000.0)},
+    },
+}
+
+
+def measure(func, repeat, setup=None):
+    """
+    Time func() `repeat` times and once more under tracemalloc.
+    Returns (best seconds, peak MB).
+    """
+    best = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1024 ** 2
+
+
+def reset_caches():
+    """Drop in-memory and persisted rollup cubes so every compare run starts cold."""
+    with aggregator._cubes_lock:
+        aggregator._cubes.clear()
+    shutil.rmtree(aggregator.CUBE_DIR, ignore_errors=True)
+
+
+def run_dataset(kind, rows, args, server):
+    """
+    Run every stage for one dataset size.
+    Returns {stage: {"rows", "seconds", "rows_per_sec", "peak_mb"}}.
+    """
+    workload = WORKLOADS[kind]
+    results = {}
+
+    def record(stage, n, seconds, peak_mb):
+        results[stage] = {
+            "rows": n,
+            "seconds": round(seconds, 6),
+            "rows_per_sec": round(n / seconds) if seconds else None,
+            "peak_mb": round(peak_mb, 2),
+        }
+
+    # fetch: paginated download through the HTTP client (capped, since it runs over JSON pages)
+    fetch_rows = min(rows, args.fetch_rows)
+    resource_id = f"{kind}-{fetch_rows}"
+    server.dataset(resource_id)
+    record("fetch", fetch_rows, *measure(
+        lambda: fetch_from_api(resource_id, paginate=True, page_size=args.page_size, use_cache=False),
+        args.repeat,
+    ))
+
+    raw = make_dataset(kind, rows, args.seed)
+    records = raw.to_dict("records")
+    del raw
+
+    # ingest: records -> typed, compacted frame
+    record("ingest", rows, *measure(lambda: compact_dataframe(pd.DataFrame.from_records(records)), args.repeat))
+    df = compact_dataframe(pd.DataFrame.from_records(records))
+    del records
+
+    record("filter_candidates", rows, *measure(lambda: build_filter_candidates(profile_dataframe(df)), args.repeat))
+
+    record("filter", rows, *measure(
+        lambda: FilterEngine(df).apply(workload["categorical"], workload["numeric"]),
+        args.repeat,
+    ))
+
+    split = df[workload["split"]]
+    cutoff = split.median()
+    older, newer = df[split < cutoff], df[split >= cutoff]
+    compare = lambda: compare_states(older, newer, workload["category"], workload["metric"])
+    record("compare_states", rows, *measure(compare, args.repeat, setup=reset_caches))
+    compare()
+    record("compare_states_warm", rows, *measure(compare, args.repeat))
+
+    export_dir = _WORK_DIR / "bench-exports"
+    export_dir.mkdir(exist_ok=True)
+    for fmt in args.export_formats:
+        path = export_dir / f"{kind}-{rows}.{fmt}"
+        record(f"export_{fmt}", rows, *measure(lambda: write_export(df, path, fmt), args.repeat))
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Returns a list of (name, metric, baseline value, current value) regressions.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric, floor in (("seconds", MIN_SECONDS_DELTA), ("peak_mb", MIN_MB_DELTA)):
+            old, new = previous.get(metric), current.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > floor:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def print_table(results, baseline):
+    print(f"{'benchmark':<36}{'rows':>10}{'seconds':>11}{'rows/s':>14}{'peak MB':>10}{'vs base':>10}")
+    for name, r in results.items():
+        previous = baseline.get(name, {}).get("seconds")
+        delta = f"{(r['seconds'] / previous - 1) * 100:+.0f}%" if previous else "—"
+        rate = f"{r['rows_per_sec']:,}" if r["rows_per_sec"] else "—"
+        print(f"{name:<36}{r['rows']:>10,}{r['seconds']:>11.4f}{rate:>14}{r['peak_mb']:>10.1f}{delta:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", default="rainfall,crop", help="comma-separated: rainfall, crop")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated row counts (10k-5M)")
+    parser.add_argument("--fetch-rows", type=int, default=100000, help="largest dataset pulled over HTTP")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=0, help="added to every mock API response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--export-formats", default="csv,parquet")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--output", type=Path, help="also write the results as JSON")
+    parser.add_argument("--workers", type=int, default=parallel.PARALLEL_WORKERS,
+                        help="worker processes for frames over PARALLEL_MIN_ROWS (1 = in-process)")
+    args = parser.parse_args(argv)
+    parallel.PARALLEL_WORKERS = args.workers
+    args.export_formats = [f for f in args.export_formats.split(",") if f]
+
+    baseline = {}
+    if args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8")).get("results", {})
+
+    results = {}
+    try:
+        with MockDataGov(latency_ms=args.latency_ms, error_rate=args.error_rate, seed=args.seed) as server:
+            http_client.BASE_URL = server.base_url
+            for kind in args.datasets.split(","):
+                for rows in (int(s) for s in args.sizes.split(",")):
+                    for stage, result in run_dataset(kind, rows, args, server).items():
+                        results[f"{kind}/{rows}/{stage}"] = result
+            stats = dict(server.stats)
+    finally:
+        shutil.rmtree(_WORK_DIR, ignore_errors=True)
+
+    print_table(results, baseline)
+    print(f"\nmock API: {stats['requests']:,} requests, {stats['throttled']:,} throttled (429)")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "latency_ms": args.latency_ms,
+            "error_rate": args.error_rate,
+            "page_size": args.page_size,
+            "workers": args.workers,
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    for name, metric, old, new in regressions:
+        print(f"REGRESSION {name}: {metric} {old} -> {new}")
+    if not baseline:
+        print("No baseline to compare against; run with --save-baseline to record one.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
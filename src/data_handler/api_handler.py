@@ -1,15 +1,18 @@
-import requests
 import pandas as pd
-from src.utils.config import API_KEY
+from src.data_handler.http_client import APIError, get_resource
+from src.data_handler.preprocessor import compact_dataframe
+from src.utils.config import settings
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 def fetch_data(resource_id, filters=None, limit=100):
     """
     Fetch data from data.gov.in API by resource_id, with optional filters.
     Returns a DataFrame.
     """
-    base_url = f"https://api.data.gov.in/resource/{resource_id}"
     params = {
-        "api-key": API_KEY,
+        "api-key": settings.api_key,
         "format": "json",
         "limit": limit
     }
@@ -20,15 +23,13 @@ def fetch_data(resource_id, filters=None, limit=100):
             params[f"filters[{key}]"] = value
 
     try:
-        response = requests.get(base_url, params=params, timeout=20)
-        response.raise_for_status()
-        data = response.json()
+        data = get_resource(resource_id, params=params, timeout=20)
 
         if "records" in data and len(data["records"]) > 0:
-            return pd.DataFrame(data["records"])
+            return compact_dataframe(pd.DataFrame(data["records"]))
         else:
-            print("⚠️ No records found for given filters.")
+            logger.info("no records", extra={"fields": {"resource_id": resource_id, "filters": filters}})
             return pd.DataFrame()
-    except Exception as e:
-        print(f"❌ Failed to fetch data: {e}")
+    except APIError as e:
+        logger.warning("fetch failed", extra={"fields": {"resource_id": resource_id, "error": str(e)}})
         return pd.DataFrame()
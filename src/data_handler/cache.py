@@ -0,0 +1,251 @@
+# src/data_handler/cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from src.utils.logger import count, get_logger, span
+
+CACHE_DIR = Path(os.getenv("DATASET_CACHE_DIR", Path(__file__).parents[2] / ".cache" / "datasets"))
+CACHE_TTL_SECONDS = int(os.getenv("DATASET_CACHE_TTL", str(24 * 3600)))
+CACHE_MAX_BYTES = int(os.getenv("DATASET_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+MANIFEST_NAME = "manifest.json"
+
+logger = get_logger(__name__)
+
+
+def cache_key(resource_id, params=None):
+    """
+    Build a stable key from a resource_id and its query params.
+    """
+    payload = json.dumps({"resource_id": resource_id, "params": params or {}}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class DatasetCache:
+    """
+    On-disk cache of fetched DataFrames stored as uncompressed Feather files.
+
+    A JSON manifest records, for every entry, the fetch time, last access,
+    row count, schema, file size and the source's `updated` timestamp.
+    Entries expire after `ttl` seconds; an expired entry can be revalidated
+    against the upstream `updated` value instead of being re-downloaded.
+    The directory is kept under `max_bytes` by evicting the least recently
+    used entries.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl=CACHE_TTL_SECONDS, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+
+    # -------------------------
+    # Manifest handling
+    # -------------------------
+    @property
+    def manifest_path(self):
+        return self.cache_dir / MANIFEST_NAME
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _remove_entry(self, manifest, key):
+        entry = manifest.pop(key, None)
+        if entry:
+            try:
+                (self.cache_dir / entry["file"]).unlink()
+            except FileNotFoundError:
+                pass
+
+    # -------------------------
+    # Public API
+    # -------------------------
+    def entry(self, resource_id, params=None):
+        """
+        Return the manifest entry for a resource/params pair, or None.
+        """
+        with self._lock:
+            return self._load_manifest().get(cache_key(resource_id, params))
+
+    def entries(self):
+        """
+        Snapshot of the manifest: {cache key: entry} for every cached DataFrame.
+        """
+        with self._lock:
+            return self._load_manifest()
+
+    def renew(self, resource_id, params=None, updated=None):
+        """
+        Mark an entry as freshly fetched when the upstream `updated` value still
+        matches, so it is served without revalidation for another ttl.
+        Returns True if the entry was renewed.
+        """
+        key = cache_key(resource_id, params)
+        with self._lock:
+            manifest = self._load_manifest()
+            entry = manifest.get(key)
+            if entry is None or updated is None or str(updated) != entry["updated"]:
+                return False
+            entry["fetched_at"] = time.time()
+            self._save_manifest(manifest)
+            return True
+
+    def get(self, resource_id, params=None, revalidate=None, stale_ok=False):
+        """
+        Load a cached DataFrame, or None on a miss.
+
+        `revalidate` is an optional callable returning the upstream `updated`
+        timestamp; it is only called for expired entries, and a matching value
+        renews the entry instead of forcing a re-download. stale_ok=True
+        returns expired entries as they are (offline mode).
+        """
+        key = cache_key(resource_id, params)
+        with self._lock:
+            manifest = self._load_manifest()
+            entry = manifest.get(key)
+            if entry is None:
+                count("cache.miss")
+                return None
+
+            path = self.cache_dir / entry["file"]
+            if not path.exists():
+                self._remove_entry(manifest, key)
+                self._save_manifest(manifest)
+                count("cache.miss")
+                return None
+
+            now = time.time()
+            expired = self.ttl is not None and not stale_ok and now - entry["fetched_at"] > self.ttl
+            if not expired:
+                entry["last_access"] = now
+                self._save_manifest(manifest)
+
+        if expired:
+            # the upstream check is a network round trip, so other datasets are not held up by it
+            upstream = None
+            if revalidate is not None and entry.get("updated") is not None:
+                try:
+                    upstream = revalidate()
+                except Exception as e:
+                    logger.warning("cache revalidation failed",
+                                   extra={"fields": {"resource_id": resource_id, "error": str(e)}})
+            if upstream is None or str(upstream) != entry["updated"]:
+                count("cache.miss")
+                return None
+            with self._lock:
+                manifest = self._load_manifest()
+                current = manifest.get(key)
+                if current is None:
+                    count("cache.miss")
+                    return None
+                now = time.time()
+                if current["fetched_at"] == entry["fetched_at"]:
+                    current["fetched_at"] = now
+                # otherwise it was stored or renewed meanwhile, which is at least as fresh
+                current["last_access"] = now
+                self._save_manifest(manifest)
+                entry, path = current, self.cache_dir / current["file"]
+
+        # Uncompressed Feather can be memory-mapped, so warm loads skip the copy into Arrow buffers
+        count("cache.hit")
+        with span("cache.load", resource_id=resource_id, rows=entry["rows"]):
+            table = feather.read_table(str(path), memory_map=True)
+            return table.to_pandas()
+
+    def put(self, resource_id, df, params=None, updated=None):
+        """
+        Store a DataFrame for a resource/params pair and enforce the size cap.
+        Returns the manifest entry, or None if the frame could not be written.
+        """
+        if df is None:
+            return None
+
+        key = cache_key(resource_id, params)
+        file_name = f"{key}.feather"
+        try:
+            table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            logger.warning("could not cache dataset", extra={"fields": {"resource_id": resource_id, "error": str(e)}})
+            return None
+
+        with self._lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / file_name
+            tmp_path = path.with_suffix(".feather.tmp")
+            feather.write_feather(table, str(tmp_path), compression="uncompressed")
+            os.replace(tmp_path, path)
+
+            now = time.time()
+            entry = {
+                "resource_id": resource_id,
+                "params": params or {},
+                "file": file_name,
+                "fetched_at": now,
+                "last_access": now,
+                "rows": int(len(df)),
+                "bytes": path.stat().st_size,
+                "schema": {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+                "updated": None if updated is None else str(updated),
+            }
+            manifest = self._load_manifest()
+            manifest[key] = entry
+            self._evict(manifest, keep=key)
+            self._save_manifest(manifest)
+            return entry
+
+    def invalidate(self, resource_id=None, params=None):
+        """
+        Drop cached entries.
+        With no arguments the whole cache is cleared; with only resource_id
+        every params variant of that resource is dropped.
+        Returns the number of entries removed.
+        """
+        with self._lock:
+            manifest = self._load_manifest()
+            if resource_id is None:
+                keys = list(manifest)
+            elif params is not None:
+                keys = [k for k in (cache_key(resource_id, params),) if k in manifest]
+            else:
+                keys = [k for k, e in manifest.items() if e["resource_id"] == resource_id]
+
+            for key in keys:
+                self._remove_entry(manifest, key)
+            self._save_manifest(manifest)
+            return len(keys)
+
+    def _evict(self, manifest, keep=None):
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+        """
+        if self.max_bytes is None:
+            return
+        total = sum(e["bytes"] for e in manifest.values())
+        for key, entry in sorted(manifest.items(), key=lambda kv: kv[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= entry["bytes"]
+            self._remove_entry(manifest, key)
+
+
+dataset_cache = DatasetCache()
@@ -0,0 +1,21 @@
+# src/data_handler/catalog.py
+
+# Dataset mapping (display name -> data.gov.in resource ID)
+DATASETS = {
+    "All India Rainfall (1901-2015)": "8196f6cc-83ff-4b56-8581-2630de9d4a5e",
+    "Sub-Divisional Rainfall (1901-2017)": "722e2530-dcb1-4104-bd8f-5a0b22e68999",
+    "District Crop Production (1997)": "35be999b-0208-4354-b557-f6ca9a5355de",
+    "Sub-division rainfall": "8e0bd482-4aba-4d99-9cb9-ff124f6f1c2f",
+    "Max/Min Temp-rainfall": "6df1ecaa-5ebe-477d-9ffe-4e1b87dd71e3",
+    "District-rainfall": "d0419b03-b41b-4226-b48b-0bc92bf139f8",
+    "Rainfall-Central India": "40e1b431-eae6-4ab2-8587-b8ddbdd6bf1c",
+    "Different-Crops(2019)": "f20d7d45-e3d8-4603-bc79-15a3d0db1f9a",
+    "Area_production": "62bdce72-56c6-4d12-b875-27aff49275e3",
+    "Principal Crops": "e540df91-65d2-45a1-8b2d-b4f11023a042",
+    "Paddy-crop arrival": "1ec5d89e-6cff-4358-958c-67432e7a73f9",
+    "Vegetable production": "1e82c76f-ba78-4492-9799-2f6bc05430fe",
+    "Vegetable-crops": "d6e5315d-d4a7-4f1f-ab23-c2adcac3e1e7"
+}
+
+# Resources that only grow upstream; they are kept current with incremental syncs
+APPEND_ONLY = {"Paddy-crop arrival"}
@@ -0,0 +1,90 @@
+# src/data_handler/coordinator.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# How many distinct datasets the process keeps shared in memory
+MAX_SHARED_DATASETS = int(os.getenv("MAX_SHARED_DATASETS", "16"))
+
+
+class FetchCoordinator:
+    """
+    Process-wide single-flight coordinator.
+
+    Concurrent callers asking for the same key share one in-flight load:
+    the first caller runs the loader, the others wait on its Future.
+    Finished results are kept in a small LRU so every session receives the
+    same object, until they are older than the caller's `ttl`. Shared
+    results must be treated as read-only by callers.
+    """
+
+    def __init__(self, max_entries=MAX_SHARED_DATASETS):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._results = OrderedDict()
+
+    def get(self, key, loader, refresh=False, cacheable=None, ttl=None, fetched_at=None):
+        """
+        Return the shared result for `key`, running `loader()` at most once
+        across concurrent callers. refresh=True ignores a finished result
+        (but still joins a load that is already in flight). `cacheable` is an
+        optional predicate deciding whether a result is kept for later callers.
+        A finished result older than `ttl` seconds is loaded again; its age
+        counts from `fetched_at(result)` when given (e.g. when the loader
+        served an older on-disk copy), otherwise from when it was loaded.
+        """
+        with self._lock:
+            if not refresh and key in self._results:
+                result, since = self._results[key]
+                if ttl is None or time.time() - since <= ttl:
+                    self._results.move_to_end(key)
+                    return result
+                del self._results[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if cacheable is None or cacheable(result):
+                self._results[key] = (result, fetched_at(result) if fetched_at else time.time())
+                self._results.move_to_end(key)
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+            else:
+                self._results.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def discard(self, key=None):
+        """
+        Forget a shared result (or all of them when key is None).
+        """
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+    def keys(self):
+        with self._lock:
+            return list(self._results)
+
+
+fetch_coordinator = FetchCoordinator()
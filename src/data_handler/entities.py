@@ -0,0 +1,236 @@
+# src/data_handler/entities.py
+import json
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data_handler.profiler import get_fingerprint
+from src.query_engine.parallel import factorize
+
+ENTITY_FILE = Path(__file__).parent / "data" / "entities.json"
+# Values missing from the bundled table get a stable id derived from their name, above this base
+UNKNOWN_ID_BASE = 1 << 32
+MAX_CACHED_DATASETS = 16
+
+# Checked in order: "sub_division" and "district_name" must win over the generic "state"/"name" hints.
+# Hints match whole words of the column name ("statement" is not a state column).
+COLUMN_HINTS = (
+    ("subdivision", ("subdivision", "sub division")),
+    ("district", ("district", "dist name")),
+    ("crop", ("crop", "commodity")),
+    ("state", ("state", "st name")),
+)
+# Words naming some other attribute of the entity: "crop_year" holds years, "state_code" codes
+NON_ENTITY_WORDS = frozenset({"year", "yr", "code", "id"})
+GEOGRAPHIC_KINDS = ("state", "subdivision", "district")
+
+
+def canonical_key(value):
+    """
+    Lookup key for an entity name: casefolded, '&' read as 'and', punctuation dropped.
+    """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    text = str(value).casefold().replace("&", " and ")
+    text = re.sub(r"[^\w]+", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text or None
+
+
+def _name_words(column_name):
+    """Lowercase words of a column name: "State_Name", "stateName" and "state name" give ["state", "name"]."""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", str(column_name))
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def _has_hint(words, hint):
+    hint = hint.split()
+    if len(hint) == 1:
+        # plurals and run-together names ("states", "statename") still count as the word
+        return any(w in (hint[0], hint[0] + "s", hint[0] + "name") for w in words)
+    return any(words[i:i + len(hint)] == hint for i in range(len(words) - len(hint) + 1))
+
+
+def detect_entity_kind(column_name):
+    """
+    Guess which entity kind a column holds from its name; None when it holds none.
+    """
+    words = _name_words(column_name)
+    if NON_ENTITY_WORDS.intersection(words):
+        return None
+    for kind, hints in COLUMN_HINTS:
+        if any(_has_hint(words, h) for h in hints):
+            return kind
+    return None
+
+
+def common_level(kind1, kind2):
+    """
+    Kind at which two entity columns can be compared: the kind itself when
+    both match, "state" for two different geographic kinds, otherwise None.
+    """
+    if kind1 is None or kind2 is None:
+        return None
+    if kind1 == kind2:
+        return kind1
+    if kind1 in GEOGRAPHIC_KINDS and kind2 in GEOGRAPHIC_KINDS:
+        return "state"
+    return None
+
+
+class EntityDictionary:
+    """
+    Versioned table of canonical states, IMD subdivisions, districts and crops.
+    Names and aliases resolve through one hashed lookup per kind to integer ids;
+    subdivisions and districts also carry their parent state id.
+    """
+
+    def __init__(self, data):
+        self.version = data.get("version")
+        self._lookup = {}
+        self._names = {}
+        self._parents = {}
+        self._lock = threading.Lock()
+        for kind, entities in data.get("kinds", {}).items():
+            table = self._lookup.setdefault(kind, {})
+            for entity in entities:
+                self._names[entity["id"]] = entity["name"]
+                if "state" in entity:
+                    self._parents[entity["id"]] = entity["state"]
+                for alias in [entity["name"]] + entity.get("aliases", []):
+                    key = canonical_key(alias)
+                    if key:
+                        table.setdefault(key, entity["id"])
+
+    @classmethod
+    def load(cls, path=ENTITY_FILE):
+        with open(path, "r", encoding="utf-8") as fh:
+            return cls(json.load(fh))
+
+    def resolve(self, value, kind):
+        """
+        Return the entity id of a value, or None for missing values.
+        Unknown names get a stable hashed id so they still match across datasets.
+        """
+        key = canonical_key(value)
+        if key is None:
+            return None
+        entity_id = self._lookup.get(kind, {}).get(key)
+        if entity_id is None:
+            entity_id = UNKNOWN_ID_BASE + zlib.crc32(f"{kind}:{key}".encode("utf-8"))
+            with self._lock:
+                self._names.setdefault(entity_id, str(value).strip())
+        return entity_id
+
+    def name(self, entity_id):
+        return self._names.get(entity_id)
+
+    def parent(self, entity_id):
+        return self._parents.get(entity_id)
+
+    def ids(self, series, kind, as_kind=None):
+        """
+        Entity ids for a whole column (int64, -1 for missing).
+        Only distinct values are resolved; as_kind="state" maps subdivisions
+        and districts onto their parent state (-1 when unknown).
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, uniques = factorize(series)
+        resolved = []
+        for value in uniques:
+            entity_id = self.resolve(value, kind)
+            if entity_id is not None and as_kind == "state" and kind != "state":
+                entity_id = self.parent(entity_id)
+            resolved.append(-1 if entity_id is None else entity_id)
+        lookup = np.array(resolved + [-1], dtype=np.int64)
+        return lookup[codes]
+
+
+@lru_cache(maxsize=1)
+def get_entity_dictionary():
+    """The bundled entity table, loaded once per process."""
+    return EntityDictionary.load()
+
+
+_dataset_ids = OrderedDict()
+_dataset_lock = threading.Lock()
+
+
+def get_entity_ids(df):
+    """
+    Entity ids for every entity-like column of a dataset, computed once per
+    dataset (by fingerprint). Returns {column: (kind, ids)} with ids aligned to rows.
+    """
+    if df is None or df.empty:
+        return {}
+    fingerprint = get_fingerprint(df)
+    with _dataset_lock:
+        cached = _dataset_ids.get(fingerprint)
+        if cached is not None:
+            _dataset_ids.move_to_end(fingerprint)
+            return cached
+
+    dictionary = get_entity_dictionary()
+    result = {}
+    for col in df.columns:
+        kind = detect_entity_kind(col)
+        if kind is not None and not pd.api.types.is_numeric_dtype(df[col]):
+            result[col] = (kind, dictionary.ids(df[col], kind))
+
+    with _dataset_lock:
+        _dataset_ids[fingerprint] = result
+        while len(_dataset_ids) > MAX_CACHED_DATASETS:
+            _dataset_ids.popitem(last=False)
+    return result
+
+
+def extend_entity_ids(base, df):
+    """
+    Entity ids of `df` (base followed by appended rows), resolving only the
+    new rows when the base ids are cached. Returns {column: (kind, ids)}.
+    """
+    with _dataset_lock:
+        previous = _dataset_ids.get(get_fingerprint(base))
+    if previous is None:
+        return get_entity_ids(df)
+    dictionary = get_entity_dictionary()
+    delta = df.iloc[len(base):]
+    result = {col: (kind, np.concatenate([ids, dictionary.ids(delta[col], kind)]))
+              for col, (kind, ids) in previous.items()}
+
+    fingerprint = get_fingerprint(df)
+    with _dataset_lock:
+        _dataset_ids[fingerprint] = result
+        while len(_dataset_ids) > MAX_CACHED_DATASETS:
+            _dataset_ids.popitem(last=False)
+    return result
+
+
+def entity_ids_for(df, column, as_kind=None):
+    """
+    Ids of one column at the requested level, reusing the ingest-time ids when possible.
+    Returns (kind, ids) or (None, None) for non-entity columns.
+    """
+    cached = get_entity_ids(df).get(column)
+    if cached is None:
+        return None, None
+    kind, ids = cached
+    if as_kind is None or as_kind == kind:
+        return kind, ids
+    return kind, get_entity_dictionary().ids(df[column], kind, as_kind=as_kind)
+
+
+def canonical_names(values, kind):
+    """
+    Map raw labels to their canonical entity names (unknown names keep their text).
+    """
+    dictionary = get_entity_dictionary()
+    return [dictionary.name(dictionary.resolve(v, kind)) if canonical_key(v) else v for v in values]
@@ -0,0 +1,140 @@
+# src/data_handler/exporter.py
+import gzip
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from src.data_handler.cache import CACHE_DIR
+from src.utils.logger import count, span
+
+EXPORT_DIR = Path(os.getenv("EXPORT_CACHE_DIR", CACHE_DIR.parent / "exports"))
+CSV_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "50000"))
+MAX_EXPORT_FILES = int(os.getenv("EXPORT_CACHE_FILES", "32"))
+
+# format -> (mime type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "csv.gz": ("application/gzip", ".csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "feather": ("application/vnd.apache.arrow.file", ".feather"),
+}
+
+_lock = threading.Lock()
+_key_locks = {}
+
+
+def iter_frames(data, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Yield a DataFrame chunk_rows rows at a time; an iterable of DataFrames
+    (e.g. ChunkedDataset.iter_chunks) is passed through as it comes.
+    """
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, max(len(data), 1), chunk_rows):
+            yield data.iloc[start:start + chunk_rows]
+    else:
+        yield from data
+
+
+def write_export(data, path, fmt, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Stream a DataFrame, or an iterable of DataFrame chunks, to `path` in the
+    given format, chunk by chunk. Returns the number of rows written.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'")
+
+    rows = 0
+    if fmt in ("csv", "csv.gz"):
+        opener = gzip.open if fmt == "csv.gz" else open
+        with opener(path, "wb") as fh:
+            header = True
+            for chunk in iter_frames(data, chunk_rows):
+                fh.write(chunk.to_csv(index=False, header=header).encode("utf-8"))
+                header = False
+                rows += len(chunk)
+        return rows
+
+    writer = None
+    try:
+        for chunk in iter_frames(data, chunk_rows):
+            if writer is None:
+                # the first chunk fixes the schema; later chunks are cast to it
+                schema = pa.Schema.from_pandas(chunk.head(0), preserve_index=False)
+                if fmt == "parquet":
+                    import pyarrow.parquet as pq  # loaded on the first Parquet export
+
+                    writer = pq.ParquetWriter(str(path), schema)
+                else:
+                    # Feather v2 is the Arrow IPC file format
+                    writer = pa.ipc.new_file(str(path), schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def export_key(dataset_key, filter_state, fmt):
+    """
+    Stable key for one export: dataset fingerprint, filter state and format.
+    """
+    payload = json.dumps({"dataset": dataset_key, "filters": filter_state, "format": fmt}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _prune():
+    files = sorted((p for p in EXPORT_DIR.iterdir() if p.is_file() and p.suffix != ".tmp"),
+                   key=lambda p: p.stat().st_mtime)
+    for stale in files[:-MAX_EXPORT_FILES]:
+        try:
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _export_lock(key):
+    with _lock:
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+def get_export_path(data, fmt, dataset_key, filter_state=None):
+    """
+    Render an export once per (dataset, filter state, format) and return its path.
+    `data` is a DataFrame or a zero-argument callable returning DataFrame chunks,
+    which is only called when the file has to be written.
+    Later requests for the same export reuse the file on disk. Only requests for
+    the same export wait on each other; other exports are written concurrently.
+    """
+    key = export_key(dataset_key, filter_state, fmt)
+    path = EXPORT_DIR / f"{key}{EXPORT_FORMATS[fmt][1]}"
+    with _export_lock(key):
+        if path.exists():
+            os.utime(path)
+            return path
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with span("export", format=fmt) as s:
+            s["rows"] = write_export(data() if callable(data) else data, tmp_path, fmt)
+            s["bytes"] = tmp_path.stat().st_size
+        count("export.bytes", s["bytes"])
+        os.replace(tmp_path, path)
+    with _lock:
+        # the file exists now, so later requests for it never need this lock
+        _key_locks.pop(key, None)
+        _prune()
+    return path
+
+
+def export_bytes(data, fmt, dataset_key, filter_state=None):
+    """
+    Bytes of a memoized export, for st.download_button's deferred `data` callable.
+    Streamlit holds a download in memory, so the whole file is read here; the
+    export itself is still written chunk by chunk and only once per filter state.
+    """
+    return get_export_path(data, fmt, dataset_key, filter_state).read_bytes()
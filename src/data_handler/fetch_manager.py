@@ -1,46 +1,692 @@
-import requests
-import pandas as pd
-from dotenv import load_dotenv
+import json
 import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data_handler.cache import CACHE_DIR, dataset_cache
+from src.data_handler.coordinator import fetch_coordinator
+from src.data_handler.entities import extend_entity_ids, get_entity_ids
+from src.data_handler.http_client import APIError, get_resource
+from src.data_handler.partition_store import partition_store
+from src.data_handler.preprocessor import compact_dataframe, extend_compact, numeric_text
+from src.data_handler.profiler import column_suggestions, get_profile, profile_chunks
+from src.query_engine.aggregator import extend_cube
+from src.query_engine.filter_engine import extend_filter_engine
+from src.utils.config import settings
+from src.utils.logger import get_logger, span
+
+# Page size and worker count used by the paginated fetch mode
+PAGE_SIZE = int(os.getenv("FETCH_PAGE_SIZE", "1000"))
+MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+# Rows before the last synced total that an offset sync reads again, to pick up edits to the tail
+SYNC_OVERLAP_ROWS = int(os.getenv("SYNC_OVERLAP_ROWS", "0"))
+# Most watermark values (years or days) a single watermark sync requests
+MAX_WATERMARK_STEPS = int(os.getenv("SYNC_MAX_WATERMARK_STEPS", "400"))
+WATERMARK_DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y")
+# Out-of-core store: Parquet files of CHUNK_FILE_ROWS rows, split into row groups of CHUNK_GROUP_ROWS
+CHUNK_DIR = Path(os.getenv("CHUNK_STORE_DIR", CACHE_DIR.parent / "chunked"))
+CHUNK_FILE_ROWS = int(os.getenv("CHUNK_FILE_ROWS", "250000"))
+CHUNK_GROUP_ROWS = int(os.getenv("CHUNK_GROUP_ROWS", "50000"))
+# Profiles of a few fields (see fetch_field_profile): stored whole-resource profiles, and the
+# rows sampled on the request path when none is stored; some are also kept in memory
+FIELD_PROFILE_DIR = Path(os.getenv("FIELD_PROFILE_DIR", CACHE_DIR.parent / "profiles"))
+FIELD_PROFILE_ROWS = int(os.getenv("FIELD_PROFILE_ROWS", "20000"))
+MAX_FIELD_PROFILES = 32
 
-load_dotenv()
-API_KEY = os.getenv("API_KEY")
+logger = get_logger(__name__)
 
-def fetch_from_api(resource_id, limit=1000):
+
+def _get_page(resource_id, limit, offset=0, filters=None, fields=None):
     """
-    Fetch data from data.gov.in API using resource_id.
-    Returns a DataFrame and column suggestions.
+    Fetch a single page of a resource, optionally filtered on the server and
+    limited to some `fields`. Returns the decoded JSON payload.
     """
-    base_url = "https://api.data.gov.in/resource/"
-    url = f"{base_url}{resource_id}"
     params = {
-        "api-key": API_KEY,
+        "api-key": settings.api_key,
         "format": "json",
-        "limit": limit
+        "limit": limit,
+        "offset": offset
     }
+    for key, value in (filters or {}).items():
+        params[f"filters[{key}]"] = value
+    if fields:
+        params["fields"] = ",".join(fields)
+    return get_resource(resource_id, params=params, timeout=20)
+
+
+def _served_page_size(first, page_size, total):
+    """
+    The page size the server actually honours: data.gov.in caps `limit`, so a
+    first page shorter than requested (and than `total`) gives the real size.
+    """
+    served = len(first.get("records") or [])
+    return served if 0 < served < min(page_size, total) else page_size
+
+
+def _fetch_all_records(resource_id, page_size, max_workers, filters=None):
+    """
+    Download every record of a resource.
+    The first page tells us the `total`; the remaining offsets are fetched
+    concurrently and stitched back together in offset order.
+    """
+    first = _get_page(resource_id, page_size, 0, filters)
+    records = list(first.get("records") or [])
+    total = int(first.get("total") or 0)
+
+    if records:
+        page_size = _served_page_size(first, page_size, total)
+        records.extend(_fetch_offsets(resource_id, len(records), total, page_size, max_workers, filters))
+    return first, records
+
+
+def _fetch_range(resource_id, start, stop, page_size, filters=None, fields=None):
+    """
+    Records [start, stop) of a resource. A page shorter than requested is
+    followed by requests for the rest, so a server-side cap never drops rows.
+    """
+    records = []
+    while start + len(records) < stop:
+        limit = min(page_size, stop - start - len(records))
+        page = _get_page(resource_id, limit, start + len(records), filters, fields).get("records") or []
+        if not page:
+            break
+        records.extend(page)
+    return records
+
+
+def _fetch_offsets(resource_id, start, stop, page_size, max_workers, filters=None, fields=None):
+    """
+    Fetch records [start, stop) as pages of page_size, concurrently.
+    Returns them in offset order.
+    """
+    records = []
+    offsets = range(start, stop, page_size)
+    if offsets:
+        workers = max(1, min(max_workers, len(offsets)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map() yields in submission order, so rows keep their upstream order
+            pages = pool.map(
+                lambda off: _fetch_range(resource_id, off, min(off + page_size, stop), page_size, filters, fields),
+                offsets,
+            )
+            for page in pages:
+                records.extend(page)
+    return records
+
+
+def _iter_windows(resource_id, first, total, page_size, max_workers, fields=None):
+    """
+    Yield a resource as raw DataFrames of CHUNK_FILE_ROWS records, fetching
+    each window's pages concurrently; `first` is the already fetched first page.
+    """
+    for start in range(0, total, CHUNK_FILE_ROWS):
+        stop = min(start + CHUNK_FILE_ROWS, total)
+        records = list(first.get("records") or [])[:stop] if start == 0 else []
+        records.extend(_fetch_offsets(resource_id, start + len(records), stop, page_size, max_workers,
+                                      fields=fields))
+        if not records:
+            break
+        yield pd.DataFrame.from_records(records)
+
+
+def fetch_metadata(resource_id):
+    """
+    Fetch resource metadata (title, `total`, `field`, `field_exposed`, `updated`)
+    and one sample record with a single one-row request.
+    Returns a dict, empty on failure.
+    """
+    try:
+        data = _get_page(resource_id, 1)
+    except APIError as e:
+        logger.warning("metadata fetch failed", extra={"fields": {"resource_id": resource_id, "error": str(e)}})
+        return {}
+    metadata = {k: v for k, v in data.items() if k != "records"}
+    records = data.get("records") or []
+    metadata["sample"] = records[0] if records else None
+    return metadata
+
+
+_field_profiles = OrderedDict()
+_field_profiles_lock = threading.Lock()
 
+
+def _profile_path(resource_id):
+    return FIELD_PROFILE_DIR / f"{resource_id}.json"
+
+
+def _stored_profile(resource_id, fields, updated):
+    # whole-resource profile written by an earlier full pass, when it covers `fields` at this version
+    try:
+        with open(_profile_path(resource_id), "r", encoding="utf-8") as fh:
+            stored = json.load(fh)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if stored.get("updated") != updated or not set(fields) <= set(stored.get("fields") or ()):
+        return None
+    return {c: info for c, info in stored["profile"].items() if c in fields}
+
+
+def _store_profile(resource_id, fields, updated, profile):
+    path = _profile_path(resource_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"fields": fields, "updated": updated, "profile": profile}, fh, default=str)
+    os.replace(tmp, path)
+
+
+def _sample_pages(resource_id, first, total, page_size, max_rows, max_workers, fields):
+    """
+    Raw DataFrame of about max_rows records: the first page plus pages spread
+    evenly over the rest of the resource, fetched concurrently.
+    """
+    pages = -(-total // page_size)
+    wanted = max(1, min(pages, max_rows // page_size))
+    # the first and last pages are always included
+    offsets = sorted({round(i * (pages - 1) / max(wanted - 1, 1)) * page_size for i in range(wanted)} - {0})
+    records = list(first.get("records") or [])
+    if offsets:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(offsets)))) as pool:
+            for page in pool.map(lambda off: _fetch_range(resource_id, off, min(off + page_size, total),
+                                                          page_size, fields=fields), offsets):
+                records.extend(page)
+    return pd.DataFrame.from_records(records)
+
+
+def fetch_field_profile(resource_id, fields, max_rows=FIELD_PROFILE_ROWS, page_size=None, max_workers=None):
+    """
+    Profile (see profiler.profile_chunks) of a few fields, for filter options
+    and slider bounds of resources that are only previewed locally.
+    Only `fields` are requested. A whole-resource profile stored by an earlier
+    full pass (max_rows=None, e.g. from the warmer) is used while upstream
+    `updated` is unchanged; otherwise about max_rows records spread over the
+    resource are profiled, so the request path never pages a large resource.
+    Returns (profile, complete); ({}, False) on failure.
+    """
+    fields = sorted(set(fields))
+    if not fields:
+        return {}, False
+    page_size = page_size or PAGE_SIZE
+    max_workers = max_workers or MAX_WORKERS
     try:
-        response = requests.get(url, params=params, timeout=20)
-        response.raise_for_status()
-        data = response.json()
+        first = _get_page(resource_id, page_size, fields=fields)
+        updated = first.get("updated")
+        key = (resource_id, tuple(fields), updated)
+        with _field_profiles_lock:
+            if key in _field_profiles and (max_rows is not None or _field_profiles[key][1]):
+                _field_profiles.move_to_end(key)
+                return _field_profiles[key]
+        stored = _stored_profile(resource_id, fields, updated)
+        total = int(first.get("total") or 0)
+        if stored is not None:
+            result = stored, True
+        elif max_rows is None or total <= max_rows:
+            page_size = _served_page_size(first, page_size, total)
+            with span("fetch.field_profile", resource_id=resource_id, rows=total, fields=len(fields)):
+                # servers that ignore `fields` send every column; only the requested ones are profiled
+                profile = profile_chunks(
+                    compact_dataframe(window[[f for f in fields if f in window.columns]])
+                    for window in _iter_windows(resource_id, first, total, page_size, max_workers, fields)
+                )
+            _store_profile(resource_id, fields, updated, profile)
+            result = profile, True
+        else:
+            page_size = _served_page_size(first, page_size, total)
+            with span("fetch.field_profile", resource_id=resource_id, rows=max_rows, fields=len(fields)):
+                sample = _sample_pages(resource_id, first, total, page_size, max_rows, max_workers, fields)
+                profile = profile_chunks([compact_dataframe(sample[[f for f in fields if f in sample.columns]])])
+            result = profile, False
+    except APIError as e:
+        logger.warning("field profile failed", extra={"fields": {"resource_id": resource_id, "error": str(e)}})
+        return {}, False
+    with _field_profiles_lock:
+        _field_profiles[key] = result
+        _field_profiles.move_to_end(key)
+        while len(_field_profiles) > MAX_FIELD_PROFILES:
+            _field_profiles.popitem(last=False)
+    return result
+
+
+def build_column_suggestions(df):
+    """
+    Summarize each column of a fetched DataFrame.
+    Returns a dict keyed by column name.
+    """
+    return column_suggestions(get_profile(df))
+
+
+def dataset_params(limit=1000, paginate=False, filters=None):
+    """
+    Return the params a fetch is cached under (see fetch_from_api).
+    """
+    params = {"paginate": True} if paginate else {"limit": limit}
+    if filters:
+        params["filters"] = dict(sorted(filters.items()))
+    return params
+
+
+def _coordinator_key(resource_id, params):
+    return resource_id, repr(sorted(params.items()))
+
+
+def fetch_from_api(resource_id, limit=1000, paginate=False, page_size=None, max_workers=None,
+                   use_cache=True, refresh=False, filters=None, raise_errors=False):
+    """
+    Fetch data from data.gov.in API using resource_id.
+    Returns a DataFrame and column suggestions.
+
+    With paginate=True the whole resource is downloaded: the `total` count is
+    read from the first page and the remaining pages are pulled in parallel
+    on a bounded worker pool (`limit` is ignored in that mode).
+
+    `filters` ({field_id: value}) are evaluated by data.gov.in, and each
+    distinct filter set is cached separately.
+
+    A failed download returns an empty DataFrame, or raises APIError with
+    raise_errors=True so callers can tell it from a result with no rows.
+
+    Results are kept in the on-disk dataset cache; refresh=True drops the
+    cached copy and downloads again. Concurrent calls for the same resource
+    share one download and receive the same DataFrame, which callers must
+    not modify in place.
+    """
+    cache_params = dataset_params(limit, paginate, filters)
+    key = _coordinator_key(resource_id, cache_params)
+    with span("fetch.dataset", resource_id=resource_id):
+        try:
+            return fetch_coordinator.get(
+                key,
+                lambda: _load_dataset(resource_id, cache_params, limit, paginate,
+                                      page_size or PAGE_SIZE, max_workers or MAX_WORKERS,
+                                      use_cache, refresh, filters, raise_errors),
+                refresh=refresh or not use_cache,
+                cacheable=lambda result: not result[0].empty,
+                # the shared copy expires with its disk cache entry; offline, that one never does
+                ttl=None if settings.offline else dataset_cache.ttl,
+                fetched_at=lambda result: _fetched_at(resource_id, cache_params),
+            )
+        except APIError:
+            # joined a load started with raise_errors=True
+            if raise_errors:
+                raise
+            return pd.DataFrame(), {}
 
-        if "records" in data and isinstance(data["records"], list):
-            df = pd.DataFrame(data["records"])
 
-            # Build column suggestions
-            col_suggestions = {}
-            for col in df.columns:
-                col_suggestions[col] = {
-                    "dtype": str(df[col].dtype),
-                    "num_unique": df[col].nunique(),
-                    "num_missing": df[col].isna().sum(),
-                    "sample_values": df[col].dropna().unique()[:5].tolist()
-                }
+def _fetched_at(resource_id, params):
+    """
+    When the cached copy of a fetch was downloaded (or last revalidated); now if it is not cached.
+    """
+    entry = dataset_cache.entry(resource_id, params)
+    return entry["fetched_at"] if entry else time.time()
+
+
+def _load_dataset(resource_id, cache_params, limit, paginate, page_size, max_workers, use_cache, refresh,
+                  filters=None, raise_errors=False):
+    """
+    Load a resource from the on-disk cache or the API.
+    Returns a DataFrame and column suggestions.
+    """
+    # offline, the cached copy is all there is: keep it on refresh and serve it past its TTL
+    offline = settings.offline
+    if use_cache:
+        if refresh and not offline:
+            dataset_cache.invalidate(resource_id, cache_params)
+        else:
+            cached = dataset_cache.get(
+                resource_id,
+                cache_params,
+                revalidate=lambda: _get_page(resource_id, 1).get("updated"),
+                stale_ok=offline,
+            )
+            if cached is not None:
+                get_entity_ids(cached)
+                return cached, build_column_suggestions(cached)
+
+    try:
+        if paginate:
+            data, records = _fetch_all_records(resource_id, page_size, max_workers, filters)
+        else:
+            data = _get_page(resource_id, limit, filters=filters)
+            records = data.get("records")
 
-            return df, col_suggestions
+        if isinstance(records, list):
+            # Build the frame once from the combined record list, then type it once per fetch
+            with span("fetch.build_frame", rows=len(records)):
+                df = pd.DataFrame.from_records(records)
+            df = compact_dataframe(df)
+            if use_cache and not df.empty:
+                dataset_cache.put(resource_id, df, cache_params, updated=data.get("updated"))
+            # resolve state/district/crop columns to canonical entity ids once per dataset
+            get_entity_ids(df)
+            return df, build_column_suggestions(df)
         else:
             return pd.DataFrame(), {}
 
-    except Exception as e:
-        print(f"Error fetching data: {e}")
+    except APIError as e:
+        logger.warning("fetch failed", extra={"fields": {"resource_id": resource_id, "error": str(e)}})
+        if raise_errors:
+            raise
+        return pd.DataFrame(), {}
+
+
+# -------------------------
+# Incremental sync
+# -------------------------
+def sync_from_api(resource_id, key=None, watermark=None, page_size=None, max_workers=None, full=False):
+    """
+    Bring the local copy of an append-only resource up to date.
+    Returns a DataFrame and column suggestions, like fetch_from_api(paginate=True),
+    whose cache entry it also updates.
+
+    The first sync downloads everything. Later syncs fetch only the offsets
+    past the last known `total` or, with `watermark` (a year or date field
+    the API can filter on), every watermark value from the last one synced
+    up to today. Rows fetched again (the offset overlap, the current
+    watermark period) replace their local copies; with `key` (one column or
+    a list) a fetched row also supersedes every local row with the same key.
+    Identical records are otherwise kept, as a full download keeps them. New
+    rows are stored as a new partition, and pure appends extend the cached
+    rollup cube, filter indexes and entity ids instead of rebuilding them.
+
+    Offsets only locate the overlap while the local rows still line up with
+    them; once a keyed merge has dropped rows, the overlap is matched by key.
+    A shrinking upstream total, an unaligned copy without a key, a changed
+    schema or full=True triggers a full re-download.
+    """
+    page_size = page_size or PAGE_SIZE
+    max_workers = max_workers or MAX_WORKERS
+    params = dataset_params(paginate=True)
+    state = None if full else partition_store.state(resource_id)
+    base = cached = None
+    if state is not None:
+        base = cached = dataset_cache.get(resource_id, params)
+        if base is None:
+            stored = partition_store.load(resource_id)
+            base = None if stored is None else compact_dataframe(stored)
+    key = key if key is not None else (state or {}).get("key")
+    watermark = watermark or (state or {}).get("watermark_column")
+
+    try:
+        with span("sync.dataset", resource_id=resource_id) as s:
+            if base is None or base.empty:
+                s["mode"] = "full"
+                first, records = _fetch_all_records(resource_id, page_size, max_workers)
+                df = compact_dataframe(pd.DataFrame.from_records(records))
+                if df is None or df.empty:
+                    return pd.DataFrame(), {}
+                total = int(first.get("total") or len(df))
+                partition_store.replace(resource_id, df, {
+                    "total": total, "updated": first.get("updated"), "key": key, "aligned": len(df) == total,
+                    "watermark_column": watermark, "watermark": _watermark_of(df, watermark),
+                })
+                return _publish(resource_id, params, df, first.get("updated"))
+
+            first = _get_page(resource_id, 1)
+            total = int(first.get("total") or 0)
+            # local row i is upstream offset i only until a merge drops or reorders rows
+            aligned = not watermark and state.get("aligned", True) and len(base) == state["total"]
+            if watermark:
+                s["mode"] = "watermark"
+                records = []
+                values = _watermark_values(state.get("watermark") or _watermark_of(base, watermark))
+                for value in values:
+                    records.extend(_fetch_all_records(resource_id, page_size, max_workers, {watermark: value})[1])
+                refetched = _in_watermark(base, watermark, values)
+            elif total < state["total"] or (not aligned and key is None):
+                # without a key, re-fetched rows can only be matched to local rows by their offsets
+                s["mode"] = "full"
+                return sync_from_api(resource_id, key, watermark, page_size, max_workers, full=True)
+            else:
+                s["mode"] = "offset"
+                start = max(0, state["total"] - SYNC_OVERLAP_ROWS)
+                records = _fetch_offsets(resource_id, start, total, page_size, max_workers)
+                # unaligned rows are superseded through the key instead
+                refetched = None
+                if aligned:
+                    refetched = np.zeros(len(base), dtype=bool)
+                    refetched[start:] = True
+            s["rows"] = len(records)
+
+            new_state = {**state, "total": total, "updated": first.get("updated"), "key": key,
+                         "watermark_column": watermark, "aligned": aligned}
+            if not records:
+                partition_store.update_state(resource_id, **new_state)
+                return _publish(resource_id, params, base, first.get("updated"), unchanged=cached is not None)
+
+            merged = _merge_delta(base, pd.DataFrame.from_records(records), key, refetched)
+            if merged is None:
+                return sync_from_api(resource_id, key, watermark, page_size, max_workers, full=True)
+            df, appended = merged
+            new_state["watermark"] = _watermark_of(df, watermark)
+            new_state["aligned"] = aligned and len(df) == total
+            s["appended"] = appended
+            if appended:
+                partition_store.append(resource_id, df.iloc[len(base):], df, new_state)
+            else:
+                partition_store.replace(resource_id, df, new_state)
+            return _publish(resource_id, params, df, first.get("updated"), base=base if appended else None)
+
+    except APIError as e:
+        logger.warning("sync failed", extra={"fields": {"resource_id": resource_id, "error": str(e)}})
         return pd.DataFrame(), {}
+
+
+def _row_hashes(df, columns=None):
+    return pd.util.hash_pandas_object(df if columns is None else df[columns], index=False).to_numpy()
+
+
+def _in_watermark(df, column, values):
+    """Mask of the rows whose watermark column holds one of the API-spelled values."""
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    series = df[column]
+    if pd.api.types.is_numeric_dtype(series):
+        return series.isin([int(v) for v in values]).to_numpy()
+    return series.astype("string").str.strip().isin(values).to_numpy(dtype=bool, na_value=False)
+
+
+def _merge_delta(base, records, key=None, refetched=None):
+    """
+    Merge newly fetched raw rows into a compacted frame.
+
+    `refetched` marks the base rows the fetch covered again (the offset
+    overlap or the current watermark period); they are replaced by the
+    fetched rows, or kept in place when those start with the same records.
+    With `key`, a fetched row also supersedes any base row with its key
+    (the last fetched copy wins) unless it repeats that row unchanged.
+    Returns (frame, appended) where appended is True when every base row was
+    kept in place (so derived structures can be extended), or None when the
+    new rows have different columns.
+    """
+    combined = extend_compact(base, records)
+    if combined is None:
+        return None
+    n_base = len(base)
+    drop = np.zeros(len(combined), dtype=bool)
+    hashes = _row_hashes(combined)
+
+    if refetched is not None and refetched.any():
+        old = np.flatnonzero(refetched)
+        resent = hashes[n_base:n_base + len(old)]
+        if np.array_equal(hashes[old], resent):
+            drop[n_base:n_base + len(old)] = True  # sent again unchanged, in the same order
+        else:
+            drop[old] = True
+
+    if key is not None:
+        key_cols = [key] if isinstance(key, str) else list(key)
+        keys = _row_hashes(combined, key_cols)
+        delta = np.flatnonzero(~drop[n_base:]) + n_base
+        # within the fetch, the last copy of a key wins
+        delta = delta[~pd.Series(keys[delta]).duplicated(keep="last").to_numpy()]
+        drop[n_base:] = True
+        drop[delta] = False
+        # fetched rows identical to a kept base row add nothing
+        kept_base = np.flatnonzero(~drop[:n_base])
+        unchanged = delta[np.isin(hashes[delta], hashes[kept_base])]
+        drop[unchanged] = True
+        delta = np.setdiff1d(delta, unchanged)
+        drop[kept_base[np.isin(keys[kept_base], keys[delta])]] = True
+
+    if drop.any():
+        combined = combined[~drop].reset_index(drop=True)
+    return combined, not drop[:n_base].any()
+
+
+def _publish(resource_id, params, df, updated, base=None, unchanged=False):
+    """
+    Make a synced frame what fetch_from_api(paginate=True) serves, extending
+    the base frame's cube, filter indexes and entity ids for pure appends.
+    """
+    if not unchanged:
+        dataset_cache.put(resource_id, df, params, updated=updated)
+    if base is not None:
+        extend_entity_ids(base, df)
+        extend_filter_engine(base, df)
+        extend_cube(base, df)
+    else:
+        get_entity_ids(df)
+    result = (df, build_column_suggestions(df))
+    fetch_coordinator.get(_coordinator_key(resource_id, params), lambda: result, refresh=True)
+    return result
+
+
+def _watermark_of(df, column):
+    """
+    Latest value of a year/date watermark column, as the API spells it.
+    """
+    if not column or column not in df.columns or df[column].isna().all():
+        return None
+    series = df[column]
+    if pd.api.types.is_numeric_dtype(series):
+        return str(int(series.max()))
+    text = series.astype("string")
+    best = None
+    for fmt in WATERMARK_DATE_FORMATS:
+        parsed = pd.to_datetime(text, format=fmt, errors="coerce")
+        if best is None or parsed.notna().sum() > best[1].notna().sum():
+            best = (fmt, parsed)
+    fmt, parsed = best
+    if parsed.notna().any():
+        return parsed.max().strftime(fmt)
+    return str(text.max())
+
+
+def _watermark_values(last):
+    """
+    Watermark values from the last synced one up to today: years for a year
+    watermark, days for a date watermark, spelled like the stored value.
+    """
+    text = str(last).strip()
+    if text.isdigit():
+        values = [str(y) for y in range(int(text), date.today().year + 1)]
+    else:
+        for fmt in WATERMARK_DATE_FORMATS:
+            try:
+                day = datetime.strptime(text, fmt).date()
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Watermark value {last!r} is neither a year nor a date")
+        values = [(day + timedelta(days=d)).strftime(fmt) for d in range((date.today() - day).days + 1)]
+    if len(values) > MAX_WATERMARK_STEPS:
+        raise ValueError(f"Watermark {last!r} is {len(values)} steps behind; run a full sync instead")
+    return values
+
+
+# -------------------------
+# Out-of-core download
+# -------------------------
+def chunk_store_path(resource_id):
+    return CHUNK_DIR / "".join(c if c.isalnum() or c in "-_." else "_" for c in str(resource_id))
+
+
+def chunk_store_meta(resource_id):
+    """
+    {"total", "updated"} of a resource's out-of-core download, or None if there is none.
+    """
+    try:
+        with open(chunk_store_path(resource_id) / "meta.json", "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def fetch_chunked(resource_id, refresh=False, page_size=None, max_workers=None):
+    """
+    Download a resource into a directory of Parquet files without holding it
+    in memory: pages are fetched CHUNK_FILE_ROWS at a time and each window is
+    written as its own file. Column types come from the first window (numbers
+    as float64, everything else as text) so every file shares one schema.
+    An existing download is reused unless refresh=True or upstream `updated` changed.
+    Returns the directory, or None on failure.
+    """
+    import pyarrow as pa  # only out-of-core downloads build Arrow tables and write Parquet
+    import pyarrow.parquet as pq
+
+    page_size = page_size or PAGE_SIZE
+    max_workers = max_workers or MAX_WORKERS
+    path = chunk_store_path(resource_id)
+    try:
+        first = _get_page(resource_id, page_size)
+    except APIError as e:
+        logger.warning("fetch failed", extra={"fields": {"resource_id": resource_id, "error": str(e)}})
+        return None
+    total = int(first.get("total") or 0)
+    if total == 0:
+        return None
+    page_size = _served_page_size(first, page_size, total)
+    meta = chunk_store_meta(resource_id)
+    if not refresh and meta and meta.get("updated") == first.get("updated") and meta.get("total") == total:
+        return path
+
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    schema = None
+    try:
+        with span("fetch.chunked", resource_id=resource_id, rows=total):
+            for index, window in enumerate(_iter_windows(resource_id, first, total, page_size, max_workers)):
+                if schema is None:
+                    typed = compact_dataframe(window)
+                    schema = pa.schema([
+                        (col, pa.float64() if pd.api.types.is_numeric_dtype(typed[col]) else pa.string())
+                        for col in window.columns
+                    ])
+                table = pa.Table.from_pandas(_conform(window, schema), schema=schema, preserve_index=False)
+                pq.write_table(table, str(tmp / f"part-{index:05d}.parquet"), row_group_size=CHUNK_GROUP_ROWS)
+    except APIError as e:
+        shutil.rmtree(tmp, ignore_errors=True)
+        logger.warning("fetch failed", extra={"fields": {"resource_id": resource_id, "error": str(e)}})
+        return None
+
+    with open(tmp / "meta.json", "w", encoding="utf-8") as fh:
+        json.dump({"total": total, "updated": first.get("updated")}, fh)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    return path
+
+
+def _conform(df, schema):
+    """
+    Cast a raw page window to the store schema (missing columns become null).
+    """
+    import pyarrow as pa
+
+    columns = {}
+    for field in schema:
+        series = df[field.name] if field.name in df.columns else pd.Series([None] * len(df), dtype="object")
+        if pa.types.is_floating(field.type):
+            columns[field.name] = pd.to_numeric(numeric_text(series), errors="coerce").astype("float64")
+        else:
+            columns[field.name] = series.astype("string")
+    return pd.DataFrame(columns)
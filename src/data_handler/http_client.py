@@ -0,0 +1,179 @@
+# src/data_handler/http_client.py
+import os
+import random
+import threading
+import time
+
+from src.utils.config import settings
+from src.utils.logger import count, get_logger, span
+
+BASE_URL = os.getenv("DATA_GOV_BASE_URL", "https://api.data.gov.in/resource/")
+
+# Connection pool sizing; should be >= the paginated fetch worker count
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+# Requests per second allowed for our API key, shared by every session in this process
+RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "5"))
+RATE_BURST = int(os.getenv("API_RATE_BURST", "10"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+logger = get_logger(__name__)
+
+
+class APIError(Exception):
+    """Raised when a data.gov.in request fails after all retries."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    `rate` tokens are added per second up to `capacity`; acquire() blocks
+    until a token is available. penalize() stops all callers for a while,
+    which is how a 429 from the API slows every session down at once.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        with self._lock:
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = now
+
+
+rate_limiter = TokenBucket(RATE_LIMIT, RATE_BURST)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Return the process-wide requests.Session with a keep-alive connection pool.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # imported on first request, so offline and cache-only runs never load requests
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                # Retries are handled in get_json so each attempt goes through the rate limiter
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Accept": "application/json", "Accept-Encoding": "gzip, deflate"})
+                _session = session
+    return _session
+
+
+def _backoff_delay(attempt, response=None):
+    """
+    Exponential backoff with jitter, honouring a Retry-After header when present.
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX)
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+    return delay * (0.5 + random.random() / 2)
+
+
+def get_json(url, params=None, timeout=20, max_retries=None):
+    """
+    GET a URL through the shared session and return the decoded JSON.
+    429/5xx responses, connection errors and broken bodies are retried with
+    exponential backoff; an APIError is raised once retries are exhausted.
+    Every other requests error is raised as an APIError right away.
+    """
+    import requests
+
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    session = get_session()
+
+    for attempt in range(max_retries + 1):
+        with span("api.rate_limit_wait"):
+            rate_limiter.acquire()
+        try:
+            with span("api.request", url=url, attempt=attempt) as s:
+                response = session.get(url, params=params, timeout=timeout)
+                s["status"] = response.status_code
+                s["bytes"] = len(response.content)
+            count("api.requests")
+            count("api.bytes_fetched", len(response.content))
+        except (requests.ConnectionError, requests.Timeout,
+                requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError) as e:
+            # dropped connections and truncated or garbled bodies are worth another attempt
+            if attempt == max_retries:
+                raise APIError(f"Request to {url} failed: {e}") from e
+            count("api.retries")
+            time.sleep(_backoff_delay(attempt))
+            continue
+        except requests.RequestException as e:
+            # redirect loops, invalid URLs, ...: retrying would fail the same way
+            raise APIError(f"Request to {url} failed: {e}") from e
+
+        if response.status_code in RETRY_STATUSES and attempt < max_retries:
+            count("api.retries")
+            logger.info("retrying", extra={"fields": {"url": url, "status": response.status_code, "attempt": attempt}})
+            delay = _backoff_delay(attempt, response)
+            if response.status_code == 429:
+                rate_limiter.penalize(delay)
+            else:
+                time.sleep(delay)
+            continue
+
+        try:
+            response.raise_for_status()
+            with span("api.decode"):
+                return response.json()
+        except requests.HTTPError as e:
+            raise APIError(f"Request to {url} failed: {e}", status=response.status_code) from e
+        except ValueError as e:
+            raise APIError(f"Invalid JSON from {url}: {e}", status=response.status_code) from e
+
+    raise APIError(f"Request to {url} failed after {max_retries} retries")
+
+
+def get_resource(resource_id, params=None, timeout=20, max_retries=None):
+    """
+    Fetch one page of a data.gov.in resource.
+    Returns the decoded JSON payload; raises APIError right away in offline mode.
+    """
+    if settings.offline:
+        count("api.offline")
+        raise APIError("offline mode (no API_KEY or DATA_GOV_OFFLINE=1): only cached data is available")
+    return get_json(f"{BASE_URL}{resource_id}", params=params, timeout=timeout, max_retries=max_retries)
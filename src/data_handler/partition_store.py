@@ -0,0 +1,122 @@
+# src/data_handler/partition_store.py
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import pyarrow as pa
+
+from src.data_handler.cache import CACHE_DIR
+from src.utils.logger import span
+
+PARTITION_DIR = Path(os.getenv("PARTITION_STORE_DIR", CACHE_DIR.parent / "partitions"))
+# Partitions are merged back into one file once a resource has this many
+MAX_PARTITIONS = int(os.getenv("PARTITION_STORE_MAX_PARTS", "16"))
+
+STATE_NAME = "state.json"
+
+
+class PartitionStore:
+    """
+    Append-only local copy of synced resources.
+
+    Every sync writes its new rows as one Parquet partition next to a
+    state.json that records the upstream `total` already consumed, the
+    watermark, the dedupe key and the row count. When rows are replaced
+    (a dedupe key re-sent with new values) the resource is rewritten as a
+    single partition; too many partitions are merged the same way.
+    """
+
+    def __init__(self, root=PARTITION_DIR, max_partitions=MAX_PARTITIONS):
+        self.root = Path(root)
+        self.max_partitions = max_partitions
+        self._lock = threading.RLock()
+
+    def _dir(self, resource_id):
+        return self.root / re.sub(r"[^\w.-]", "_", str(resource_id))
+
+    def _parts(self, resource_id):
+        return sorted(self._dir(resource_id).glob("part-*.parquet"))
+
+    def state(self, resource_id):
+        """
+        Return the sync state of a resource, or None if it was never synced.
+        """
+        try:
+            with open(self._dir(resource_id) / STATE_NAME, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_state(self, resource_id, state):
+        path = self._dir(resource_id) / STATE_NAME
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(state, fh, indent=2, default=str)
+        os.replace(tmp, path)
+
+    def _write_part(self, resource_id, df, index):
+        import pyarrow.parquet as pq  # partitions are only touched by append-only syncs
+
+        directory = self._dir(resource_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"part-{index:05d}.parquet"
+        tmp = path.with_suffix(".tmp")
+        pq.write_table(pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False), str(tmp))
+        os.replace(tmp, path)
+
+    def replace(self, resource_id, df, state):
+        """
+        Store df as the only partition of a resource.
+        """
+        with self._lock, span("store.replace", resource_id=resource_id, rows=len(df)):
+            shutil.rmtree(self._dir(resource_id), ignore_errors=True)
+            self._write_part(resource_id, df, 0)
+            self._write_state(resource_id, {**state, "rows": len(df), "partitions": 1, "synced_at": time.time()})
+
+    def append(self, resource_id, delta, full, state):
+        """
+        Append delta as a new partition; `full` (the merged frame) is written
+        instead when the resource already has max_partitions partitions.
+        """
+        with self._lock:
+            parts = self._parts(resource_id)
+            if not parts or len(parts) >= self.max_partitions:
+                return self.replace(resource_id, full, state)
+            with span("store.append", resource_id=resource_id, rows=len(delta)):
+                index = int(parts[-1].stem.split("-")[1]) + 1
+                self._write_part(resource_id, delta, index)
+                self._write_state(resource_id, {**state, "rows": len(full), "partitions": len(parts) + 1,
+                                                "synced_at": time.time()})
+
+    def update_state(self, resource_id, **changes):
+        with self._lock:
+            state = self.state(resource_id)
+            if state is not None:
+                self._write_state(resource_id, {**state, **changes, "synced_at": time.time()})
+
+    def load(self, resource_id):
+        """
+        Read every partition of a resource back as one DataFrame, or None.
+        """
+        import pyarrow.parquet as pq
+
+        with self._lock:
+            parts = self._parts(resource_id)
+            if not parts:
+                return None
+            with span("store.load", resource_id=resource_id, partitions=len(parts)):
+                table = pa.concat_tables(
+                    [pq.read_table(str(p)) for p in parts], promote_options="permissive"
+                ).unify_dictionaries()
+                return table.to_pandas()
+
+    def clear(self, resource_id):
+        with self._lock:
+            shutil.rmtree(self._dir(resource_id), ignore_errors=True)
+
+
+partition_store = PartitionStore()
@@ -1,20 +1,177 @@
 # src/data_handler/preprocessor.py
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_float_dtype, is_integer_dtype, is_numeric_dtype
+
+from src.query_engine.parallel import to_numeric
+from src.utils.logger import count, get_logger, timed
+
+# Text that data.gov.in uses for "no value"; read as missing, not as a failed number
+MISSING_MARKERS = ("", "na", "n/a", "nan", "-", "--", "..", "nil", "null", "none")
+# "1,234" and Indian-style "1,23,456": digit groups separated by commas
+GROUPED_NUMBER = r"^[+-]?\d{1,3}(?:,\d{2,3})+(?:\.\d+)?$"
+# Leading values checked before a whole text column is parsed as numbers
+NUMERIC_PROBE_ROWS = 1000
+# Text columns with at most this share of distinct values become `category`
+CATEGORY_MAX_RATIO = 0.5
+
+# Month names and abbreviations as they appear in column names, with their month numbers
+MONTH_NUMBERS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6, "jul": 7, "aug": 8, "sep": 9, "sept": 9,
+    "oct": 10, "nov": 11, "dec": 12, "january": 1, "february": 2, "march": 3, "april": 4, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+}
+MONTH_NAMES = tuple(MONTH_NUMBERS)
+
+logger = get_logger(__name__)
+
+
+def is_month_col_name(col_name: str) -> bool:
+    c = str(col_name).lower()
+    return any(m in c for m in MONTH_NAMES)
+
+
+def is_year_col_name(col_name: str) -> bool:
+    c = str(col_name).lower()
+    return "year" in c or c in ("yr", "yr.")
+
 
 def suggest_columns(df, top_n=10):
     """
     Analyze the dataset and suggest potential important columns.
     Returns a dict with summary info about each column.
     """
+    # imported here: the profiler itself depends on this module's column-name helpers
+    from src.data_handler.profiler import column_suggestions, get_profile
+
     if df is None or df.empty:
         return {}
+    return column_suggestions(get_profile(df), top_n=top_n)
+
+
+def downcast_numeric(series):
+    """
+    Shrink a numeric Series to the narrowest dtype that holds its values exactly.
+    Integral floats become (nullable) integers; other floats go to float32
+    only when that round-trips without loss.
+    """
+    if is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    if not is_float_dtype(series):
+        return series
+
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    present = values[~np.isnan(values)]
+    if present.size and np.all(np.isfinite(present)) and np.all(present == np.round(present)):
+        if present.size == values.size:
+            return pd.to_numeric(series.astype("int64"), downcast="integer")
+        narrow = pd.to_numeric(pd.Series(present.astype("int64")), downcast="integer").dtype
+        return series.astype(f"Int{narrow.itemsize * 8}")
+
+    as32 = values.astype("float32")
+    if np.array_equal(as32.astype("float64"), values, equal_nan=True):
+        return series.astype("float32")
+    return series
+
+
+def numeric_text(series):
+    """
+    Raw values as text ready for number parsing: trimmed, missing markers
+    as <NA> and thousands separators removed from grouped numbers.
+    """
+    text = series.astype("string").str.strip()
+    text = text.mask(text.str.casefold().isin(MISSING_MARKERS))
+    if text.str.contains(",", regex=False).any():
+        grouped = text.str.fullmatch(GROUPED_NUMBER).fillna(False)
+        text = text.mask(grouped, text.str.replace(",", "", regex=False))
+    return text
+
+
+def _parses(values, numeric=None):
+    """
+    True when every (non-missing) text value is a number and none is a zero-padded code.
+    """
+    if numeric is None:
+        numeric = pd.to_numeric(values, errors="coerce")
+    return int(numeric.notna().sum()) == len(values) and not values.str.match(r"[+-]?0\d").any()
+
+
+def infer_column(series, name=None):
+    """
+    Convert one raw (string) column to its compact type.
+    A text column becomes numeric only when every value parses (missing
+    markers aside); codes with leading zeros such as "007" and ranges such
+    as "2014-15" stay text.
+    Returns the converted Series, or the input when no conversion applies.
+    """
+    if is_numeric_dtype(series):
+        return downcast_numeric(series)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+
+    n_present = int(series.notna().sum())
+    if n_present == 0:
+        return series
+
+    # a failure in the first values settles it without normalizing the whole column
+    if _parses(numeric_text(series.head(NUMERIC_PROBE_ROWS)).dropna()):
+        text = numeric_text(series)
+        numeric = to_numeric(text)
+        values = text.dropna()
+        if len(values) and _parses(values, numeric):
+            coerced = n_present - len(values)
+            if coerced:
+                logger.info("missing markers read as NaN", extra={"fields": {"column": str(name), "values": coerced}})
+                count("ingest.coerced", coerced)
+            return downcast_numeric(numeric)
+
+    if series.nunique(dropna=True) <= CATEGORY_MAX_RATIO * n_present:
+        return series.astype("category")
+    return series
+
+
+@timed("ingest.compact")
+def compact_dataframe(df):
+    """
+    Type-inference and compaction stage run once per fetch.
+    data.gov.in returns every field as text: numeric, year and month columns
+    are converted to numbers, numeric widths are downcast and low-cardinality
+    text columns are dictionary-encoded as `category`.
+    Returns a new DataFrame; the input is left untouched.
+    """
+    if df is None or df.empty:
+        return df
+    return pd.DataFrame({col: infer_column(df[col], col) for col in df.columns}, index=df.index)
+
+
+def extend_compact(base, delta):
+    """
+    Append raw (string) rows to an already compacted frame, typing the new rows
+    to match the existing columns instead of re-inferring the whole dataset.
+    Categories are unioned, numeric columns are re-narrowed to fit the new values.
+    Returns the combined DataFrame, or None when the columns differ.
+    """
+    if delta is None or delta.empty:
+        return base
+    if list(delta.columns) != list(base.columns):
+        return None
 
-    col_summary = {}
-    for col in df.columns:
-        col_summary[col] = {
-            "dtype": str(df[col].dtype),
-            "num_unique": df[col].nunique(),
-            "num_missing": df[col].isna().sum(),
-            "sample_values": df[col].dropna().unique()[:top_n].tolist()
-        }
-    return col_summary
+    combined = {}
+    for col in base.columns:
+        old, new = base[col], delta[col]
+        if isinstance(old.dtype, pd.CategoricalDtype):
+            try:
+                new = pd.Categorical(new.astype(old.cat.categories.dtype))
+                categorical = pd.api.types.union_categoricals([old.array, new], ignore_order=True)
+            except (TypeError, ValueError):
+                categorical = pd.Categorical(np.concatenate([old.to_numpy(dtype=object), new.to_numpy(dtype=object)]))
+            combined[col] = pd.Series(categorical, name=col)
+        elif is_numeric_dtype(old):
+            values = np.concatenate([
+                old.to_numpy(dtype="float64", na_value=np.nan),
+                pd.to_numeric(numeric_text(new), errors="coerce").to_numpy(dtype="float64", na_value=np.nan),
+            ])
+            combined[col] = downcast_numeric(pd.Series(values, name=col))
+        else:
+            combined[col] = pd.concat([old, new.astype(old.dtype)], ignore_index=True)
+    return pd.DataFrame(combined)
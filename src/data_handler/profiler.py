@@ -0,0 +1,257 @@
+# src/data_handler/profiler.py
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from src.data_handler.preprocessor import is_month_col_name, is_year_col_name
+from src.utils.logger import count, timed
+
+SAMPLE_SIZE = 10
+# Categorical filters are only offered up to this many options
+MAX_CATEGORY_OPTIONS = 500
+MAX_CACHED_PROFILES = 32
+# Distinct values tracked per column when profiling chunk by chunk; num_unique is a lower bound past this
+MAX_TRACKED_DISTINCT = 10000
+
+_lock = threading.Lock()
+_profiles = OrderedDict()
+_by_identity = {}
+
+
+def dataset_fingerprint(df):
+    """
+    Content fingerprint: shape, column names, dtypes and a hash of every row,
+    so any edited value gives a new fingerprint. Stable for the same data
+    across reruns; get_fingerprint computes it once per frame object.
+    """
+    h = hashlib.sha1()
+    h.update(repr((len(df), [(str(c), str(t)) for c, t in df.dtypes.items()])).encode("utf-8"))
+    if len(df):
+        try:
+            hashes = pd.util.hash_pandas_object(df, index=False)
+        except TypeError:
+            # unhashable cells (lists or dicts from raw JSON) are hashed by their text
+            hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+        h.update(hashes.to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _text_numeric_ratio(uniques):
+    """
+    Share of distinct non-missing text values that look like numbers.
+    """
+    if len(uniques) == 0:
+        return 0.0
+    parsed = pd.to_numeric(pd.Series(uniques, dtype="string").str.strip(), errors="coerce")
+    return float(parsed.notna().mean())
+
+
+def _column_role(col, series, n_unique, numeric_ratio):
+    """
+    Classify a column the same way the app picks filter widgets:
+    month/value columns get sliders, small vocabularies get multiselects.
+    """
+    if n_unique == 0:
+        return "empty"
+    if is_month_col_name(col):
+        return "month"
+    numeric = is_numeric_dtype(series)
+    if numeric and is_year_col_name(col):
+        return "year"
+    # many distinct numeric-looking strings behave like a value column
+    if numeric or (n_unique > 50 and numeric_ratio > 0.6):
+        return "value"
+    if n_unique <= 200:
+        return "category"
+    return "text"
+
+
+@timed("profile")
+def profile_dataframe(df):
+    """
+    Compute all column statistics in one pass over the frame.
+    Returns {column: {dtype, num_unique, num_missing, numeric_ratio, min, max,
+    sample_values, role, options}}; `options` holds sorted choices for
+    categorical columns.
+    """
+    if df is None or df.empty:
+        return {}
+
+    n_unique = df.nunique(dropna=True)
+    n_missing = df.isna().sum()
+    numeric_cols = [c for c in df.columns if is_numeric_dtype(df[c])]
+    mins = df[numeric_cols].min() if numeric_cols else pd.Series(dtype="float64")
+    maxs = df[numeric_cols].max() if numeric_cols else pd.Series(dtype="float64")
+
+    profile = {}
+    for col in df.columns:
+        series = df[col]
+        uniques = series.dropna().unique()
+        numeric = col in mins.index
+        numeric_ratio = 1.0 if numeric else _text_numeric_ratio(uniques)
+        role = _column_role(col, series, int(n_unique[col]), numeric_ratio)
+
+        col_min = col_max = None
+        if numeric:
+            col_min, col_max = mins[col], maxs[col]
+        elif role in ("month", "value") and numeric_ratio > 0:
+            coerced = pd.to_numeric(series, errors="coerce")
+            col_min, col_max = coerced.min(), coerced.max()
+
+        options = None
+        if role == "category" and len(uniques) <= MAX_CATEGORY_OPTIONS:
+            options = sorted((str(v) for v in uniques), key=str.lower)
+
+        profile[col] = {
+            "dtype": str(series.dtype),
+            "num_unique": int(n_unique[col]),
+            "num_missing": int(n_missing[col]),
+            "numeric_ratio": numeric_ratio,
+            "min": None if col_min is None or pd.isna(col_min) else float(col_min),
+            "max": None if col_max is None or pd.isna(col_max) else float(col_max),
+            "sample_values": uniques[:SAMPLE_SIZE].tolist(),
+            "role": role,
+            "options": options,
+        }
+    return profile
+
+
+def profile_chunks(chunks):
+    """
+    Profile a dataset streamed as DataFrame chunks, in memory bounded by
+    MAX_TRACKED_DISTINCT values per column rather than by the row count.
+    Returns the same structure as profile_dataframe.
+    """
+    stats = {}
+    for chunk in chunks:
+        numeric_cols = [c for c in chunk.columns if is_numeric_dtype(chunk[c])]
+        mins, maxs = chunk[numeric_cols].min(), chunk[numeric_cols].max()
+        missing = chunk.isna().sum()
+        for col in chunk.columns:
+            acc = stats.setdefault(col, {"dtype": chunk[col].dtype, "missing": 0, "min": None, "max": None,
+                                        "distinct": {}, "overflow": False})
+            acc["missing"] += int(missing[col])
+            if col in mins.index and not pd.isna(mins[col]):
+                acc["min"] = mins[col] if acc["min"] is None else min(acc["min"], mins[col])
+                acc["max"] = maxs[col] if acc["max"] is None else max(acc["max"], maxs[col])
+            if not acc["overflow"]:
+                # dict keeps first-seen order, like unique() does for sample values
+                acc["distinct"].update(dict.fromkeys(chunk[col].dropna().unique().tolist()))
+                if len(acc["distinct"]) > MAX_TRACKED_DISTINCT:
+                    acc["overflow"] = True
+
+    profile = {}
+    for col, acc in stats.items():
+        uniques = list(acc["distinct"])
+        series = pd.Series([], dtype=acc["dtype"])
+        numeric = is_numeric_dtype(series)
+        numeric_ratio = 1.0 if numeric else _text_numeric_ratio(uniques)
+        role = _column_role(col, series, len(uniques), numeric_ratio)
+        if acc["overflow"] and role == "category":
+            role = "text"
+
+        col_min, col_max = acc["min"], acc["max"]
+        if not numeric and role in ("month", "value") and numeric_ratio > 0:
+            coerced = pd.to_numeric(pd.Series(uniques, dtype="string"), errors="coerce")
+            col_min, col_max = coerced.min(), coerced.max()
+
+        options = None
+        if role == "category" and len(uniques) <= MAX_CATEGORY_OPTIONS:
+            options = sorted((str(v) for v in uniques), key=str.lower)
+
+        profile[col] = {
+            "dtype": str(acc["dtype"]),
+            "num_unique": len(uniques),
+            "num_missing": acc["missing"],
+            "numeric_ratio": numeric_ratio,
+            "min": None if col_min is None or pd.isna(col_min) else float(col_min),
+            "max": None if col_max is None or pd.isna(col_max) else float(col_max),
+            "sample_values": uniques[:SAMPLE_SIZE],
+            "role": role,
+            "options": options,
+        }
+    return profile
+
+
+def get_fingerprint(df):
+    """
+    Return the fingerprint of a frame, remembered per object so repeated
+    calls on the same (shared) frame cost nothing.
+    """
+    key = id(df)
+    with _lock:
+        hit = _by_identity.get(key)
+        if hit is not None and hit[0]() is df:
+            return hit[1]
+
+    fingerprint = dataset_fingerprint(df)
+    with _lock:
+        _by_identity[key] = (weakref.ref(df, lambda _, key=key: _by_identity.pop(key, None)), fingerprint)
+    return fingerprint
+
+
+def get_profile(df):
+    """
+    Return the cached profile of a frame, computing it at most once.
+    The same object is recognized by identity (no work at all); an equal
+    frame is recognized by its fingerprint.
+    """
+    if df is None or df.empty:
+        return {}
+
+    fingerprint = get_fingerprint(df)
+    with _lock:
+        profile = _profiles.get(fingerprint)
+        if profile is not None:
+            _profiles.move_to_end(fingerprint)
+            return profile
+
+    count("profile.computed")
+    profile = profile_dataframe(df)
+    with _lock:
+        _profiles[fingerprint] = profile
+        while len(_profiles) > MAX_CACHED_PROFILES:
+            _profiles.popitem(last=False)
+    return profile
+
+
+def column_suggestions(profile, top_n=5):
+    """
+    Shape a profile into the column-suggestion dict used by the UI.
+    """
+    return {
+        col: {
+            "dtype": info["dtype"],
+            "num_unique": info["num_unique"],
+            "num_missing": info["num_missing"],
+            "sample_values": info["sample_values"][:top_n],
+        }
+        for col, info in profile.items()
+    }
+
+
+def build_filter_candidates(profile):
+    """
+    Split profiled columns into categorical and numeric filter candidates.
+    Returns (categorical, numeric, skipped) where skipped holds (column, reason).
+    """
+    categorical_candidates = []
+    numeric_candidates = []
+    skipped_columns = []
+
+    for col, info in profile.items():
+        role = info["role"]
+        if role == "empty":
+            skipped_columns.append((col, "all values missing"))
+        elif role in ("month", "value", "year"):
+            numeric_candidates.append(col)
+        elif role == "category":
+            categorical_candidates.append(col)
+        else:
+            skipped_columns.append((col, f"high cardinality ({info['num_unique']} unique)"))
+
+    return categorical_candidates, numeric_candidates, skipped_columns
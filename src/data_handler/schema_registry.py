@@ -0,0 +1,151 @@
+# src/data_handler/schema_registry.py
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.data_handler.cache import CACHE_DIR
+from src.data_handler.fetch_manager import fetch_metadata
+from src.utils.config import settings
+
+REGISTRY_FILE = Path(os.getenv("SCHEMA_REGISTRY_FILE", CACHE_DIR.parent / "schemas.json"))
+SCHEMA_TTL_SECONDS = int(os.getenv("SCHEMA_TTL", str(24 * 3600)))
+INTROSPECT_WORKERS = int(os.getenv("SCHEMA_INTROSPECT_WORKERS", "4"))
+# After a failed introspection, reruns reuse the stored schema for this long instead of retrying
+FAILURE_RETRY_SECONDS = int(os.getenv("SCHEMA_FAILURE_RETRY", "300"))
+
+# Metadata keys worth keeping; everything the pushdown planner and the UI read
+SCHEMA_KEYS = ("title", "total", "updated", "field", "field_exposed", "sample")
+
+
+class SchemaRegistry:
+    """
+    Local registry of resource schemas: field list, filterable fields,
+    record count, upstream `updated` and one sample record, all from a
+    single limit=1 request. Entries are stored in a JSON file and reused
+    for `ttl` seconds, so schemas can be browsed without downloading data.
+    """
+
+    def __init__(self, path=REGISTRY_FILE, ttl=SCHEMA_TTL_SECONDS):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._schemas = None
+        self._mtime = None  # mtime of the file when it was last read or written
+        self._failed = {}  # resource_id -> time of the last failed introspection
+        self._lock = threading.RLock()
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _file_mtime(self):
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        # other processes (the warmer CLI, other app servers) write the same file
+        mtime = self._file_mtime()
+        if self._schemas is None or mtime != self._mtime:
+            self._schemas = self._read()
+            self._mtime = mtime
+        return self._schemas
+
+    def _save(self):
+        # merge with what is on disk now, keeping the newer copy of each schema
+        for resource_id, schema in self._read().items():
+            mine = self._schemas.get(resource_id)
+            if mine is None or schema.get("fetched_at", 0) > mine.get("fetched_at", 0):
+                self._schemas[resource_id] = schema
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self._schemas, fh, indent=2, sort_keys=True, default=str)
+        os.replace(tmp, self.path)
+        self._mtime = self._file_mtime()
+
+    def record(self, resource_id, metadata):
+        """
+        Store metadata already fetched elsewhere (e.g. by fetch_metadata).
+        Returns the stored schema, or None for empty metadata.
+        """
+        if not metadata:
+            return None
+        schema = {k: metadata.get(k) for k in SCHEMA_KEYS}
+        schema["fetched_at"] = time.time()
+        with self._lock:
+            self._failed.pop(resource_id, None)
+            self._load()[resource_id] = schema
+            self._save()
+        return schema
+
+    def get(self, resource_id, refresh=False, fetch=True):
+        """
+        Return the schema of a resource, introspecting it when it is missing,
+        older than ttl or refresh=True. With fetch=False only a stored schema
+        (of any age) is returned, as in offline mode. None when the resource
+        cannot be reached; it is not tried again for FAILURE_RETRY_SECONDS
+        unless refresh=True.
+        """
+        with self._lock:
+            schema = self._load().get(resource_id)
+        if not fetch or settings.offline:
+            return schema
+        now = time.time()
+        if not refresh:
+            if schema is not None and now - schema["fetched_at"] < self.ttl:
+                return schema
+            if now - self._failed.get(resource_id, 0) < FAILURE_RETRY_SECONDS:
+                return schema
+        fetched = self.record(resource_id, fetch_metadata(resource_id))
+        if fetched is None:
+            self._failed[resource_id] = now
+        return fetched or schema
+
+    def introspect(self, resource_ids, refresh=False, max_workers=INTROSPECT_WORKERS):
+        """
+        Schemas of several resources, fetched in parallel.
+        Returns {resource_id: schema or None}.
+        """
+        resource_ids = list(resource_ids)
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            schemas = pool.map(lambda rid: self.get(rid, refresh=refresh), resource_ids)
+            return dict(zip(resource_ids, schemas))
+
+
+def schema_fields(schema):
+    """
+    One row per field: id, display name, type, whether the API can filter on it and a sample value.
+    """
+    if not schema:
+        return []
+    exposed = {f.get("id") for f in schema.get("field_exposed") or [] if isinstance(f, dict)}
+    sample = schema.get("sample") or {}
+    return [
+        {
+            "field": f.get("id"),
+            "name": f.get("name"),
+            "type": f.get("type"),
+            "filterable": f.get("id") in exposed,
+            "sample": sample.get(f.get("id")),
+        }
+        for f in schema.get("field") or []
+        if isinstance(f, dict)
+    ]
+
+
+def shared_fields(schema1, schema2):
+    """
+    Field ids present in both schemas (matched case-insensitively), in the first schema's order.
+    """
+    other = {str(f["field"]).strip().lower() for f in schema_fields(schema2)}
+    return [f["field"] for f in schema_fields(schema1) if str(f["field"]).strip().lower() in other]
+
+
+schema_registry = SchemaRegistry()
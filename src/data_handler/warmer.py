@@ -0,0 +1,216 @@
+# src/data_handler/warmer.py
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.data_handler.cache import dataset_cache
+from src.data_handler.catalog import APPEND_ONLY, DATASETS
+from src.data_handler.fetch_manager import (
+    chunk_store_meta, dataset_params, fetch_chunked, fetch_field_profile, fetch_from_api, fetch_metadata,
+    sync_from_api,
+)
+from src.data_handler.profiler import get_profile
+from src.data_handler.schema_registry import schema_registry
+from src.query_engine.chunked import OUT_OF_CORE_ROWS
+from src.query_engine.planner import PREVIEW_ROWS, pushable_fields, should_push_down
+from src.query_engine.search import search_index
+from src.utils.config import settings
+from src.utils.logger import get_logger, span
+
+# Seconds between passes of the app's background refresher; off unless set (the CLI has --watch)
+REFRESH_INTERVAL = int(os.getenv("CATALOG_REFRESH_SECONDS", "0"))
+# Resources warmed at once; every request still goes through the shared rate limiter
+WARM_WORKERS = int(os.getenv("CATALOG_WARM_WORKERS", "4"))
+
+logger = get_logger(__name__)
+
+
+def fetch_options(metadata):
+    """
+    Return the fetch_from_api arguments the app uses for a resource: a preview
+    for resources large enough to filter on the server, the full download otherwise.
+    Resources too large to filter on the server or to hold in memory get
+    {"out_of_core": True} and are downloaded with fetch_chunked instead.
+    """
+    total = metadata.get("total")
+    if should_push_down(total, pushable_fields(metadata)):
+        return {"limit": PREVIEW_ROWS}
+    if total is not None and int(total) > OUT_OF_CORE_ROWS:
+        return {"out_of_core": True}
+    return {"paginate": True}
+
+
+def profile_fields(metadata, preview):
+    """
+    Fields whose filter options and slider bounds come from the whole resource
+    when only a preview is loaded: the filterable fields and the numeric
+    columns of the preview.
+    """
+    numeric = [c for c, info in get_profile(preview).items() if info["role"] in ("month", "value", "year")]
+    return [*pushable_fields(metadata), *numeric]
+
+
+def warm_resource(resource_id, force=False, incremental=False):
+    """
+    Make sure a resource is cached and loaded in this process; previewed
+    resources also get a stored whole-resource filter profile.
+    It is only downloaded again when it is missing from the cache, when the
+    upstream `updated` timestamp changed, or when force=True; incremental
+    resources then fetch just their new rows.
+    Returns one of "fresh", "fetched", "refreshed", "synced", "unreachable" or "failed".
+    """
+    metadata = fetch_metadata(resource_id)
+    if not metadata:
+        return "unreachable"
+    schema_registry.record(resource_id, metadata)
+
+    options = fetch_options(metadata)
+    if options.get("out_of_core"):
+        return _warm_chunked(resource_id, metadata, force)
+    entry = dataset_cache.entry(resource_id, dataset_params(**options))
+    upstream = metadata.get("updated")
+    changed = force or entry is None or (upstream is not None and str(upstream) != entry["updated"])
+
+    if changed and incremental and options.get("paginate"):
+        df, _ = sync_from_api(resource_id, full=force)
+        return "synced" if not df.empty else "failed"
+    if not changed:
+        dataset_cache.renew(resource_id, dataset_params(**options), upstream)
+    df, _ = fetch_from_api(resource_id, refresh=changed and entry is not None, **options)
+    if df.empty:
+        return "failed"
+    if "limit" in options:
+        # stored whole-resource profile, so the app's filter options need no full pass
+        fetch_field_profile(resource_id, profile_fields(metadata, df), max_rows=None)
+    if not changed:
+        return "fresh"
+    return "fetched" if entry is None else "refreshed"
+
+
+def _warm_chunked(resource_id, metadata, force):
+    meta = chunk_store_meta(resource_id)
+    changed = force or meta is None or (
+        meta.get("updated") != metadata.get("updated") or meta.get("total") != int(metadata.get("total") or 0)
+    )
+    if fetch_chunked(resource_id, refresh=force) is None:
+        return "failed"
+    if not changed:
+        return "fresh"
+    return "fetched" if meta is None else "refreshed"
+
+
+def warm_catalog(datasets=None, max_workers=WARM_WORKERS, force=False):
+    """
+    Warm every catalog resource in parallel.
+    Returns {dataset name: status}.
+    """
+    datasets = DATASETS if datasets is None else datasets
+
+    def warm(item):
+        name, resource_id = item
+        with span("warm.resource", resource_id=resource_id) as s:
+            try:
+                s["status"] = warm_resource(resource_id, force, incremental=name in APPEND_ONLY)
+            except Exception as e:
+                logger.warning("warming failed", extra={"fields": {"resource_id": resource_id, "error": str(e)}})
+                s["status"] = "failed"
+        return name, s["status"]
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        return dict(pool.map(warm, datasets.items()))
+
+
+class CatalogRefresher:
+    """
+    Daemon thread that warms the catalog right away and then every `interval`
+    seconds, re-downloading only the resources whose `updated` timestamp moved
+    and keeping the search index in step with them.
+    """
+
+    def __init__(self, interval=REFRESH_INTERVAL, datasets=None, max_workers=WARM_WORKERS):
+        self.interval = interval
+        self.datasets = datasets
+        self.max_workers = max_workers
+        self.last_run = None
+        self.last_statuses = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="catalog-refresher", daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.last_statuses = warm_catalog(self.datasets, self.max_workers)
+            # re-index only the resources whose cache files changed
+            search_index.sync()
+            self.last_run = time.time()
+            logger.info("catalog refreshed", extra={"fields": {"statuses": self.last_statuses}})
+            if self._stop.wait(self.interval):
+                break
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def start_refresher(interval=REFRESH_INTERVAL):
+    """
+    Start the process-wide background refresher once; later calls return it.
+    Returns None when the refresher is disabled (interval <= 0) or in offline mode.
+    """
+    global _refresher
+    if interval <= 0 or settings.offline:
+        return None
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = CatalogRefresher(interval).start()
+    return _refresher
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-fetch and cache every dataset in the catalog.")
+    parser.add_argument("names", nargs="*", help="catalog names to warm (default: all)")
+    parser.add_argument("--force", action="store_true", help="download again even if unchanged upstream")
+    parser.add_argument("--workers", type=int, default=WARM_WORKERS)
+    parser.add_argument("--watch", type=int, metavar="SECONDS",
+                        help="keep running and refresh changed resources every SECONDS")
+    parser.add_argument("--schemas-only", action="store_true",
+                        help="only record field lists, totals and a sample row in the schema registry")
+    args = parser.parse_args(argv)
+
+    unknown = [n for n in args.names if n not in DATASETS]
+    if unknown:
+        parser.error(f"not in the catalog: {', '.join(unknown)}")
+    datasets = {n: DATASETS[n] for n in args.names} if args.names else DATASETS
+
+    if args.schemas_only:
+        schemas = schema_registry.introspect(datasets.values(), refresh=args.force, max_workers=args.workers)
+        for name, resource_id in datasets.items():
+            schema = schemas[resource_id]
+            if schema is None:
+                print(f"{'unreachable':<12} {name}")
+            else:
+                print(f"{len(schema.get('field') or []):>4} fields {schema.get('total')!s:>10} rows  {name}")
+        return 0 if all(schemas.values()) else 1
+
+    while True:
+        start = time.perf_counter()
+        statuses = warm_catalog(datasets, args.workers, args.force)
+        for name, status in statuses.items():
+            print(f"{status:<12} {name}")
+        print(f"Warmed {len(statuses)} datasets in {time.perf_counter() - start:.1f}s")
+        if not args.watch:
+            return 0 if all(s not in ("unreachable", "failed") for s in statuses.values()) else 1
+        args.force = False
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
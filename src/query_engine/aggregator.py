@@ -0,0 +1,318 @@
+# src/query_engine/aggregator.py
+import itertools
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from src.data_handler.cache import CACHE_DIR
+from src.data_handler.profiler import get_fingerprint, get_profile
+from src.query_engine.filter_engine import normalize_text
+from src.query_engine.parallel import map_partitions, use_parallel
+from src.utils.logger import get_logger, span
+
+CUBE_DIR = Path(os.getenv("CUBE_CACHE_DIR", CACHE_DIR.parent / "cubes"))
+# Column-name fragments of the dimensions these datasets are usually queried by
+DIMENSION_HINTS = ("year", "state", "subdivision", "sub_division", "district", "season", "crop", "commodity")
+MAX_DIMENSIONS = 5
+# Groupings are built for every combination of up to this many dimensions
+MAX_CUBE_DIMS = 2
+# Groupings that do not shrink the data below this share of the rows are not worth storing
+MAX_CUBE_RATIO = 0.5
+MAX_CACHED_CUBES = 8
+MAX_PERSISTED_CUBES = 32
+
+logger = get_logger(__name__)
+
+PARTIALS = ("sum", "count", "min", "max")
+ROWS = "__rows"
+
+
+def _partial_name(measure, partial):
+    return f"{measure}__{partial}"
+
+
+def pick_dimensions(profile):
+    """
+    Choose cube dimensions: categorical/year columns whose name matches a common query dimension.
+    """
+    dims = []
+    for col, info in profile.items():
+        name = str(col).lower()
+        if info["role"] in ("category", "year") and any(h in name for h in DIMENSION_HINTS):
+            dims.append(col)
+    return dims[:MAX_DIMENSIONS]
+
+
+def pick_measures(profile, dimensions):
+    """
+    Choose cube measures: every value/month column that is not a dimension.
+    """
+    return [c for c, info in profile.items() if info["role"] in ("value", "month") and c not in dimensions]
+
+
+def all_groupings(dimensions):
+    """The grand total plus every combination of up to MAX_CUBE_DIMS dimensions."""
+    return [d for size in range(MAX_CUBE_DIMS + 1) for d in itertools.combinations(dimensions, size)]
+
+
+def _build_partition(frame, dimensions, measures, groupings):
+    return RollupCube.build(frame, dimensions, measures, groupings=groupings).tables
+
+
+class RollupCube:
+    """
+    Pre-aggregated rollups of one dataset.
+
+    For every combination of up to MAX_CUBE_DIMS dimensions (plus the grand
+    total) it stores the sum, count, min and max of each measure and the row
+    count. Queries pick the smallest stored grouping that covers their
+    group-by and filter columns and roll it up further; mean is sum / count.
+    """
+
+    def __init__(self, dimensions, measures, tables):
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+        self.tables = tables  # {tuple(dims): DataFrame}
+
+    @classmethod
+    def build(cls, df, dimensions, measures, groupings=None):
+        """
+        Aggregate df into a cube. `groupings` restricts the build to those
+        dimension tuples (kept whatever their size), e.g. to match another cube.
+        """
+        values = df[measures].apply(pd.to_numeric, errors="coerce") if measures else pd.DataFrame(index=df.index)
+        spec = {_partial_name(m, p): pd.NamedAgg(column=m, aggfunc=p) for m in measures for p in PARTIALS}
+
+        tables = {}
+        candidates = all_groupings(dimensions) if groupings is None else [tuple(d) for d in groupings]
+        for dims in candidates:
+            size = len(dims)
+            if not dims:
+                row = {name: [getattr(values[a.column], a.aggfunc)()] for name, a in spec.items()}
+                row[ROWS] = [len(df)]
+                tables[dims] = pd.DataFrame(row)
+                continue
+            keys = [df[d] for d in dims]
+            grouped = values.groupby(keys, observed=True, dropna=False, sort=False)
+            table = grouped.agg(**spec) if spec else pd.DataFrame(index=grouped.size().index)
+            table[ROWS] = grouped.size()
+            if groupings is None and len(table) > MAX_CUBE_RATIO * len(df) and size > 1:
+                continue
+            tables[dims] = table.reset_index()
+        return cls(dimensions, measures, tables)
+
+    @classmethod
+    def build_parallel(cls, df, dimensions, measures):
+        """
+        build() on the worker pool: every partition is aggregated into all
+        groupings, the partials are merged in partition order and groupings
+        that do not shrink the data are dropped afterwards, as build() would.
+        """
+        groupings = all_groupings(dimensions)
+        columns = list(dict.fromkeys([*dimensions, *measures]))
+        partials = [cls(dimensions, measures, tables)
+                    for tables in map_partitions(df[columns], _build_partition, dimensions, measures, groupings)]
+        cube = partials[0].merge(*partials[1:])
+        cube.tables = {dims: table for dims, table in cube.tables.items()
+                       if len(dims) <= 1 or len(table) <= MAX_CUBE_RATIO * len(df)}
+        return cube
+
+    def merge(self, *others):
+        """
+        Combine with the cubes of other rows (same dimensions and measures),
+        e.g. appended rows or other partitions, folded in the given order.
+        sum/count/rows add up and min/max fold, so no raw rows are re-read.
+        """
+        how = {ROWS: "sum"}
+        for m in self.measures:
+            how.update({_partial_name(m, p): ("sum" if p in ("sum", "count") else p) for p in PARTIALS})
+        tables = {}
+        for dims, table in self.tables.items():
+            both = pd.concat([table, *(other.tables[dims] for other in others)], ignore_index=True)
+            if not dims:
+                tables[dims] = pd.DataFrame({col: [both[col].agg(f)] for col, f in how.items()})
+                continue
+            # categories of the two sides may differ, so group on plain values
+            keys = [both[d].astype(object) for d in dims]
+            merged = both.drop(columns=list(dims)).groupby(keys, dropna=False, sort=False).agg(how).reset_index()
+            for d in dims:
+                if isinstance(table[d].dtype, pd.CategoricalDtype):
+                    merged[d] = merged[d].astype("category")
+                elif pd.api.types.is_numeric_dtype(table[d]):
+                    merged[d] = pd.to_numeric(merged[d])
+            tables[dims] = merged
+        return RollupCube(self.dimensions, self.measures, tables)
+
+    def covers(self, measure, columns):
+        return measure in self.measures and self._table_for(columns) is not None
+
+    def _table_for(self, columns):
+        columns = set(columns)
+        best = None
+        for dims, table in self.tables.items():
+            if columns.issubset(dims) and (best is None or len(table) < len(best)):
+                best = table
+        return best
+
+    def query(self, measure, agg, group_by=(), categorical=None, ranges=None):
+        """
+        Answer an aggregate from the cube.
+        Returns a Series indexed by group_by (a scalar without group-by),
+        or None when the cube cannot answer it.
+        """
+        categorical = categorical or {}
+        ranges = ranges or {}
+        if agg not in ("sum", "mean", "count", "min", "max"):
+            return None
+        if measure is not None and measure not in self.measures:
+            return None
+        table = self._table_for(set(group_by) | set(categorical) | set(ranges))
+        if table is None:
+            return None
+
+        mask = np.ones(len(table), dtype=bool)
+        for col, selected in categorical.items():
+            wanted = {normalize_text(v) for v in selected} - {None}
+            mask &= table[col].map(normalize_text).isin(wanted).to_numpy()
+        for col, (low, high) in ranges.items():
+            mask &= pd.to_numeric(table[col], errors="coerce").between(low, high).to_numpy()
+        table = table[mask]
+
+        if measure is None:
+            parts = table[[ROWS]].rename(columns={ROWS: "count"})
+            agg = "count"
+        else:
+            parts = table[[_partial_name(measure, p) for p in PARTIALS]]
+            parts.columns = list(PARTIALS)
+        how = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+        how = {k: v for k, v in how.items() if k in parts.columns}
+
+        if group_by:
+            keys = [table[c] for c in group_by]
+            rolled = parts.groupby(keys, observed=True, sort=True).agg(how)
+        else:
+            rolled = parts.agg(how)
+
+        if agg == "mean":
+            if not group_by:
+                return rolled["sum"] / rolled["count"] if rolled["count"] else np.nan
+            return rolled["sum"] / rolled["count"].replace(0, np.nan)
+        return rolled[agg]
+
+    def rows(self, group_by=(), categorical=None, ranges=None):
+        """
+        Row counts per group (or in total) straight from the cube.
+        """
+        return self.query(None, "count", group_by, categorical, ranges)
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def save(self, path):
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        files = []
+        for i, (dims, table) in enumerate(self.tables.items()):
+            feather.write_feather(table, str(tmp / f"{i}.feather"))
+            files.append({"dims": list(dims), "file": f"{i}.feather"})
+        with open(tmp / "cube.json", "w", encoding="utf-8") as fh:
+            json.dump({"dimensions": self.dimensions, "measures": self.measures, "tables": files}, fh)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        with open(path / "cube.json", "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        tables = {tuple(t["dims"]): feather.read_feather(str(path / t["file"])) for t in meta["tables"]}
+        return cls(meta["dimensions"], meta["measures"], tables)
+
+
+_cubes = OrderedDict()
+_cubes_lock = threading.Lock()
+
+
+def _prune_persisted():
+    if not CUBE_DIR.exists():
+        return
+    dirs = sorted((p for p in CUBE_DIR.iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime)
+    for stale in dirs[:-MAX_PERSISTED_CUBES]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def get_cube(df):
+    """
+    Return the rollup cube of a dataset.
+    Cubes are keyed by the dataset fingerprint, so a refreshed dataset gets
+    a fresh cube; they are kept in memory and persisted under CUBE_DIR.
+    """
+    fingerprint = get_fingerprint(df)
+    with _cubes_lock:
+        cube = _cubes.get(fingerprint)
+        if cube is not None:
+            _cubes.move_to_end(fingerprint)
+            return cube
+
+    path = CUBE_DIR / fingerprint
+    cube = None
+    if (path / "cube.json").exists():
+        try:
+            cube = RollupCube.load(path)
+        except Exception as e:
+            logger.warning("could not load rollup cube", extra={"fields": {"cube": fingerprint, "error": str(e)}})
+    if cube is None:
+        profile = get_profile(df)
+        dimensions = pick_dimensions(profile)
+        measures = pick_measures(profile, dimensions)
+        with span("aggregate.build_cube", rows=len(df), dimensions=len(dimensions)):
+            if use_parallel(len(df)):
+                cube = RollupCube.build_parallel(df, dimensions, measures)
+            else:
+                cube = RollupCube.build(df, dimensions, measures)
+        _persist(fingerprint, cube)
+    return _remember(fingerprint, cube)
+
+
+def extend_cube(base, df):
+    """
+    Cube of `df`, which must be `base` followed by appended rows: the base
+    cube (when one is loaded) is merged with a cube of the new rows only.
+    Returns the cube, or None when the base has no cube yet.
+    """
+    with _cubes_lock:
+        cube = _cubes.get(get_fingerprint(base))
+    if cube is None:
+        return None
+    delta = df.iloc[len(base):]
+    with span("aggregate.extend_cube", rows=len(delta)):
+        cube = cube.merge(RollupCube.build(delta, cube.dimensions, cube.measures, groupings=list(cube.tables)))
+    fingerprint = get_fingerprint(df)
+    _persist(fingerprint, cube)
+    return _remember(fingerprint, cube)
+
+
+def _persist(fingerprint, cube):
+    try:
+        cube.save(CUBE_DIR / fingerprint)
+        _prune_persisted()
+    except Exception as e:
+        logger.warning("could not persist rollup cube", extra={"fields": {"cube": fingerprint, "error": str(e)}})
+
+
+def _remember(fingerprint, cube):
+    with _cubes_lock:
+        _cubes[fingerprint] = cube
+        _cubes.move_to_end(fingerprint)
+        while len(_cubes) > MAX_CACHED_CUBES:
+            _cubes.popitem(last=False)
+    return cube
@@ -0,0 +1,230 @@
+# src/query_engine/chunked.py
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.data_handler.preprocessor import compact_dataframe
+from src.data_handler.profiler import profile_chunks
+from src.query_engine.aggregator import RollupCube
+from src.query_engine.executor import canonical_sums, compare_sums, order_result, sum_by
+from src.query_engine.filter_engine import normalize_text
+from src.query_engine.parser import get_plan
+from src.utils.logger import span
+
+# Rows handed to pandas at a time; peak memory scales with this, not with the dataset
+CHUNK_ROWS = int(os.getenv("CHUNK_ROWS", "100000"))
+# Resources with more rows than this are processed out of core
+OUT_OF_CORE_ROWS = int(os.getenv("OUT_OF_CORE_ROWS", "2000000"))
+# Filtered rows materialized for display and export
+MAX_RESULT_ROWS = int(os.getenv("OUT_OF_CORE_MAX_RESULT_ROWS", "200000"))
+MAX_OPEN_DATASETS = 4
+# Aggregate results kept per open dataset
+MAX_CACHED_AGGREGATES = 32
+
+
+class ChunkedDataset:
+    """
+    A dataset stored as Parquet files and processed batch by batch.
+
+    Filters become Arrow expressions, so row groups whose statistics rule out
+    a numeric range are skipped, and only the columns an operation needs are
+    read. Profiles and aggregates are built from per-chunk partials, so peak
+    memory is bounded by CHUNK_ROWS (plus the number of groups), not by the
+    size of the dataset.
+    """
+
+    def __init__(self, path):
+        import pyarrow.dataset as ds  # only out-of-core sessions load the dataset scanner
+
+        self.path = Path(path)
+        self.dataset = ds.dataset(sorted(str(f) for f in self.path.glob("*.parquet")), format="parquet")
+        self.version = self.fingerprint()
+        self._profile = None
+        self._aggregates = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def columns(self):
+        return list(self.dataset.schema.names)
+
+    @property
+    def num_rows(self):
+        return self.dataset.count_rows()
+
+    def fingerprint(self):
+        """Hash of the store's files as they are on disk now."""
+        h = hashlib.sha1()
+        for f in sorted(self.path.glob("*.parquet")):
+            stat = f.stat()
+            h.update(f"{f.name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+        return h.hexdigest()
+
+    # -------------------------
+    # Scanning
+    # -------------------------
+    def expression(self, categorical=None, numeric=None):
+        """
+        Arrow filter for {column: [values]} and {column: (low, high)} predicates.
+        Text matches ignore case and surrounding whitespace, like FilterEngine.
+        """
+        expr = None
+        schema = self.dataset.schema
+        for col, values in (categorical or {}).items():
+            if not values:
+                continue
+            if pa.types.is_floating(schema.field(col).type) or pa.types.is_integer(schema.field(col).type):
+                term = pc.field(col).isin([float(v) for v in values])
+            else:
+                wanted = sorted({n for n in (normalize_text(v) for v in values) if n is not None})
+                term = pc.utf8_lower(pc.utf8_trim_whitespace(pc.field(col))).isin(wanted)
+            expr = term if expr is None else expr & term
+        for col, (low, high) in (numeric or {}).items():
+            term = (pc.field(col) >= low) & (pc.field(col) <= high)
+            expr = term if expr is None else expr & term
+        return expr
+
+    def iter_chunks(self, columns=None, categorical=None, numeric=None, batch_size=CHUNK_ROWS):
+        """
+        Yield the (filtered) dataset as DataFrames of at most batch_size rows.
+        """
+        scanner = self.dataset.scanner(columns=columns, filter=self.expression(categorical, numeric),
+                                       batch_size=batch_size)
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def head(self, n):
+        return compact_dataframe(self.dataset.head(n).to_pandas())
+
+    def count(self, categorical=None, numeric=None):
+        return self.dataset.count_rows(filter=self.expression(categorical, numeric))
+
+    # -------------------------
+    # Operations
+    # -------------------------
+    def filter(self, categorical=None, numeric=None, columns=None, limit=MAX_RESULT_ROWS):
+        """
+        Rows matching the predicates, at most `limit` of them.
+        Returns (DataFrame, number of matching rows in the whole dataset).
+        """
+        with span("chunked.filter", rows=self.num_rows):
+            parts, kept = [], 0
+            for chunk in self.iter_chunks(columns, categorical, numeric):
+                parts.append(chunk.iloc[:limit - kept])
+                kept += len(parts[-1])
+                if kept >= limit:
+                    break
+            matched = kept if kept < limit else self.count(categorical, numeric)
+        if not parts:
+            return pd.DataFrame(columns=columns or self.columns), 0
+        return compact_dataframe(pd.concat(parts, ignore_index=True)), matched
+
+    def profile(self):
+        """
+        Column profile (see profiler.profile_dataframe) computed chunk by chunk, once per dataset.
+        """
+        with self._lock:
+            if self._profile is None:
+                with span("chunked.profile", rows=self.num_rows):
+                    self._profile = profile_chunks(self.iter_chunks())
+            return self._profile
+
+    def aggregate(self, measure, agg="sum", group_by=(), categorical=None, numeric=None):
+        """
+        sum/mean/count/min/max of `measure` per group_by, merged from per-chunk
+        partials; only the group-by and measure columns are read.
+        Returns a Series indexed by group_by (a scalar without group-by), or None.
+        """
+        group_by = tuple(group_by)
+        key = json.dumps([measure, agg, group_by, categorical, numeric], sort_keys=True, default=str)
+        with self._lock:
+            if key in self._aggregates:
+                self._aggregates.move_to_end(key)
+                return self._aggregates[key]
+        measures = [measure] if measure is not None else []
+        columns = list(dict.fromkeys([*group_by, *measures]))
+        cube = None
+        with span("chunked.aggregate", rows=self.num_rows, agg=agg):
+            for chunk in self.iter_chunks(columns, categorical, numeric):
+                partial = RollupCube.build(chunk, list(group_by), measures, groupings=[group_by])
+                cube = partial if cube is None else cube.merge(partial)
+        result = None if cube is None else cube.query(measure, agg, group_by)
+        with self._lock:
+            # reruns (and both sides of a comparison) ask for the same aggregates again
+            self._aggregates[key] = result
+            while len(self._aggregates) > MAX_CACHED_AGGREGATES:
+                self._aggregates.popitem(last=False)
+        return result
+
+
+def answer_chunked(dataset, question):
+    """
+    answer_question for an out-of-core dataset: the plan's filters are pushed
+    into the scan and its aggregate is merged from per-chunk partials.
+    Returns (plan, result DataFrame).
+    """
+    plan = get_plan(question, dataset.profile(), dataset.version)
+    label = f"{plan.aggregate}_{plan.metric}" if plan.metric else "count"
+    measure = None if plan.aggregate == "count" else plan.metric
+    categorical = {f.column: list(f.value) for f in plan.filters if f.op == "in"}
+    numeric = {f.column: f.value for f in plan.filters if f.op == "between"}
+    rolled = dataset.aggregate(measure, plan.aggregate, plan.group_by, categorical, numeric)
+    if rolled is None:
+        if dataset.count(categorical, numeric) == 0:
+            return plan, pd.DataFrame(columns=[*plan.group_by, label])
+        raise ValueError(f"Cannot compute {plan.aggregate} of '{plan.metric}' out of core")
+    if plan.group_by:
+        result = rolled.rename(label).reset_index()
+    else:
+        result = pd.DataFrame({label: [rolled], "rows": [dataset.count(categorical, numeric)]})
+    return plan, order_result(result, plan, label)
+
+
+def compare_chunked(left, right, category_col, metric_col):
+    """
+    compare_states when either side is out of core: per-category sums of a
+    ChunkedDataset are accumulated chunk by chunk, in-memory DataFrames are
+    summed as usual, then both are compared like in-memory frames.
+    """
+    sums = []
+    for data in (left, right):
+        if category_col not in data.columns or metric_col not in data.columns:
+            raise ValueError(f"Columns '{category_col}'/'{metric_col}' not found in both datasets")
+        if isinstance(data, pd.DataFrame):
+            sums.append(sum_by(data, category_col, metric_col))
+            continue
+        rolled = data.aggregate(metric_col, "sum", (category_col,))
+        if rolled is None:
+            return pd.DataFrame()
+        sums.append(canonical_sums(rolled.rename(metric_col).reset_index(), category_col, metric_col))
+    return compare_sums(sums[0], sums[1], category_col, metric_col)
+
+
+_datasets = OrderedDict()
+_datasets_lock = threading.Lock()
+
+
+def get_chunked_dataset(path):
+    """
+    Return the ChunkedDataset for a store directory, kept open (with its profile) across reruns.
+    """
+    key = str(path)
+    with _datasets_lock:
+        dataset = _datasets.get(key)
+    if dataset is not None and dataset.fingerprint() == dataset.version:
+        with _datasets_lock:
+            _datasets.move_to_end(key)
+        return dataset
+    dataset = ChunkedDataset(path)
+    with _datasets_lock:
+        _datasets[key] = dataset
+        while len(_datasets) > MAX_OPEN_DATASETS:
+            _datasets.popitem(last=False)
+    return dataset
@@ -1,6 +1,18 @@
 # src/query_engine/executor.py
 import pandas as pd
 
+from src.data_handler.entities import canonical_names, detect_entity_kind
+from src.data_handler.profiler import get_fingerprint, get_profile
+from src.query_engine.aggregator import get_cube
+from src.query_engine.filter_engine import get_filter_engine
+from src.query_engine.parallel import factorize, group_reduce, to_numeric, use_parallel
+from src.query_engine.parser import get_plan
+from src.utils.logger import get_logger, timed
+
+logger = get_logger(__name__)
+
+
+@timed("compare")
 def compare_states(df1, df2, category_col=None, metric_col=None):
     """
     Compare two datasets on the specified category and metric columns.
@@ -12,7 +24,7 @@ def compare_states(df1, df2, category_col=None, metric_col=None):
         metric_col: numeric column to compare (rainfall, production, etc.)
     """
     if df1 is None or df1.empty or df2 is None or df2.empty:
-        print("[WARN] One of the DataFrames is empty.")
+        logger.warning("One of the DataFrames is empty.")
         return pd.DataFrame()
 
     # If columns not specified, try to guess
@@ -28,10 +40,16 @@ def compare_states(df1, df2, category_col=None, metric_col=None):
     if metric_col not in df1.columns or metric_col not in df2.columns:
         raise ValueError(f"Metric column '{metric_col}' not found in both datasets")
 
-    # Group by category and sum metric
-    agg1 = df1.groupby(category_col)[metric_col].sum().reset_index()
-    agg2 = df2.groupby(category_col)[metric_col].sum().reset_index()
+    # Group by category and sum metric (served from the rollup cubes when they cover it)
+    agg1 = sum_by(df1, category_col, metric_col)
+    agg2 = sum_by(df2, category_col, metric_col)
+    return compare_sums(agg1, agg2, category_col, metric_col)
 
+
+def compare_sums(agg1, agg2, category_col, metric_col):
+    """
+    Outer-join two per-category sums and add the difference and percentage change.
+    """
     # Merge for comparison
     merged = pd.merge(agg1, agg2, on=category_col, how='outer', suffixes=('_1', '_2'))
     merged.fillna(0, inplace=True)
@@ -41,3 +59,111 @@ def compare_states(df1, df2, category_col=None, metric_col=None):
     merged['pct_change'] = merged['difference'] / merged[f'{metric_col}_1'].replace(0, 1) * 100
 
     return merged
+
+
+def sum_by(df, category_col, metric_col):
+    """
+    Per-category sums of metric_col with canonical category names, served from
+    the rollup cube when it covers them.
+    """
+    rolled = get_cube(df).query(metric_col, "sum", (category_col,))
+    if rolled is None and use_parallel(len(df)):
+        # per-partition sums on the worker pool, merged in partition order
+        codes, labels = factorize(df[category_col])
+        values = df[metric_col] if pd.api.types.is_numeric_dtype(df[metric_col]) else to_numeric(df[metric_col])
+        present = codes >= 0
+        sums = group_reduce(values[present].to_frame(metric_col), codes[present], "sum")
+        summed = pd.DataFrame({category_col: labels[sums.index], metric_col: sums[metric_col].to_numpy()})
+        summed = summed.sort_values(category_col, kind="stable", ignore_index=True)
+    elif rolled is None:
+        summed = df.groupby(category_col)[metric_col].sum().reset_index()
+    else:
+        summed = rolled.rename(metric_col).reset_index()
+    return canonical_sums(summed, category_col, metric_col)
+
+
+def canonical_sums(summed, category_col, metric_col):
+    """
+    Re-sum per-category totals on canonical entity names when the category is an entity column.
+    """
+    # States, crops, ... are matched on canonical names so aliases from different datasets line up
+    kind = detect_entity_kind(category_col)
+    if kind is not None and not pd.api.types.is_numeric_dtype(summed[category_col]):
+        labels = pd.Series(canonical_names(summed[category_col].astype(object), kind), index=summed.index)
+        summed = summed[metric_col].groupby(labels.rename(category_col), sort=True).sum().reset_index()
+    return summed
+
+
+def _execute_from_cube(df, plan, label):
+    """
+    Answer a plan from the dataset's rollup cube, or return None when the cube
+    does not cover its metric, filters and group-by.
+    """
+    # "count" counts rows, like the row-level path below
+    measure = None if plan.aggregate == "count" else plan.metric
+    if measure is None and plan.aggregate != "count":
+        return None
+    cube = get_cube(df)
+    categorical = {f.column: list(f.value) for f in plan.filters if f.op == "in"}
+    ranges = {f.column: f.value for f in plan.filters if f.op == "between"}
+    rolled = cube.query(measure, plan.aggregate, plan.group_by, categorical, ranges)
+    if rolled is None:
+        return None
+    if plan.group_by:
+        return rolled.rename(label).reset_index()
+    return pd.DataFrame({label: [rolled], "rows": [cube.rows((), categorical, ranges)]})
+
+
+@timed("query.execute")
+def execute_plan(df, plan):
+    """
+    Run a parser.QueryPlan against a DataFrame with vectorized pandas operations.
+    Plans covered by the dataset's rollup cube are answered from it;
+    otherwise filters go through the cached FilterEngine masks.
+    Returns a DataFrame (a single row when there is no group-by).
+    """
+    label = f"{plan.aggregate}_{plan.metric}" if plan.metric else "count"
+    result = _execute_from_cube(df, plan, label)
+    if result is not None:
+        return order_result(result, plan, label)
+
+    categorical = {f.column: list(f.value) for f in plan.filters if f.op == "in"}
+    numeric = {f.column: f.value for f in plan.filters if f.op == "between"}
+    subset, errors = get_filter_engine(df).apply(categorical, numeric)
+    if errors:
+        raise ValueError("; ".join(errors))
+
+    if plan.aggregate == "count":
+        values = subset[plan.group_by[0]] if plan.group_by else subset.index.to_series()
+    else:
+        values = subset[plan.metric]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors="coerce")
+
+    if plan.group_by:
+        keys = [subset[c] for c in plan.group_by]
+        result = values.groupby(keys, observed=True, sort=True).agg(plan.aggregate)
+        result = result.rename(label).reset_index()
+    else:
+        result = pd.DataFrame({label: [values.agg(plan.aggregate)], "rows": [len(subset)]})
+    return order_result(result, plan, label)
+
+
+def order_result(result, plan, label):
+    """
+    Apply a plan's sort order and row limit to an aggregate result.
+    """
+    if plan.sort_descending is not None and plan.group_by:
+        result = result.sort_values(label, ascending=not plan.sort_descending, kind="stable")
+    if plan.limit:
+        result = result.head(plan.limit)
+    return result.reset_index(drop=True)
+
+
+def answer_question(df, question):
+    """
+    Parse a natural-language question against df's profile and execute it.
+    Returns (plan, result DataFrame). Plans are cached per dataset and question.
+    """
+    plan = get_plan(question, get_profile(df), get_fingerprint(df))
+    return plan, execute_plan(df, plan)
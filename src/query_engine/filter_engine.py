@@ -0,0 +1,251 @@
+# src/query_engine/filter_engine.py
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from src.data_handler.profiler import get_fingerprint
+from src.query_engine.parallel import factorize, to_numeric
+from src.utils.logger import count, span
+
+MAX_CACHED_MASKS = 64
+MAX_CACHED_RESULTS = 4
+MAX_CACHED_ENGINES = 8
+
+
+def normalize_text(value):
+    """Normalize values for resilient, case-insensitive categorical matching."""
+    if pd.isna(value):
+        return None
+    text = str(value).strip()
+    return text.casefold() if text else None
+
+
+class FilterEngine:
+    """
+    Per-dataset filter index.
+
+    Categorical columns are stored as int codes over their normalized
+    vocabulary, so a selection becomes a lookup-table gather over the codes.
+    Numeric columns keep a sorted copy of their values with the matching row
+    order, so a range is two binary searches. Each predicate's boolean mask
+    is cached; filtering ANDs the masks and materializes the frame once.
+    Indexes are built lazily, the first time a column is filtered.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._categorical = {}
+        self._numeric = {}
+        self._masks = OrderedDict()
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # Index construction
+    # -------------------------
+    def _categorical_index(self, column):
+        index = self._categorical.get(column)
+        if index is None:
+            series = self.df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                raw_codes, raw_uniques = series.cat.codes.to_numpy(), series.cat.categories
+            else:
+                raw_codes, raw_uniques = factorize(series)
+            # normalize the vocabulary once, then fold equal normalized values onto one code
+            normalized = [normalize_text(v) for v in raw_uniques]
+            vocab_codes, vocab = pd.factorize(pd.Series(normalized, dtype="object"), use_na_sentinel=True)
+            remap = np.append(vocab_codes, -1).astype(np.int32)
+            codes = remap[raw_codes]
+            lookup = {v: i for i, v in enumerate(vocab)}
+            index = self._categorical[column] = (codes, lookup)
+        return index
+
+    def _numeric_index(self, column):
+        index = self._numeric.get(column)
+        if index is None:
+            series = self.df[column]
+            if not is_numeric_dtype(series):
+                series = to_numeric(series)
+            values = series.to_numpy(dtype="float64", na_value=np.nan)
+            present = np.flatnonzero(~np.isnan(values))
+            order = present[np.argsort(values[present], kind="stable")]
+            index = self._numeric[column] = (values[order], order)
+        return index
+
+    def extended(self, df):
+        """
+        Engine for `df`, which must be this engine's frame followed by appended rows.
+        Indexes already built are carried over and extended with the new rows
+        only; cached masks and results are not (they describe fewer rows).
+        """
+        engine = FilterEngine(df)
+        n_old = len(self.df)
+        delta = df.iloc[n_old:]
+        for column, (codes, lookup) in list(self._categorical.items()):
+            lookup = dict(lookup)
+            new_codes = np.full(len(delta), -1, dtype=np.int32)
+            raw_codes, raw_uniques = pd.factorize(delta[column], use_na_sentinel=True)
+            remap = []
+            for value in raw_uniques:
+                key = normalize_text(value)
+                if key is None:
+                    remap.append(-1)
+                else:
+                    remap.append(lookup.setdefault(key, len(lookup)))
+            if len(raw_uniques):
+                present = raw_codes >= 0
+                new_codes[present] = np.asarray(remap, dtype=np.int32)[raw_codes[present]]
+            engine._categorical[column] = (np.concatenate([codes, new_codes]), lookup)
+        for column, (values, order) in list(self._numeric.items()):
+            series = delta[column]
+            if not is_numeric_dtype(series):
+                series = to_numeric(series)
+            new_values = series.to_numpy(dtype="float64", na_value=np.nan)
+            present = np.flatnonzero(~np.isnan(new_values))
+            new_order = present[np.argsort(new_values[present], kind="stable")]
+            merged_values = np.concatenate([values, new_values[new_order]])
+            merged_order = np.concatenate([order, new_order + n_old])
+            # both halves are sorted runs, which the stable sort merges in linear time
+            resort = np.argsort(merged_values, kind="stable")
+            engine._numeric[column] = (merged_values[resort], merged_order[resort])
+        return engine
+
+    # -------------------------
+    # Predicate masks
+    # -------------------------
+    def _cached_mask(self, key, build):
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                return mask
+        count("filter.mask_built")
+        mask = build()
+        with self._lock:
+            self._masks[key] = mask
+            while len(self._masks) > MAX_CACHED_MASKS:
+                self._masks.popitem(last=False)
+        return mask
+
+    def categorical_mask(self, column, selected_values):
+        normalized = frozenset(n for n in (normalize_text(v) for v in selected_values) if n is not None)
+        if not normalized:
+            raise ValueError("no valid filter values were selected")
+
+        def build():
+            codes, lookup = self._categorical_index(column)
+            table = np.zeros(len(lookup) + 1, dtype=bool)  # last slot catches the -1 missing code
+            for value in normalized:
+                if value in lookup:
+                    table[lookup[value]] = True
+            return table[codes]
+
+        return self._cached_mask(("cat", column, normalized), build)
+
+    def numeric_mask(self, column, selected_range):
+        low, high = selected_range
+        if low > high:
+            raise ValueError(f"invalid range ({low} > {high})")
+
+        def build():
+            sorted_values, order = self._numeric_index(column)
+            if sorted_values.size == 0:
+                raise ValueError("values are not numeric")
+            start = np.searchsorted(sorted_values, low, side="left")
+            stop = np.searchsorted(sorted_values, high, side="right")
+            mask = np.zeros(len(self.df), dtype=bool)
+            mask[order[start:stop]] = True
+            return mask
+
+        return self._cached_mask(("num", column, float(low), float(high)), build)
+
+    # -------------------------
+    # Filtering
+    # -------------------------
+    def apply(self, categorical=None, numeric=None):
+        """
+        Filter the dataset with {column: [values]} and {column: (low, high)} predicates.
+        Returns the filtered DataFrame and a list of messages for skipped predicates.
+        The same predicate set returns the same frame object, so per-frame caches
+        downstream (fingerprints, exports, result pages) keep hitting across reruns.
+        """
+        state = (
+            tuple(sorted((c, tuple(sorted(map(str, v)))) for c, v in (categorical or {}).items() if v)),
+            tuple(sorted((c, tuple(r)) for c, r in (numeric or {}).items())),
+        )
+        with self._lock:
+            cached = self._results.get(state)
+            if cached is not None:
+                self._results.move_to_end(state)
+                return cached[0], list(cached[1])
+
+        with span("filter.apply", rows=len(self.df), predicates=len(state[0]) + len(state[1])):
+            result, errors = self._apply(categorical, numeric)
+        with self._lock:
+            self._results[state] = (result, errors)
+            while len(self._results) > MAX_CACHED_RESULTS:
+                self._results.popitem(last=False)
+        return result, list(errors)
+
+    def _apply(self, categorical, numeric):
+        errors = []
+        combined = None
+
+        predicates = [("categorical", c, v, self.categorical_mask) for c, v in (categorical or {}).items() if v]
+        predicates += [("numeric", c, r, self.numeric_mask) for c, r in (numeric or {}).items()]
+        for kind, column, value, build in predicates:
+            if column not in self.df.columns:
+                errors.append(f"Skipped `{column}` because the column is missing from the dataset.")
+                continue
+            try:
+                mask = build(column, value)
+            except ValueError as err:
+                errors.append(f"Skipped {kind} filter for `{column}`: {err}.")
+                continue
+            except Exception as err:
+                errors.append(f"Could not apply {kind} filter on `{column}`: {err}")
+                continue
+            combined = mask if combined is None else combined & mask
+
+        return (self.df if combined is None else self.df[combined]), errors
+
+
+_engines = OrderedDict()
+_engines_lock = threading.Lock()
+
+
+def extend_filter_engine(base, df):
+    """
+    Register the engine of `df` (base plus appended rows), reusing the base
+    engine's indexes when it has one. Returns the engine.
+    """
+    with _engines_lock:
+        previous = _engines.get(get_fingerprint(base))
+    if previous is None:
+        return get_filter_engine(df)
+    engine = previous.extended(df)
+    fingerprint = get_fingerprint(df)
+    with _engines_lock:
+        _engines[fingerprint] = engine
+        _engines.move_to_end(fingerprint)
+        while len(_engines) > MAX_CACHED_ENGINES:
+            _engines.popitem(last=False)
+    return engine
+
+
+def get_filter_engine(df):
+    """
+    Return the FilterEngine for a dataset, building it once per dataset.
+    """
+    fingerprint = get_fingerprint(df)
+    with _engines_lock:
+        engine = _engines.get(fingerprint)
+        if engine is None:
+            engine = _engines[fingerprint] = FilterEngine(df)
+        _engines.move_to_end(fingerprint)
+        while len(_engines) > MAX_CACHED_ENGINES:
+            _engines.popitem(last=False)
+    return engine
@@ -0,0 +1,280 @@
+# src/query_engine/joiner.py
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_float_dtype, is_numeric_dtype
+
+from src.data_handler.entities import common_level, detect_entity_kind, entity_ids_for, get_entity_dictionary
+from src.data_handler.preprocessor import is_year_col_name
+from src.data_handler.profiler import get_fingerprint
+from src.query_engine.filter_engine import normalize_text
+from src.query_engine.parallel import factorize, group_reduce
+from src.utils.logger import timed
+
+# Joins estimated above this many output rows are pre-aggregated per key instead
+MAX_JOIN_ROWS = int(os.getenv("MAX_JOIN_ROWS", "1000000"))
+PAGE_SIZE = 100
+MAX_CACHED_JOINS = 4
+
+
+def _normalize_name(col):
+    return str(col).strip().lower()
+
+
+def _key_label(value):
+    """Normalize a key value; integral numbers compare equal whether stored as int, float or text."""
+    if isinstance(value, (float, np.floating)) and not pd.isna(value) and float(value).is_integer():
+        value = int(value)
+    return normalize_text(value)
+
+
+def encode_keys(left, right):
+    """
+    Dictionary-encode two key columns over one shared, normalized vocabulary.
+    Only distinct values are normalized. Returns (left_codes, right_codes,
+    vocabulary) where missing or unmatched-normalization values get -1.
+    """
+    codes = []
+    labels = []
+    for series in (left, right):
+        raw_codes, uniques = factorize(series)
+        normalized = pd.Index([_key_label(v) for v in uniques], dtype="object")
+        codes.append(raw_codes)
+        labels.append(normalized)
+
+    vocabulary = labels[0].append(labels[1]).dropna().unique()
+    encoded = []
+    for raw_codes, normalized in zip(codes, labels):
+        remap = np.append(vocabulary.get_indexer(normalized), -1)
+        encoded.append(remap[raw_codes])
+    return encoded[0], encoded[1], vocabulary
+
+
+def encode_join_keys(df1, col1, df2, col2):
+    """
+    Encode a pair of key columns into shared dense codes.
+    Entity columns (states, subdivisions, districts, crops) are matched on
+    their canonical entity ids, so aliases line up and a subdivision column
+    can be compared with a state column at state level; other columns fall
+    back to normalized text. Returns (left_codes, right_codes, labels).
+    """
+    level = common_level(detect_entity_kind(col1), detect_entity_kind(col2))
+    if level is not None:
+        _, left_ids = entity_ids_for(df1, col1, as_kind=level)
+        _, right_ids = entity_ids_for(df2, col2, as_kind=level)
+        if left_ids is not None and right_ids is not None:
+            combined = np.concatenate([left_ids, right_ids])
+            present = combined >= 0
+            codes = np.full(len(combined), -1, dtype=np.int64)
+            codes[present], entity_ids = pd.factorize(combined[present], sort=True)
+            dictionary = get_entity_dictionary()
+            labels = pd.Index([dictionary.name(int(i)) for i in entity_ids], dtype="object")
+            return codes[:len(left_ids)], codes[len(left_ids):], labels
+    return encode_keys(df1[col1], df2[col2])
+
+
+def estimate_join_rows(left_codes, right_codes):
+    """
+    Exact inner-join output size from per-key counts, without joining.
+    """
+    size = int(max(left_codes.max(initial=-1), right_codes.max(initial=-1))) + 1
+    if size <= 0:
+        return 0
+    left_counts = np.bincount(left_codes[left_codes >= 0], minlength=size)
+    right_counts = np.bincount(right_codes[right_codes >= 0], minlength=size)
+    return int(np.dot(left_counts.astype(np.int64), right_counts.astype(np.int64)))
+
+
+def _is_measure(series):
+    """Continuous (non-integral float) columns are measurements, never join keys."""
+    if not is_float_dtype(series):
+        return False
+    values = series.dropna().to_numpy(dtype="float64")
+    return bool(len(values)) and not np.all(values == np.round(values))
+
+
+def score_join_keys(df1, df2):
+    """
+    Rank columns shared by both frames (matched on stripped, lowercased names).
+    Each candidate gets its value overlap, per-side uniqueness and estimated
+    inner-join size; keys that actually overlap and are close to unique
+    score highest, with a small bonus for year columns.
+    Returns a list of dicts, best first.
+    """
+    names2 = {_normalize_name(c): c for c in df2.columns}
+    pairs = [(c, names2[_normalize_name(c)]) for c in df1.columns if _normalize_name(c) in names2]
+    # entity columns pair up even when their names differ (e.g. "state_name" vs "subdivision")
+    for col1 in df1.columns:
+        for col2 in df2.columns:
+            if (col1, col2) not in pairs and \
+                    common_level(detect_entity_kind(col1), detect_entity_kind(col2)) is not None:
+                pairs.append((col1, col2))
+
+    candidates = []
+    for col1, col2 in pairs:
+        if _is_measure(df1[col1]) or _is_measure(df2[col2]):
+            continue
+        left, right = encode_join_keys(df1, col1, df2, col2)[:2]
+        keys1, keys2 = np.unique(left[left >= 0]), np.unique(right[right >= 0])
+        if not len(keys1) or not len(keys2):
+            continue
+        shared = len(np.intersect1d(keys1, keys2, assume_unique=True))
+        overlap = shared / min(len(keys1), len(keys2))
+        uniqueness = min(len(keys1) / max(len(df1), 1), len(keys2) / max(len(df2), 1))
+        score = overlap * (0.5 + 0.5 * uniqueness)
+        if "year" in _normalize_name(col1):
+            score += 0.05
+        candidates.append({
+            "left": col1,
+            "right": col2,
+            "name": _normalize_name(col1) if _normalize_name(col1) == _normalize_name(col2)
+                    else f"{_normalize_name(col1)} ~ {_normalize_name(col2)}",
+            "overlap": overlap,
+            "uniqueness": uniqueness,
+            "estimated_rows": estimate_join_rows(left, right),
+            "score": score,
+        })
+    return sorted(candidates, key=lambda c: c["score"], reverse=True)
+
+
+def _aggregate_by_key(df, key, codes, labels, agg):
+    """
+    Collapse a frame to one row per key code, aggregating numeric columns.
+    Returns the aggregated frame (key column holds the shared label) and its codes.
+    """
+    present = codes >= 0
+    numeric_cols = [c for c in df.columns if c != key and is_numeric_dtype(df[c]) and not is_year_col_name(c)]
+    if numeric_cols:
+        # partial aggregates per partition on the worker pool for large frames
+        result = group_reduce(df.loc[present, numeric_cols], codes[present], agg)
+    else:
+        result = df.loc[present].groupby(codes[present], sort=True).size().to_frame("rows")
+    new_codes = result.index.to_numpy()
+    result.insert(0, key, labels[new_codes])
+    return result.reset_index(drop=True), new_codes
+
+
+class JoinResult:
+    """
+    Inner join kept as matched row positions rather than a merged frame.
+    Pages are materialized on demand, so memory stays proportional to
+    the page size plus two int arrays.
+    """
+
+    def __init__(self, left, right, left_key, right_key, left_pos, right_pos, pre_aggregated=False):
+        self.left = left
+        self.right = right
+        self.left_key = left_key
+        self.right_key = right_key
+        self.left_pos = left_pos
+        self.right_pos = right_pos
+        self.pre_aggregated = pre_aggregated
+
+    def __len__(self):
+        return len(self.left_pos)
+
+    @property
+    def num_pages(self):
+        return max(1, -(-len(self) // PAGE_SIZE))
+
+    def page(self, number, page_size=PAGE_SIZE):
+        """
+        Materialize one page (0-based) of the joined rows.
+        """
+        start = number * page_size
+        stop = min(start + page_size, len(self))
+        left = self.left.iloc[self.left_pos[start:stop]].reset_index(drop=True)
+        right = self.right.iloc[self.right_pos[start:stop]].reset_index(drop=True)
+        right = right.drop(columns=[self.right_key])
+        overlap = set(left.columns) & set(right.columns)
+        left = left.rename(columns={c: f"{c}_left" for c in overlap})
+        right = right.rename(columns={c: f"{c}_right" for c in overlap})
+        return pd.concat([left, right], axis=1)
+
+    def iter_pages(self, page_size=PAGE_SIZE):
+        for number in range(-(-len(self) // page_size)):
+            yield self.page(number, page_size)
+
+
+def _match_positions(left_codes, right_codes):
+    """
+    Inner-join row positions for two code arrays, in left-row order.
+    """
+    order = np.argsort(right_codes, kind="stable")
+    sorted_codes = right_codes[order]
+    starts = np.searchsorted(sorted_codes, left_codes, side="left")
+    ends = np.searchsorted(sorted_codes, left_codes, side="right")
+    counts = np.where(left_codes >= 0, ends - starts, 0)
+
+    total = int(counts.sum())
+    left_pos = np.repeat(np.arange(len(left_codes)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    right_pos = order[np.repeat(starts, counts) + offsets]
+    return left_pos, right_pos
+
+
+@timed("compare.join")
+def join_datasets(df1, df2, left_key, right_key=None, max_rows=MAX_JOIN_ROWS, agg="sum"):
+    """
+    Inner-join two frames on dictionary-encoded keys (canonical entity ids
+    for entity columns, normalized text otherwise).
+    The output size is estimated first; if it exceeds max_rows both sides
+    are pre-aggregated to one row per key (numeric columns via `agg`), which
+    bounds the result by the number of distinct keys.
+    Returns a JoinResult.
+    """
+    right_key = right_key or left_key
+    left_codes, right_codes, labels = encode_join_keys(df1, left_key, df2, right_key)
+    pre_aggregated = False
+
+    if estimate_join_rows(left_codes, right_codes) > max_rows:
+        df1, left_codes = _aggregate_by_key(df1, left_key, left_codes, labels, agg)
+        df2, right_codes = _aggregate_by_key(df2, right_key, right_codes, labels, agg)
+        pre_aggregated = True
+
+    left_pos, right_pos = _match_positions(left_codes, right_codes)
+    return JoinResult(df1, df2, left_key, right_key, left_pos, right_pos, pre_aggregated)
+
+
+_joins = OrderedDict()
+_joins_lock = threading.Lock()
+_key_scores = OrderedDict()
+
+
+def get_join_keys(df1, df2):
+    """
+    Cached score_join_keys: reruns of the same comparison reuse the ranking.
+    """
+    key = (get_fingerprint(df1), get_fingerprint(df2))
+    with _joins_lock:
+        result = _key_scores.get(key)
+        if result is not None:
+            _key_scores.move_to_end(key)
+            return result
+    result = score_join_keys(df1, df2)
+    with _joins_lock:
+        _key_scores[key] = result
+        while len(_key_scores) > MAX_CACHED_JOINS:
+            _key_scores.popitem(last=False)
+    return result
+
+
+def get_join(df1, df2, left_key, right_key=None, max_rows=MAX_JOIN_ROWS):
+    """
+    Cached join_datasets: reruns that only change the visible page reuse the join.
+    """
+    key = (get_fingerprint(df1), get_fingerprint(df2), left_key, right_key or left_key, max_rows)
+    with _joins_lock:
+        result = _joins.get(key)
+        if result is not None:
+            _joins.move_to_end(key)
+            return result
+    result = join_datasets(df1, df2, left_key, right_key, max_rows=max_rows)
+    with _joins_lock:
+        _joins[key] = result
+        while len(_joins) > MAX_CACHED_JOINS:
+            _joins.popitem(last=False)
+    return result
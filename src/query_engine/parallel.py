@@ -0,0 +1,278 @@
+# src/query_engine/parallel.py
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.utils.logger import count, get_logger, span
+
+# Worker processes; 1 (the default on single-core hosts) keeps everything in-process
+PARALLEL_WORKERS = int(os.getenv("PARALLEL_WORKERS", str(os.cpu_count() or 1)))
+# Frames smaller than this are not worth shipping to the pool
+PARALLEL_MIN_ROWS = int(os.getenv("PARALLEL_MIN_ROWS", "250000"))
+# Fixed partition size, so partial results (and their merge order) do not depend on the worker count
+PARTITION_ROWS = int(os.getenv("PARALLEL_PARTITION_ROWS", "100000"))
+# "forkserver" avoids forking the app's threads; "spawn" works everywhere
+START_METHOD = os.getenv("PARALLEL_START_METHOD", "forkserver")
+
+logger = get_logger(__name__)
+
+
+def use_parallel(num_rows):
+    return PARALLEL_WORKERS > 1 and num_rows >= PARALLEL_MIN_ROWS
+
+
+def partition_bounds(num_rows, size=PARTITION_ROWS):
+    """[(start, stop), ...] covering num_rows in order."""
+    return [(start, min(start + size, num_rows)) for start in range(0, num_rows, max(1, size))]
+
+
+# -------------------------
+# Shared memory
+# -------------------------
+class SharedFrame:
+    """
+    A DataFrame written once into shared memory as an Arrow IPC stream.
+    Workers map it and read only their row range, so partitions are never pickled.
+    """
+
+    def __init__(self, df):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.MockOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        self.size = sink.size()
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, self.size))
+        buffer = pa.py_buffer(self._shm.buf)
+        with pa.ipc.new_stream(pa.FixedSizeBufferWriter(buffer), table.schema) as writer:
+            writer.write_table(table)
+        del buffer
+        self.handle = (self._shm.name, self.size)
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SharedArray:
+    """A 1-d numpy array in shared memory that workers fill slice by slice."""
+
+    def __init__(self, dtype, length):
+        self.dtype = np.dtype(dtype)
+        self.length = length
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, self.dtype.itemsize * length))
+        self.handle = (self._shm.name, self.dtype.str, length)
+
+    def to_numpy(self):
+        """A private copy of the contents, safe to keep after close()."""
+        return np.ndarray(self.length, dtype=self.dtype, buffer=self._shm.buf).copy()
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Blocks mapped by this (worker) process; frames read from them are zero-copy views
+_mapped = {}
+
+
+def _attach(name):
+    shm = _mapped.get(name)
+    if shm is None:
+        _release_mapped()
+        # workers share the parent's resource tracker, so the creating process still owns the block
+        shm = _mapped[name] = shared_memory.SharedMemory(name=name)
+    return shm
+
+
+def _release_mapped():
+    for name, shm in list(_mapped.items()):
+        try:
+            shm.close()
+        except BufferError:
+            continue  # a frame from this block is still alive; retry on the next attach
+        del _mapped[name]
+
+
+def _read_partition(handle, start, stop):
+    name, size = handle
+    buffer = pa.py_buffer(_attach(name).buf)[:size]
+    return pa.ipc.open_stream(buffer).read_all().slice(start, stop - start).to_pandas()
+
+
+def _write_partition(handle, start, values):
+    name, dtype, length = handle
+    out = np.ndarray(length, dtype=dtype, buffer=_attach(name).buf)
+    out[start:start + len(values)] = values
+
+
+# -------------------------
+# Pool
+# -------------------------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide worker pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            method = START_METHOD if START_METHOD in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=PARALLEL_WORKERS, mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def _run_partition(task, frame_handle, start, stop, args, out_handle):
+    result = task(_read_partition(frame_handle, start, stop), *args)
+    if out_handle is None:
+        return result
+    values, result = result
+    _write_partition(out_handle, start, values)
+    return result
+
+
+def map_partitions(df, task, *args, out=None):
+    """
+    Run task(partition, *args) over fixed-size row partitions of df on the
+    worker pool and return the results in partition order.
+
+    With out=<dtype>, task must return (values, result) where values has one
+    entry per partition row; values are written into a shared array and
+    (array, results) is returned. Falls back to running in-process when
+    shared memory or the pool is unavailable, or Arrow cannot hold the frame.
+    """
+    bounds = partition_bounds(len(df))
+    with span("parallel.map", task=task.__name__, rows=len(df), partitions=len(bounds)):
+        try:
+            with SharedFrame(df) as frame:
+                if out is None:
+                    futures = [get_pool().submit(_run_partition, task, frame.handle, start, stop, args, None)
+                               for start, stop in bounds]
+                    return [f.result() for f in futures]
+                with SharedArray(out, len(df)) as shared:
+                    futures = [get_pool().submit(_run_partition, task, frame.handle, start, stop, args, shared.handle)
+                               for start, stop in bounds]
+                    results = [f.result() for f in futures]
+                    return shared.to_numpy(), results
+        except (OSError, BrokenProcessPool, pa.ArrowException) as e:
+            # ArrowException: columns Arrow cannot share, e.g. raw JSON mixing numbers and text
+            logger.warning("parallel execution unavailable, running in-process",
+                           extra={"fields": {"task": task.__name__, "error": str(e)}})
+            count("parallel.fallback")
+            if isinstance(e, BrokenProcessPool):
+                shutdown_pool()
+
+    results = [task(df.iloc[start:stop], *args) for start, stop in bounds]
+    if out is None:
+        return results
+    values = np.concatenate([np.asarray(v, dtype=out) for v, _ in results]) if results else np.empty(0, dtype=out)
+    return values, [r for _, r in results]
+
+
+# -------------------------
+# Partitioned operations
+# -------------------------
+def _coerce_task(frame, column):
+    text = frame[column].astype("string").str.strip()
+    return pd.to_numeric(text, errors="coerce").to_numpy(dtype="float64", na_value=np.nan), None
+
+
+def to_numeric(series):
+    """
+    pd.to_numeric(errors="coerce") of a (text) Series as float64, parsed
+    partition by partition on the pool for large inputs.
+    """
+    if not use_parallel(len(series)):
+        text = series.astype("string").str.strip()
+        return pd.Series(pd.to_numeric(text, errors="coerce"), index=series.index, dtype="float64")
+    name = series.name if series.name is not None else "values"
+    # parsing goes through text anyway; as text, mixed object columns can be shared as Arrow
+    text = series.astype("string").rename(name).to_frame()
+    values, _ = map_partitions(text, _coerce_task, name, out="float64")
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def _factorize_task(frame, column):
+    codes, uniques = pd.factorize(frame[column], use_na_sentinel=True)
+    return codes, list(uniques)
+
+
+def factorize(series):
+    """
+    pd.factorize(series, use_na_sentinel=True) split across the pool:
+    each partition is factorized on its own and the vocabularies are merged
+    in partition order, so codes and uniques equal the serial result.
+    Uniques are taken from series itself, so they keep its dtype.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype) or not use_parallel(len(series)):
+        return pd.factorize(series, use_na_sentinel=True)
+    name = series.name if series.name is not None else "values"
+    codes, vocabularies = map_partitions(series.rename(name).to_frame(), _factorize_task, name, out="int64")
+
+    merged, uniques = pd.factorize(pd.Series([v for vocab in vocabularies for v in vocab], dtype="object"))
+    offset = 0
+    for (start, stop), vocab in zip(partition_bounds(len(series)), vocabularies):
+        remap = np.append(merged[offset:offset + len(vocab)], -1)
+        codes[start:stop] = remap[codes[start:stop]]
+        offset += len(vocab)
+    # codes appear in increasing order, so the running maximum steps up at each value's first row
+    first_rows = np.flatnonzero(np.diff(np.maximum.accumulate(codes), prepend=-1) > 0)
+    return codes, pd.Index(series.array.take(first_rows), dtype=series.dtype)
+
+
+REDUCE_PARTIALS = {"sum": ("sum",), "count": ("count",), "min": ("min",), "max": ("max",), "mean": ("sum", "count")}
+_FOLD = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+
+
+def _reduce_task(frame, key, partials):
+    grouped = frame.drop(columns=[key]).groupby(frame[key].to_numpy(), sort=False)
+    return {p: grouped.agg(p) for p in partials}
+
+
+def group_reduce(df, codes, agg):
+    """
+    df.groupby(codes, sort=True).agg(agg) for integer group codes, computed as
+    per-partition partials (sum/count/min/max) folded in partition order.
+    Only sum, count, min, max and mean are split; other aggregates run serially.
+    """
+    if agg not in REDUCE_PARTIALS or not use_parallel(len(df)):
+        return df.groupby(codes, sort=True).agg(agg)
+    key = "__group"
+    frame = df.assign(**{key: np.asarray(codes)}).reset_index(drop=True)
+    partials = REDUCE_PARTIALS[agg]
+    results = map_partitions(frame, _reduce_task, key, partials)
+    folded = {p: pd.concat([r[p] for r in results]).groupby(level=0, sort=True).agg(_FOLD[p]) for p in partials}
+    if agg == "mean":
+        return folded["sum"] / folded["count"].replace(0, np.nan)
+    return folded[agg]
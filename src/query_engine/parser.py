@@ -0,0 +1,291 @@
+# src/query_engine/parser.py
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from src.data_handler.preprocessor import is_year_col_name
+
+MAX_CACHED_PLANS = 256
+
+AGGREGATE_WORDS = {
+    "average": "mean", "avg": "mean", "mean": "mean",
+    "total": "sum", "sum": "sum", "overall": "sum",
+    "maximum": "max", "max": "max", "highest": "max", "peak": "max", "most": "max",
+    "minimum": "min", "min": "min", "lowest": "min", "least": "min",
+    "count": "count", "number": "count", "many": "count",
+}
+
+MONTH_ABBR = {
+    "january": "jan", "february": "feb", "march": "mar", "april": "apr", "may": "may", "june": "jun",
+    "july": "jul", "august": "aug", "september": "sep", "sept": "sep", "october": "oct",
+    "november": "nov", "december": "dec",
+}
+MONTH_ABBR.update({abbr: abbr for abbr in set(MONTH_ABBR.values())})
+
+# Words that describe the measured quantity when the question does not name a column
+METRIC_HINTS = {
+    "rainfall": ("annual", "ann", "rainfall", "rain"),
+    "rain": ("annual", "ann", "rainfall", "rain"),
+    "production": ("production", "prod"),
+    "produce": ("production", "prod"),
+    "area": ("area",),
+    "yield": ("yield",),
+    "arrival": ("arrival", "arrivals"),
+}
+
+YEAR_RANGE = re.compile(r"\b(1[89]\d{2}|20\d{2})\s*(?:-|to|and|until|till|through)\s*(1[89]\d{2}|20\d{2})\b")
+YEAR_BOUND = re.compile(r"\b(after|since|from|before|until|till|upto|up to)\s+(1[89]\d{2}|20\d{2})\b")
+YEAR_SINGLE = re.compile(r"\b(1[89]\d{2}|20\d{2})\b")
+GROUP_BY = re.compile(r"\b(?:by|per|each|every|across|for all|for each)\s+([a-z_ ]+?)(?=$|\s(?:in|for|from|between|during|after|before|since|with|top|and)\b)")
+WHICH = re.compile(r"\b(?:which|what)\s+([a-z_]+)")
+TOP_N = re.compile(r"\b(top|bottom|first|last)\s+(\d+)(?:\s+([a-z_]+))?")
+
+
+class QueryParseError(ValueError):
+    """Raised when a question cannot be mapped onto the dataset's columns."""
+
+
+@dataclass(frozen=True)
+class FilterStep:
+    """Filter rows: op is "in" (value is a tuple of labels) or "between" (value is (low, high))."""
+    column: str
+    op: str
+    value: tuple
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """
+    Typed logical plan produced by parse_question and run by executor.execute_plan:
+    filter -> group-by -> aggregate -> sort -> limit.
+    """
+    question: str
+    filters: tuple = ()
+    group_by: tuple = ()
+    aggregate: str = "mean"
+    metric: str = None
+    sort_descending: bool = None
+    limit: int = None
+    notes: tuple = field(default=(), compare=False)
+
+    def describe(self):
+        parts = []
+        for f in self.filters:
+            low, high = f.value if f.op == "between" else (None, None)
+            if f.op == "in":
+                parts.append(f"{f.column} in {list(f.value)}")
+            elif low == high:
+                parts.append(f"{f.column} = {low:g}")
+            elif high == float("inf"):
+                parts.append(f"{f.column} >= {low:g}")
+            elif low == float("-inf"):
+                parts.append(f"{f.column} <= {high:g}")
+            else:
+                parts.append(f"{low:g} <= {f.column} <= {high:g}")
+        text = f"{self.aggregate}({self.metric or '*'})"
+        if self.group_by:
+            text += f" by {', '.join(self.group_by)}"
+        if parts:
+            text += f" where {' and '.join(parts)}"
+        if self.limit:
+            text += f", {'top' if self.sort_descending else 'bottom'} {self.limit}"
+        return text
+
+
+def normalize_question(question):
+    """
+    Lowercase, drop punctuation (keeping digits, '&' and '-') and collapse whitespace.
+    """
+    text = str(question).casefold().replace("–", "-")
+    text = re.sub(r"[^\w&\- ]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _column_words(col):
+    return normalize_question(str(col).replace("_", " ").replace(".", " "))
+
+
+def _find_column(profile, words, roles=None):
+    """
+    Return the first column whose normalized name equals or starts with one of `words`.
+    """
+    for word in words:
+        for col, info in profile.items():
+            if roles and info["role"] not in roles:
+                continue
+            name = _column_words(col)
+            if name == word or name.split(" ")[0] == word or name.startswith(word + " "):
+                return col
+    return None
+
+
+def _year_column(profile):
+    for col, info in profile.items():
+        if is_year_col_name(col) and info["min"] is not None:
+            return col
+    return None
+
+
+def _parse_years(text, profile, notes):
+    year_col = _year_column(profile)
+    match = YEAR_RANGE.search(text)
+    bound = YEAR_BOUND.search(text)
+    single = YEAR_SINGLE.search(text)
+    if not (match or bound or single):
+        return None, text
+    if year_col is None:
+        notes.append("Ignored the year condition: no year column in this dataset.")
+        return None, YEAR_SINGLE.sub(" ", text)
+
+    if match:
+        low, high = sorted((int(match.group(1)), int(match.group(2))))
+    elif bound:
+        word, year = bound.group(1), int(bound.group(2))
+        if word == "after":
+            low, high = year + 1, float("inf")
+        elif word in ("since", "from"):
+            low, high = year, float("inf")
+        elif word == "before":
+            low, high = float("-inf"), year - 1
+        else:
+            low, high = float("-inf"), year
+    else:
+        low = high = int(single.group(1))
+    return FilterStep(year_col, "between", (low, high)), YEAR_SINGLE.sub(" ", text)
+
+
+def _parse_entities(text, profile):
+    """
+    Match categorical values (from the profile's option lists) inside the question.
+    Longer values win, so "north interior karnataka" beats "karnataka".
+    """
+    steps = []
+    padded = f" {text} "
+    candidates = []
+    for col, info in profile.items():
+        for option in info.get("options") or ():
+            norm = normalize_question(option)
+            if len(norm) >= 3 and f" {norm} " in padded:
+                candidates.append((len(norm), col, option, norm))
+
+    matched = {}
+    for _, col, option, norm in sorted(candidates, reverse=True):
+        if f" {norm} " not in padded:
+            continue
+        matched.setdefault(col, []).append(option)
+        padded = padded.replace(f" {norm} ", " ")
+    for col, options in matched.items():
+        steps.append(FilterStep(col, "in", tuple(sorted(options))))
+    return steps, padded.strip()
+
+
+def parse_question(question, profile):
+    """
+    Compile a natural-language question into a QueryPlan against a dataset profile
+    (see profiler.get_profile). Rule based and fully offline.
+
+    Example: "average June rainfall in Kerala 1950-2000" ->
+    mean(JUN) where SUBDIVISION in ['Kerala'] and 1950 <= YEAR <= 2000
+    """
+    text = normalize_question(question)
+    if not text:
+        raise QueryParseError("The question is empty.")
+    notes = []
+    words = text.split(" ")
+
+    aggregate = next((AGGREGATE_WORDS[w] for w in words if w in AGGREGATE_WORDS), None)
+    if "how many" in text:
+        aggregate = "count"
+
+    year_step, text = _parse_years(text, profile, notes)
+    entity_steps, remaining = _parse_entities(text, profile)
+    filters = tuple(entity_steps) + ((year_step,) if year_step else ())
+
+    group_by = ()
+    top = TOP_N.search(remaining)
+    targets = [m.group(1).strip() for m in (GROUP_BY.search(remaining), WHICH.search(remaining)) if m]
+    if top and top.group(3):
+        targets.append(top.group(3))
+    for target in targets:
+        col = _find_column(profile, [target, target.rstrip("s"), target.split(" ")[0]])
+        if col is None and target in ("year", "years", "yearly"):
+            col = _year_column(profile)
+        if col is not None:
+            group_by = (col,)
+            break
+    if targets and not group_by:
+        notes.append(f"Could not find a column for grouping by '{targets[0]}'.")
+
+    value_roles = ("month", "value", "year")
+    metric = None
+    month_words = [MONTH_ABBR[w] for w in words if w in MONTH_ABBR]
+    if month_words:
+        metric = _find_column(profile, month_words, roles=("month",))
+    if metric is None:
+        named = [w for w in words if len(w) > 2]
+        metric = _find_column(profile, named, roles=("month", "value"))
+        if metric in group_by or (metric and metric in {f.column for f in filters}):
+            metric = None
+    if metric is None:
+        for w in words:
+            if w in METRIC_HINTS:
+                metric = _find_column(profile, METRIC_HINTS[w], roles=value_roles)
+                if metric:
+                    break
+    if metric is None:
+        values = [c for c, info in profile.items() if info["role"] == "value"]
+        if len(values) == 1:
+            metric = values[0]
+            notes.append(f"Assumed `{metric}` as the measured column.")
+
+    if aggregate is None:
+        aggregate = "sum" if group_by else "mean"
+    if metric is None and aggregate != "count":
+        raise QueryParseError("Could not tell which column to measure; mention a column or month by name.")
+
+    sort_descending, limit = None, None
+    if top:
+        sort_descending = top.group(1) in ("top", "first")
+        limit = int(top.group(2))
+    elif group_by and any(w in ("highest", "most", "lowest", "least") for w in words):
+        sort_descending = any(w in ("highest", "most") for w in words)
+        limit = 1
+        aggregate = "sum" if aggregate in ("max", "min") else aggregate
+    elif group_by and group_by[0] != _year_column(profile):
+        # rank groups by value; a per-year breakdown stays in year order
+        sort_descending = True
+
+    return QueryPlan(
+        question=text,
+        filters=filters,
+        group_by=group_by,
+        aggregate=aggregate,
+        metric=metric,
+        sort_descending=sort_descending,
+        limit=limit,
+        notes=tuple(notes),
+    )
+
+
+_plan_cache = OrderedDict()
+_plan_lock = threading.Lock()
+
+
+def get_plan(question, profile, dataset_key):
+    """
+    Return the cached plan for (dataset_key, normalized question), parsing on a miss.
+    dataset_key is any hashable id of the profiled schema, e.g. its fingerprint.
+    """
+    key = (dataset_key, normalize_question(question))
+    with _plan_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None:
+            _plan_cache.move_to_end(key)
+            return plan
+    plan = parse_question(question, profile)
+    with _plan_lock:
+        _plan_cache[key] = plan
+        while len(_plan_cache) > MAX_CACHED_PLANS:
+            _plan_cache.popitem(last=False)
+    return plan
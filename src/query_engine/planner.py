@@ -0,0 +1,81 @@
+# src/query_engine/planner.py
+import os
+from dataclasses import dataclass, field
+
+from src.query_engine.filter_engine import normalize_text
+
+# Resources larger than this are not downloaded in full before filtering
+PUSHDOWN_MIN_ROWS = int(os.getenv("PUSHDOWN_MIN_ROWS", "50000"))
+# Rows fetched to populate filter options for large resources
+PREVIEW_ROWS = int(os.getenv("PREVIEW_ROWS", "5000"))
+
+
+@dataclass
+class FilterPlan:
+    """
+    Split of categorical predicates between data.gov.in and pandas.
+
+    api_filters: {field_id: value} sent as `filters[field_id]=value`
+    local_filters: {column: [values]} still applied locally by FilterEngine
+    """
+    api_filters: dict = field(default_factory=dict)
+    local_filters: dict = field(default_factory=dict)
+
+
+def pushable_fields(metadata):
+    """
+    Return the set of field ids the resource accepts as API filters.
+    data.gov.in lists them under `field_exposed`; resources without it get no pushdown.
+    """
+    if not metadata:
+        return set()
+    exposed = metadata.get("field_exposed") or []
+    return {f.get("id") for f in exposed if isinstance(f, dict) and f.get("id")}
+
+
+def should_push_down(total, fields):
+    """
+    True when a resource is large enough that filtering on the server beats a full download.
+    """
+    return bool(fields) and total is not None and int(total) > PUSHDOWN_MIN_ROWS
+
+
+def plan_filters(selections, fields=(), options=None):
+    """
+    Build a FilterPlan from multiselect choices ({column: [values]}).
+
+    The API only takes one exact value per field, so a predicate is pushed
+    down only when the column is exposed as a filter and a single value is
+    selected. Everything else stays local.
+
+    API filters are exact and case-sensitive while local filters ignore case
+    and surrounding whitespace. `options` ({column: [distinct values]} over
+    the whole resource) lets a value be sent with its upstream spelling; a
+    value spelled several ways upstream stays local, so no spelling is missed.
+    """
+    plan = FilterPlan()
+    fields = set(fields or ())
+    options = options or {}
+    for column, values in (selections or {}).items():
+        values = [v for v in values if v is not None and str(v).strip()]
+        if not values:
+            continue
+        value = exact_value(values[0], options.get(column)) if len(values) == 1 else None
+        if column in fields and value is not None:
+            plan.api_filters[column] = value
+        else:
+            plan.local_filters[column] = values
+    return plan
+
+
+def exact_value(value, known=None):
+    """
+    The single upstream spelling matching `value` as a local filter would
+    (ignoring case and surrounding whitespace), or None when there are
+    several. Without known values, the trimmed value itself.
+    """
+    wanted = normalize_text(value)
+    if not known:
+        return str(value).strip()
+    matches = {str(v) for v in known if normalize_text(v) == wanted}
+    return matches.pop() if len(matches) == 1 else None
@@ -0,0 +1,366 @@
+# src/query_engine/search.py
+import argparse
+import bisect
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from src.data_handler.cache import dataset_cache
+from src.data_handler.catalog import DATASETS
+from src.data_handler.preprocessor import is_year_col_name
+from src.utils.logger import count, get_logger, span
+
+# Text columns with more distinct values than this are free text and not indexed
+MAX_INDEXED_VALUES = int(os.getenv("SEARCH_MAX_VALUES", "20000"))
+# Trigram similarity (Jaccard) a vocabulary term needs to match a misspelled query word
+FUZZY_THRESHOLD = float(os.getenv("SEARCH_FUZZY_THRESHOLD", "0.35"))
+MAX_FUZZY_TERMS = 5
+MIN_PREFIX_LENGTH = 3
+MAX_SHOWN_VALUES = 5
+
+logger = get_logger(__name__)
+
+TOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    """Lowercase word tokens; '&' and punctuation separate words."""
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return []
+    return TOKEN.findall(str(text).casefold())
+
+
+def trigrams(term):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class SearchHit:
+    dataset: str
+    resource_id: str
+    score: float
+    # {column: matched values}; columns whose name matched map to []
+    matches: dict = field(default_factory=dict)
+    # row positions in the cached frame matching every value term, None when only names matched
+    rows: np.ndarray = None
+    total_rows: int = 0
+
+    @property
+    def num_rows(self):
+        return self.total_rows if self.rows is None else len(self.rows)
+
+    def describe(self):
+        parts = []
+        for col, values in self.matches.items():
+            shown = ", ".join(str(v) for v in values[:MAX_SHOWN_VALUES])
+            more = f" (+{len(values) - MAX_SHOWN_VALUES})" if len(values) > MAX_SHOWN_VALUES else ""
+            parts.append(f"{col} = {shown}{more}" if values else f"column {col}")
+        return "; ".join(parts)
+
+
+class SearchIndex:
+    """
+    Inverted index over the cached datasets: dataset names, column names
+    and the distinct values of categorical, text and year columns.
+
+    Every indexed name or value is an entry; each word maps to the entries
+    containing it (token postings) and each word's trigrams map back to the
+    word (trigram postings), so misspelled or partial query words still
+    find their terms. Values keep their column's codes, so the rows matching
+    a query are a few vectorized comparisons away. A resource is re-indexed
+    on its own whenever its cache entry changes; once removed entries
+    outnumber live ones, the vocabulary and postings are rebuilt from the
+    live entries so they do not grow with every refresh.
+    """
+
+    def __init__(self, cache=dataset_cache):
+        self.cache = cache
+        self._terms = {}            # word -> term id
+        self._words = []            # term id -> word
+        self._postings = []         # term id -> set of entry ids
+        self._trigrams = {}         # trigram -> set of term ids
+        self._entries = []          # entry id -> (resource_id, column, code, label, term ids) or None
+        self._docs = {}             # resource_id -> indexed resource
+        self._sorted_words = None   # vocabulary in sorted order for prefix lookups, built on demand
+        self._removed = 0           # entries dropped since the last compaction
+        self._lock = threading.RLock()
+
+    # -------------------------
+    # Maintenance
+    # -------------------------
+    def _term(self, word):
+        term = self._terms.get(word)
+        if term is None:
+            term = self._terms[word] = len(self._words)
+            self._words.append(word)
+            self._sorted_words = None
+            self._postings.append(set())
+            for gram in trigrams(word):
+                self._trigrams.setdefault(gram, set()).add(term)
+        return term
+
+    def _add_entry(self, resource_id, column, code, label, text):
+        entry = len(self._entries)
+        terms = {self._term(w) for w in tokenize(text)}
+        for term in terms:
+            self._postings[term].add(entry)
+        self._entries.append((resource_id, column, code, label, terms))
+        return entry
+
+    def remove(self, resource_id):
+        """Drop every entry of a resource."""
+        with self._lock:
+            doc = self._docs.pop(resource_id, None)
+            if doc is None:
+                return
+            for entry in doc["entries"]:
+                for term in self._entries[entry][4]:
+                    self._postings[term].discard(entry)
+                self._entries[entry] = None
+            self._removed += len(doc["entries"])
+            if self._removed > len(self._entries) - self._removed:
+                self._compact()
+
+    def _compact(self):
+        """Rebuild terms, postings and trigrams from the live entries, renumbering them."""
+        words, entries = self._words, self._entries
+        self._terms, self._words, self._postings, self._trigrams, self._entries = {}, [], [], {}, []
+        self._sorted_words = None
+        for doc in self._docs.values():
+            renumbered = []
+            for entry in doc["entries"]:
+                resource_id, column, code, label, terms = entries[entry]
+                renumbered.append(len(self._entries))
+                terms = {self._term(words[t]) for t in terms}
+                for term in terms:
+                    self._postings[term].add(renumbered[-1])
+                self._entries.append((resource_id, column, code, label, terms))
+            doc["entries"] = renumbered
+        self._removed = 0
+        count("search.compactions")
+
+    def update(self, resource_id, df, name=None, signature=None):
+        """
+        (Re-)index one resource from its frame, replacing earlier entries.
+        """
+        name = name or _dataset_name(resource_id)
+        with span("search.index", resource_id=resource_id, rows=len(df)) as s:
+            columns = {}
+            for col in df.columns:
+                codes, uniques = _indexable(df[col], col)
+                if codes is not None:
+                    columns[col] = (codes, uniques)
+            s["columns"] = len(columns)
+            with self._lock:
+                self.remove(resource_id)
+                entries = [self._add_entry(resource_id, None, None, name, name)]
+                for col, (codes, uniques) in columns.items():
+                    entries.append(self._add_entry(resource_id, col, None, col, col))
+                    for code, value in enumerate(uniques):
+                        entries.append(self._add_entry(resource_id, col, code, value, value))
+                for col in df.columns:
+                    if col not in columns:
+                        entries.append(self._add_entry(resource_id, col, None, col, col))
+                self._docs[resource_id] = {
+                    "name": name,
+                    "signature": signature,
+                    "rows": len(df),
+                    "codes": {col: codes for col, (codes, _) in columns.items()},
+                    "entries": entries,
+                }
+
+    def sync(self):
+        """
+        Bring the index in line with the dataset cache: new or changed entries
+        are indexed, resources no longer cached are dropped. For every resource
+        the largest cached variant (the full download rather than a preview) is used.
+        Returns the number of resources (re-)indexed.
+        """
+        best = {}
+        for entry in self.cache.entries().values():
+            current = best.get(entry["resource_id"])
+            if current is None or entry["rows"] > current["rows"]:
+                best[entry["resource_id"]] = entry
+
+        changed = 0
+        with self._lock:
+            for resource_id in [r for r in self._docs if r not in best]:
+                self.remove(resource_id)
+            indexed = {r: d["signature"] for r, d in self._docs.items()}
+        for resource_id, entry in best.items():
+            path = self.cache.cache_dir / entry["file"]
+            columns = [c for c, dtype in entry["schema"].items() if _indexable_dtype(dtype, c)]
+            try:
+                # put() rewrites the same file on refresh, so its mtime tells a refreshed entry apart
+                signature = (entry["file"], entry["rows"], path.stat().st_mtime_ns)
+                if indexed.get(resource_id) == signature:
+                    continue
+                table = feather.read_table(str(path), columns=columns, memory_map=True)
+            except OSError as e:
+                logger.warning("could not index dataset", extra={"fields": {"resource_id": resource_id,
+                                                                               "error": str(e)}})
+                continue
+            df = table.to_pandas()
+            for col in entry["schema"]:
+                if col not in df.columns:
+                    df[col] = pd.Series(dtype="object")  # not searchable by value; name still indexed
+            self.update(resource_id, df, signature=signature)
+            changed += 1
+        return changed
+
+    # -------------------------
+    # Lookup
+    # -------------------------
+    def _lookup(self, word):
+        """
+        {term id: similarity} for one query word: the exact term, otherwise
+        terms starting with it and terms sharing enough trigrams.
+        """
+        term = self._terms.get(word)
+        if term is not None and self._postings[term]:
+            return {term: 1.0}
+        scores = {}
+        if len(word) >= MIN_PREFIX_LENGTH:
+            if self._sorted_words is None:
+                self._sorted_words = sorted(self._terms)
+            # terms starting with the word sit right after it in sorted order
+            for i in range(bisect.bisect_left(self._sorted_words, word), len(self._sorted_words)):
+                candidate = self._sorted_words[i]
+                if not candidate.startswith(word):
+                    break
+                t = self._terms[candidate]
+                if self._postings[t]:
+                    scores[t] = 0.9 * len(word) / len(candidate) + 0.1
+        grams = trigrams(word)
+        shared = {}
+        for gram in grams:
+            for t in self._trigrams.get(gram, ()):
+                shared[t] = shared.get(t, 0) + 1
+        for t, n in shared.items():
+            similarity = n / (len(grams) + len(trigrams(self._words[t])) - n)
+            if similarity >= FUZZY_THRESHOLD and self._postings[t]:
+                scores[t] = max(scores.get(t, 0.0), similarity)
+        best = sorted(scores.items(), key=lambda kv: -kv[1])[:MAX_FUZZY_TERMS]
+        return dict(best)
+
+    def search(self, query, limit=10, sync=True):
+        """
+        Datasets matching every word of the query, best first, with the
+        columns/values each word matched and the rows where all matched
+        values occur together.
+        """
+        if sync:
+            self.sync()
+        words = tokenize(query)
+        if not words:
+            return []
+        start = time.perf_counter()
+        with self._lock:
+            # per resource, per query word: [(entry, similarity)]
+            found = {}
+            for i, word in enumerate(words):
+                for term, similarity in self._lookup(word).items():
+                    for entry in self._postings[term]:
+                        found.setdefault(self._entries[entry][0], {}).setdefault(i, []).append((entry, similarity))
+
+            hits = []
+            for resource_id, per_word in found.items():
+                if len(per_word) < len(words):
+                    continue
+                hits.append(self._hit(resource_id, per_word))
+        hits.sort(key=lambda h: (-h.score, h.dataset))
+        count("search.queries")
+        logger.debug("search", extra={"fields": {"query": query, "hits": len(hits),
+                                                  "ms": round((time.perf_counter() - start) * 1000, 3)}})
+        return hits[:limit]
+
+    def _hit(self, resource_id, per_word):
+        doc = self._docs[resource_id]
+        matches, mask, score = {}, None, 0.0
+        for hits in per_word.values():
+            best = max(s for _, s in hits)
+            score += best
+            # a word matching several values selects their union, per column
+            word_mask = None
+            for entry, similarity in hits:
+                if similarity < best - 0.15:
+                    continue
+                _, column, code, label, _ = self._entries[entry]
+                if column is None:
+                    continue
+                values = matches.setdefault(column, [])
+                if code is None:
+                    continue
+                values.append(label)
+                rows = doc["codes"][column] == code
+                word_mask = rows if word_mask is None else word_mask | rows
+            if word_mask is not None:
+                mask = word_mask if mask is None else mask & word_mask
+        # value matches say more about a dataset than column or name matches
+        score += 0.5 * sum(1 for values in matches.values() if values)
+        return SearchHit(
+            dataset=doc["name"],
+            resource_id=resource_id,
+            score=round(score, 3),
+            matches=matches,
+            rows=None if mask is None else np.flatnonzero(mask),
+            total_rows=doc["rows"],
+        )
+
+
+def _dataset_name(resource_id):
+    return next((name for name, rid in DATASETS.items() if rid == resource_id), resource_id)
+
+
+def _indexable_dtype(dtype, column):
+    return dtype in ("category", "object", "str", "string") or (is_year_col_name(column) and "int" in dtype.lower())
+
+
+def _indexable(series, column):
+    """
+    (codes, distinct values) for columns worth searching by value, else (None, None).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), list(series.cat.categories)
+    elif pd.api.types.is_integer_dtype(series) and is_year_col_name(column):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        uniques = [str(v) for v in uniques]
+    elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        uniques = list(uniques)
+    else:
+        return None, None
+    if len(uniques) == 0 or len(uniques) > MAX_INDEXED_VALUES:
+        return None, None
+    return codes, uniques
+
+
+search_index = SearchIndex()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search the cached datasets by column names and values.")
+    parser.add_argument("query")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    search_index.sync()
+    indexed = time.perf_counter()
+    hits = search_index.search(args.query, args.limit, sync=False)
+    for hit in hits:
+        print(f"{hit.score:>6.2f}  {hit.dataset}  [{hit.num_rows:,} of {hit.total_rows:,} rows]  {hit.describe()}")
+    print(f"{len(hits)} results; indexed in {indexed - start:.2f}s, searched in "
+          f"{(time.perf_counter() - indexed) * 1000:.1f}ms")
+    return 0 if hits else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
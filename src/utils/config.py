@@ -1,12 +1,51 @@
 # src/utils/config.py
 import os
-from dotenv import load_dotenv
-
-# Explicitly provide path to .env
+import threading
 from pathlib import Path
-env_path = Path(__file__).parents[2] / ".env"
-load_dotenv(dotenv_path=env_path)
 
-API_KEY = os.getenv("API_KEY")
-if API_KEY is None:
-    raise ValueError(f"API_KEY not found! Checked at {env_path}")
+ENV_PATH = Path(__file__).parents[2] / ".env"
+
+
+class Settings:
+    """
+    Process-wide settings. The .env file is read once, on first use, and
+    never overrides variables already set in the environment. Nothing is
+    required at import time: without an API_KEY (or with DATA_GOV_OFFLINE=1)
+    the app runs in offline mode and works from the local cache only.
+    """
+
+    def __init__(self, env_path=ENV_PATH):
+        self.env_path = Path(env_path)
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Read .env into os.environ (once per process)."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    from dotenv import load_dotenv
+                    load_dotenv(dotenv_path=self.env_path)
+                    self._loaded = True
+        return self
+
+    @property
+    def api_key(self):
+        self.load()
+        return os.getenv("API_KEY") or None
+
+    @property
+    def offline(self):
+        """True when data.gov.in must not be called."""
+        self.load()
+        return os.getenv("DATA_GOV_OFFLINE", "0") == "1" or self.api_key is None
+
+
+settings = Settings()
+
+
+def __getattr__(name):
+    # `from src.utils.config import API_KEY` still works, resolved on first access
+    if name == "API_KEY":
+        return settings.api_key
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
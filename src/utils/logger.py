@@ -0,0 +1,160 @@
+# src/utils/logger.py
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Samples kept per stage for percentile estimates
+HISTOGRAM_SIZE = int(os.getenv("METRICS_HISTOGRAM_SIZE", "2048"))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any structured fields."""
+
+    def format(self, record):
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def get_logger(name="samarth"):
+    """
+    Return a logger that writes structured JSON lines to stderr.
+    """
+    global _configured
+    if not _configured:
+        with _configure_lock:
+            if not _configured:
+                root = logging.getLogger("samarth")
+                handler = logging.StreamHandler(sys.stderr)
+                handler.setFormatter(JsonFormatter())
+                root.addHandler(handler)
+                root.setLevel(LOG_LEVEL)
+                root.propagate = False
+                _configured = True
+    return logging.getLogger(name if name.startswith("samarth") else f"samarth.{name}")
+
+
+class Histogram:
+    """Bounded reservoir of recent samples with count/total over all samples."""
+
+    def __init__(self, size=HISTOGRAM_SIZE):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+        }
+
+
+_metrics_lock = threading.Lock()
+_histograms = defaultdict(Histogram)
+_counters = defaultdict(float)
+_log = get_logger("metrics")
+
+
+def count(name, value=1):
+    """Add to a process-wide counter (e.g. bytes fetched, cache hits)."""
+    with _metrics_lock:
+        _counters[name] += value
+
+
+def observe(stage, ms):
+    """Record one duration sample for a stage."""
+    with _metrics_lock:
+        _histograms[stage].add(ms)
+
+
+@contextmanager
+def span(stage, **fields):
+    """
+    Time a block of work. The yielded dict can be filled with extra fields
+    (rows, bytes, ...) that end up in the structured log line.
+
+        with span("fetch.page", resource=rid) as s:
+            ...
+            s["bytes"] = len(body)
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        yield fields
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        observe(stage, ms)
+        if error is not None:
+            fields["error"] = repr(error)
+            _log.warning(stage, extra={"fields": {"stage": stage, "ms": round(ms, 3), **fields}})
+        elif _log.isEnabledFor(logging.DEBUG):
+            _log.debug(stage, extra={"fields": {"stage": stage, "ms": round(ms, 3), **fields}})
+
+
+def timed(stage):
+    """Decorator form of span()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def metrics_snapshot():
+    """
+    Percentiles per stage plus counters; cache_hit_ratio is derived from the
+    cache.hit / cache.miss counters.
+    """
+    with _metrics_lock:
+        stages = {stage: hist.summary() for stage, hist in sorted(_histograms.items())}
+        counters = dict(sorted(_counters.items()))
+    hits, misses = counters.get("cache.hit", 0), counters.get("cache.miss", 0)
+    return {
+        "stages": stages,
+        "counters": counters,
+        "cache_hit_ratio": hits / (hits + misses) if hits + misses else None,
+    }
+
+
+def reset_metrics():
+    with _metrics_lock:
+        _histograms.clear()
+        _counters.clear()
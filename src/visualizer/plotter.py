@@ -0,0 +1,72 @@
+# src/visualizer/plotter.py
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from src.data_handler.profiler import get_fingerprint
+from src.utils.logger import span
+from src.visualizer.summary import downsample, get_time_series
+
+# Points sent to the browser per chart, shared between the plotted regions
+MAX_CHART_POINTS = int(os.getenv("TS_MAX_CHART_POINTS", "4000"))
+MIN_POINTS_PER_SERIES = 100
+# Regions one chart can show while every series keeps MIN_POINTS_PER_SERIES points
+MAX_CHART_REGIONS = max(1, MAX_CHART_POINTS // MIN_POINTS_PER_SERIES)
+DEFAULT_REGIONS = 3
+MAX_CACHED_CHARTS = 32
+
+_lock = threading.Lock()
+_charts = OrderedDict()
+
+
+def chart_data(df, kind, regions, max_points=MAX_CHART_POINTS):
+    """
+    Downsampled long frame (date, region, value) for one chart, cached per dataset and view.
+    At most max_points points are returned in total, split evenly between the regions.
+    Returns (data, number of points before downsampling).
+    """
+    if len(regions) * MIN_POINTS_PER_SERIES > max_points:
+        raise ValueError(f"At most {max_points // MIN_POINTS_PER_SERIES} regions fit in one chart")
+    key = (get_fingerprint(df), kind, tuple(regions), max_points)
+    with _lock:
+        cached = _charts.get(key)
+        if cached is not None:
+            _charts.move_to_end(key)
+            return cached
+
+    with span("timeseries.chart", kind=kind, regions=len(regions)) as s:
+        long = get_time_series(df).series(kind, regions)
+        per_series = max_points // max(1, len(regions))
+        data = downsample(long, per_series)
+        s["points"] = len(data)
+    with _lock:
+        _charts[key] = (data, len(long))
+        while len(_charts) > MAX_CACHED_CHARTS:
+            _charts.popitem(last=False)
+    return data, len(long)
+
+
+def render_time_series(df, key):
+    """
+    Line chart of a month-column dataset (e.g. sub-division rainfall) by region.
+    Each series is LTTB-downsampled on the server, so decades of monthly data
+    for many regions reach the browser as a few thousand points.
+    Returns False when df is not a month-column time series.
+    """
+    ts = get_time_series(df)
+    if ts is None:
+        return False
+    c1, c2 = st.columns([3, 2])
+    regions = c1.multiselect("Regions", ts.regions, default=ts.regions[:DEFAULT_REGIONS], key=f"{key}_regions",
+                             max_selections=MAX_CHART_REGIONS)
+    kind = c2.selectbox("Series", ts.kinds, key=f"{key}_kind")
+    if not regions:
+        st.info("Pick at least one region to plot.")
+        return True
+
+    data, total = chart_data(df, kind, regions)
+    st.line_chart(data, x="date", y="value", color="region" if ts.region_col else None)
+    st.caption(f"{len(data):,} of {total:,} points plotted (shape-preserving LTTB downsampling).")
+    return True
@@ -0,0 +1,94 @@
+# src/visualizer/result_view.py
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from src.data_handler.profiler import get_fingerprint
+
+DEFAULT_PAGE_SIZE = 100
+PAGE_SIZES = (25, 50, 100, 250, 500)
+MAX_CACHED_ORDERS = 16
+MAX_CACHED_PAGES = 64
+
+_lock = threading.Lock()
+_orders = OrderedDict()
+_pages = OrderedDict()
+
+
+def _remember(cache, key, value, limit):
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+    return value
+
+
+def _lookup(cache, key):
+    with _lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def sort_order(df, column, descending=False):
+    """
+    Row positions of df sorted by one column (missing values last), cached per dataset.
+    """
+    key = (get_fingerprint(df), column, descending)
+    order = _lookup(_orders, key)
+    if order is None:
+        ranked = df[column].reset_index(drop=True).sort_values(
+            ascending=not descending, na_position="last", kind="stable")
+        order = _remember(_orders, key, ranked.index.to_numpy(), MAX_CACHED_ORDERS)
+    return order
+
+
+def get_page(df, page=0, page_size=DEFAULT_PAGE_SIZE, sort_by=None, descending=False, columns=None):
+    """
+    Return one page (0-based) of df after server-side sorting and column projection.
+    Slices are cached by view state, so re-rendering the same view costs nothing.
+    """
+    columns = tuple(columns) if columns else tuple(df.columns)
+    key = (get_fingerprint(df), page, page_size, sort_by, descending, columns)
+    cached = _lookup(_pages, key)
+    if cached is not None:
+        return cached
+
+    start, stop = page * page_size, min((page + 1) * page_size, len(df))
+    if sort_by is not None and sort_by in df.columns:
+        rows = df.iloc[sort_order(df, sort_by, descending)[start:stop]]
+    else:
+        rows = df.iloc[start:stop]
+    return _remember(_pages, key, rows[list(columns)], MAX_CACHED_PAGES)
+
+
+def render_result_view(df, key, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Paginated table for a large frame: only the visible page is sent to the browser.
+    Column selection, sorting and paging happen on the server.
+    """
+    c1, c2, c3, c4, c5 = st.columns([3, 2, 1, 1, 1])
+    columns = c1.multiselect("Columns", list(df.columns), default=[], key=f"{key}_columns",
+                             placeholder="All columns")
+    sort_choice = c2.selectbox("Sort by", ["(none)"] + [str(c) for c in df.columns], key=f"{key}_sort")
+    descending = c3.toggle("Descending", value=False, key=f"{key}_desc")
+    size = c4.selectbox("Rows", PAGE_SIZES, index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 2,
+                        key=f"{key}_size")
+
+    num_pages = max(1, -(-len(df) // size))
+    # the page lives in the widget state (starting at min_value); passing value= as well conflicts with the reset
+    if st.session_state.get(f"{key}_page", 1) > num_pages:
+        st.session_state[f"{key}_page"] = 1
+    page = c5.number_input(f"Page / {num_pages}", min_value=1, max_value=num_pages, key=f"{key}_page")
+
+    sort_by = None
+    if sort_choice != "(none)":
+        sort_by = next(c for c in df.columns if str(c) == sort_choice)
+    view = get_page(df, int(page) - 1, size, sort_by, descending, columns)
+    st.dataframe(view)
+    start = (int(page) - 1) * size
+    st.caption(f"Rows {start + 1 if len(df) else 0}–{start + len(view)} of {len(df)}")
+    return view
@@ -0,0 +1,207 @@
+# src/visualizer/summary.py
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.data_handler.entities import GEOGRAPHIC_KINDS, detect_entity_kind
+from src.data_handler.preprocessor import MONTH_NUMBERS, is_year_col_name
+from src.data_handler.profiler import get_fingerprint
+from src.utils.logger import span
+
+# IMD seasons, as in the Jan-Feb / Mar-May / Jun-Sep / Oct-Dec columns of the rainfall resources
+SEASONS = {"Winter": (1, 2), "Pre-monsoon": (3, 4, 5), "Monsoon": (6, 7, 8, 9), "Post-monsoon": (10, 11, 12)}
+ROLLING_YEARS = int(os.getenv("TS_ROLLING_YEARS", "10"))
+# Anomalies are measured against the mean of these years (the whole record when none are present)
+BASELINE_YEARS = tuple(int(y) for y in os.getenv("TS_BASELINE_YEARS", "1961-2010").split("-"))
+ALL_REGIONS = "All"
+MAX_CACHED_SERIES = 8
+
+SERIES = ("Monthly", "Monthly anomaly", "Annual", f"Annual, {ROLLING_YEARS}-year rolling mean",
+          "Annual anomaly", "Annual anomaly %", *SEASONS)
+
+
+def month_columns(df):
+    """
+    {column: month number} for columns named after a single month.
+    Season totals such as "jan_feb" are not months.
+    """
+    return {c: MONTH_NUMBERS[str(c).strip().lower()] for c in df.columns if str(c).strip().lower() in MONTH_NUMBERS}
+
+
+def detect_layout(df):
+    """
+    (region column or None, year column, {month column: number}) for wide
+    month-column time series such as the sub-division rainfall resources,
+    or None when df is not one.
+    """
+    if df is None or df.empty:
+        return None
+    months = month_columns(df)
+    year_col = next((c for c in df.columns if is_year_col_name(c) and c not in months), None)
+    if year_col is None or len(months) < 2:
+        return None
+    region_col = next((c for c in df.columns if detect_entity_kind(c) in GEOGRAPHIC_KINDS
+                       and not pd.api.types.is_numeric_dtype(df[c])), None)
+    return region_col, year_col, months
+
+
+class TimeSeries:
+    """
+    A wide month-column dataset melted once into a long series indexed by
+    (region, month start), plus year-by-region tables precomputed from it:
+    annual totals, their rolling mean and anomaly against the baseline
+    normal, and seasonal totals. Charts read these; nothing is re-melted.
+    """
+
+    def __init__(self, df, region_col, year_col, months):
+        self.region_col = region_col
+        self.year_col = year_col
+        with span("timeseries.build", rows=len(df), months=len(months)):
+            self.monthly = self._melt(df, months)
+            self._summarize(months)
+
+    def _melt(self, df, months):
+        years = pd.to_numeric(df[self.year_col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        regions = (df[self.region_col].astype(str).str.strip().to_numpy(dtype=object) if self.region_col
+                   else np.full(len(df), ALL_REGIONS, dtype=object))
+        values = np.column_stack([pd.to_numeric(df[c], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+                                  for c in months])
+        numbers = np.array(list(months.values()))
+
+        keep = ~np.isnan(years)
+        stamps = ((years[keep].astype(np.int64) - 1970) * 12)[:, None] + (numbers - 1)[None, :]
+        long = pd.DataFrame({
+            "region": np.repeat(regions[keep], len(months)),
+            "date": stamps.ravel().astype("datetime64[M]").astype("datetime64[ns]"),
+            "value": values[keep].ravel(),
+        })
+        # repeated region/year rows are averaged so the index stays unique
+        monthly = long.groupby(["region", "date"], sort=True)["value"].mean().to_frame()
+
+        month = monthly.index.get_level_values("date").month
+        baseline = self._in_baseline(monthly.index.get_level_values("date").year)
+        normals = monthly["value"][baseline].groupby([monthly.index.get_level_values("region")[baseline],
+                                                      month[baseline]]).mean()
+        keys = pd.MultiIndex.from_arrays([monthly.index.get_level_values("region"), month])
+        monthly["anomaly"] = monthly["value"].to_numpy() - normals.reindex(keys).to_numpy()
+        return monthly
+
+    def _in_baseline(self, years):
+        inside = (years >= BASELINE_YEARS[0]) & (years <= BASELINE_YEARS[-1])
+        return inside if inside.any() else np.ones(len(years), dtype=bool)
+
+    def _summarize(self, months):
+        # month-by-region tables that charts slice directly
+        self.monthly_table = self.monthly.unstack("region")
+        values = self.monthly_table["value"]
+        years = values.index.year
+        full_range = pd.RangeIndex(years.min(), years.max() + 1, name="year") if len(years) else pd.RangeIndex(0)
+
+        # years with a missing month get no annual or seasonal total
+        self.annual = values.groupby(years).sum(min_count=len(months)).reindex(full_range)
+        self.annual.index.name = "year"
+        self.rolling = self.annual.rolling(ROLLING_YEARS, min_periods=max(1, ROLLING_YEARS // 2)).mean()
+        normal = self.annual[self._in_baseline(self.annual.index)].mean()
+        self.anomaly = self.annual - normal
+        self.anomaly_pct = self.anomaly / normal.replace(0, np.nan) * 100
+        self.seasonal = {}
+        for season, numbers in SEASONS.items():
+            if np.isin(numbers, list(months.values())).all():
+                rows = values[np.isin(values.index.month, numbers)]
+                self.seasonal[season] = rows.groupby(rows.index.year).sum(min_count=len(numbers)).reindex(full_range)
+
+    @property
+    def regions(self):
+        return list(self.annual.columns)
+
+    @property
+    def kinds(self):
+        """The SERIES this dataset has the months for."""
+        return [k for k in SERIES if k not in SEASONS or k in self.seasonal]
+
+    def series(self, kind, regions=None):
+        """
+        One precomputed series per region as a long frame with date, region and value columns.
+        """
+        regions = [r for r in (regions or self.regions) if r in self.annual.columns]
+        if kind in ("Monthly", "Monthly anomaly"):
+            column = "value" if kind == "Monthly" else "anomaly"
+            table = self.monthly_table[column][regions]
+        else:
+            table = {
+                "Annual": self.annual,
+                f"Annual, {ROLLING_YEARS}-year rolling mean": self.rolling,
+                "Annual anomaly": self.anomaly,
+                "Annual anomaly %": self.anomaly_pct,
+                **self.seasonal,
+            }[kind][regions]
+            table = table.set_axis(pd.to_datetime(table.index.astype(str), format="%Y"), axis=0)
+        table.index.name = "date"
+        long = table.melt(ignore_index=False, var_name="region", value_name="value").reset_index()
+        return long.dropna(subset=["value"]).reset_index(drop=True)
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that keep
+    the visual shape of the (x, y) line. First and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            avg_x, avg_y = x[stop:edges[i + 2]].mean(), y[stop:edges[i + 2]].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(long, max_points):
+    """
+    LTTB-downsample each region of a series() frame to at most max_points points.
+    """
+    parts = []
+    for _, group in long.groupby("region", sort=False):
+        x = group["date"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        parts.append(group.iloc[lttb(x, group["value"].to_numpy(), max_points)])
+    return pd.concat(parts, ignore_index=True) if parts else long
+
+
+_series = OrderedDict()
+_series_lock = threading.Lock()
+
+
+def get_time_series(df):
+    """
+    Return the TimeSeries of a month-column dataset (None for other datasets),
+    built once per dataset fingerprint.
+    """
+    layout = detect_layout(df)
+    if layout is None:
+        return None
+    fingerprint = get_fingerprint(df)
+    with _series_lock:
+        ts = _series.get(fingerprint)
+        if ts is not None:
+            _series.move_to_end(fingerprint)
+            return ts
+    ts = TimeSeries(df, *layout)
+    with _series_lock:
+        _series[fingerprint] = ts
+        while len(_series) > MAX_CACHED_SERIES:
+            _series.popitem(last=False)
+    return ts
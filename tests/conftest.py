@@ -0,0 +1,8 @@
+# tests/conftest.py
+import os
+
+# small partitions and a 2-process pool, so frames of a few hundred rows take the parallel path;
+# set before any test module imports src, which reads them at import time
+os.environ["PARALLEL_WORKERS"] = "2"
+os.environ["PARALLEL_MIN_ROWS"] = "100"
+os.environ["PARALLEL_PARTITION_ROWS"] = "64"
@@ -0,0 +1,39 @@
+# tests/test_aggregator.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.query_engine import aggregator
+from src.query_engine.aggregator import RollupCube
+from src.query_engine.executor import answer_question
+
+
+@pytest.fixture(autouse=True)
+def cube_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(aggregator, "CUBE_DIR", tmp_path)
+
+
+def rainfall():
+    return pd.DataFrame({
+        "state": ["Kerala", "Kerala", "Goa", "Kerala"],
+        "year": [2001, 2002, 2001, 2003],
+        "jun": [610.0, 540.5, 880.0, np.nan],
+    })
+
+
+def test_mean_without_group_by_is_a_scalar():
+    df = rainfall()
+    cube = RollupCube.build(df, ["state", "year"], ["jun"])
+    assert cube.query("jun", "mean") == pytest.approx(df["jun"].mean())
+    assert cube.query("jun", "mean", categorical={"state": ["kerala"]}) == pytest.approx(575.25)
+
+
+def test_mean_of_no_rows_is_nan():
+    cube = RollupCube.build(rainfall(), ["state", "year"], ["jun"])
+    assert np.isnan(cube.query("jun", "mean", categorical={"state": ["Punjab"]}))
+
+
+def test_answer_scalar_mean():
+    plan, answer = answer_question(rainfall(), "average jun rainfall in Kerala")
+    assert plan.aggregate == "mean" and not plan.group_by
+    assert answer.iloc[0, 0] == pytest.approx(575.25)
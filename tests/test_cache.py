@@ -0,0 +1,50 @@
+# tests/test_cache.py
+import threading
+
+import pandas as pd
+
+from src.data_handler.cache import DatasetCache
+
+
+def frame():
+    return pd.DataFrame({"state": ["Kerala", "Goa"], "jun": [610.0, 880.0]})
+
+
+def test_slow_revalidation_does_not_block_other_datasets(tmp_path):
+    cache = DatasetCache(tmp_path, ttl=0)
+    cache.put("slow", frame(), updated="1")
+    started, release = threading.Event(), threading.Event()
+
+    def revalidate():
+        started.set()
+        release.wait(5)
+        return "1"
+
+    results = {}
+    reader = threading.Thread(target=lambda: results.update(slow=cache.get("slow", revalidate=revalidate)))
+    reader.start()
+    started.wait(5)
+    # with the upstream check in flight, other entries are still written and read
+    other = threading.Thread(target=lambda: results.update(
+        other=cache.put("other", frame(), updated="2") and cache.get("other", stale_ok=True)))
+    other.start()
+    other.join(2)
+    finished = not other.is_alive()
+    release.set()
+    reader.join()
+    other.join()
+    assert finished and results["other"] is not None
+    pd.testing.assert_frame_equal(results["slow"], frame())
+
+
+def test_matching_revalidation_renews_the_entry(tmp_path):
+    cache = DatasetCache(tmp_path, ttl=3600)
+    cache.put("r1", frame(), updated="1")
+    manifest = cache._load_manifest()
+    fetched_at = next(iter(manifest.values()))["fetched_at"] - 7200
+    next(iter(manifest.values()))["fetched_at"] = fetched_at
+    cache._save_manifest(manifest)
+
+    assert cache.get("r1", revalidate=lambda: "2") is None
+    assert cache.get("r1", revalidate=lambda: "1") is not None
+    assert cache.entry("r1")["fetched_at"] > fetched_at
@@ -0,0 +1,35 @@
+# tests/test_coordinator.py
+import time
+
+from src.data_handler.coordinator import FetchCoordinator
+
+
+def counting_loader():
+    calls = []
+
+    def load():
+        calls.append(1)
+        return len(calls)
+    return load, calls
+
+
+def test_result_is_shared_within_ttl():
+    coordinator = FetchCoordinator()
+    load, calls = counting_loader()
+    assert coordinator.get("k", load, ttl=60) == coordinator.get("k", load, ttl=60) == 1
+    assert len(calls) == 1
+
+
+def test_expired_result_is_loaded_again():
+    coordinator = FetchCoordinator()
+    load, calls = counting_loader()
+    coordinator.get("k", load, ttl=60, fetched_at=lambda result: time.time() - 120)
+    assert coordinator.get("k", load, ttl=60) == 2
+    assert len(calls) == 2
+
+
+def test_without_ttl_results_do_not_expire():
+    coordinator = FetchCoordinator()
+    load, calls = counting_loader()
+    coordinator.get("k", load, fetched_at=lambda result: 0)
+    assert coordinator.get("k", load) == 1
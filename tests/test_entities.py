@@ -0,0 +1,20 @@
+# tests/test_entities.py
+import pytest
+
+from src.data_handler.entities import detect_entity_kind
+
+
+@pytest.mark.parametrize("name, kind", [
+    ("State_Name", "state"),
+    ("State/UT", "state"),
+    ("statement", None),
+    ("crop", "crop"),
+    ("crop_year", None),
+    ("cropping_intensity", None),
+    ("DistrictName", "district"),
+    ("dist_name", "district"),
+    ("Sub Division", "subdivision"),
+    ("state_code", None),
+])
+def test_column_hints_match_whole_words(name, kind):
+    assert detect_entity_kind(name) == kind
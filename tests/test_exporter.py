@@ -0,0 +1,58 @@
+# tests/test_exporter.py
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from src.data_handler import exporter
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(exporter, "EXPORT_DIR", tmp_path)
+
+
+def frame(n=10):
+    return pd.DataFrame({"state": ["Kerala"] * n, "jun": range(n)})
+
+
+def test_chunks_export_like_the_whole_frame():
+    whole = exporter.export_bytes(frame(), "csv", "a")
+    chunked = exporter.export_bytes(lambda: iter([frame().iloc[:4], frame().iloc[4:]]), "csv", "b")
+    assert whole == chunked
+
+
+def test_same_export_is_written_once():
+    calls = []
+
+    def chunks():
+        calls.append(1)
+        time.sleep(0.05)
+        return iter([frame()])
+
+    threads = [threading.Thread(target=exporter.export_bytes, args=(chunks, "csv", "a")) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+
+
+def test_other_exports_do_not_wait_for_a_slow_one():
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return iter([frame()])
+
+    writer = threading.Thread(target=exporter.export_bytes, args=(slow, "csv", "slow"))
+    writer.start()
+    started.wait(5)
+    try:
+        assert exporter.export_bytes(frame(), "csv", "fast").startswith(b"state,jun")
+    finally:
+        release.set()
+        writer.join()
@@ -0,0 +1,160 @@
+# tests/test_fetch_manager.py
+import pandas as pd
+import pytest
+
+from src.data_handler import fetch_manager
+from src.data_handler.cache import DatasetCache
+from src.data_handler.partition_store import PartitionStore
+
+
+class FakeResource:
+    """
+    data.gov.in stand-in: pages of `rows`, honouring limit, offset, filters and fields.
+    """
+
+    def __init__(self, rows, updated="1"):
+        self.rows = rows
+        self.updated = updated
+        self.calls = []
+
+    def __call__(self, resource_id, params=None, timeout=20):
+        offset, limit = int(params.get("offset", 0)), int(params["limit"])
+        filters = {k[len("filters["):-1]: v for k, v in params.items() if k.startswith("filters[")}
+        self.calls.append((offset, filters))
+        rows = [r for r in self.rows if all(str(r[k]) == v for k, v in filters.items())]
+        page = rows[offset:offset + limit]
+        if params.get("fields"):
+            page = [{k: r[k] for k in params["fields"].split(",") if k in r} for r in page]
+        return {"total": len(rows), "updated": self.updated, "records": page}
+
+
+@pytest.fixture(autouse=True)
+def stores(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_manager, "FIELD_PROFILE_DIR", tmp_path / "profiles")
+    monkeypatch.setattr(fetch_manager, "dataset_cache", DatasetCache(tmp_path / "cache"))
+    monkeypatch.setattr(fetch_manager, "partition_store", PartitionStore(tmp_path / "partitions"))
+    fetch_manager._field_profiles.clear()
+
+
+def use(monkeypatch, rows):
+    fake = FakeResource(rows)
+    monkeypatch.setattr(fetch_manager, "get_resource", fake)
+    return fake
+
+
+# -------------------------
+# Field profiles
+# -------------------------
+@pytest.fixture
+def states(monkeypatch):
+    return use(monkeypatch, [{"state": "Kerala" if i < 900 else "Goa", "jan": str(i)} for i in range(1000)])
+
+
+def field_profile(max_rows):
+    return fetch_manager.fetch_field_profile("r1", ["state", "jan"], max_rows=max_rows, page_size=100, max_workers=2)
+
+
+def test_field_profile_samples_large_resources(states):
+    profile, complete = field_profile(max_rows=300)
+    assert not complete
+    assert len(states.calls) == 3
+    # sampled pages are spread over the resource, not taken from its head
+    assert profile["state"]["options"] == ["Goa", "Kerala"]
+
+
+def test_whole_profile_is_stored_and_reused(states):
+    profile, complete = field_profile(max_rows=None)
+    assert complete and profile["jan"]["max"] == 999
+    fetch_manager._field_profiles.clear()
+    states.calls.clear()
+    assert field_profile(max_rows=300) == (profile, True)
+    assert len(states.calls) == 1
+
+
+def test_stored_profile_is_dropped_when_upstream_changes(states):
+    field_profile(max_rows=None)
+    states.updated = "2"
+    assert field_profile(max_rows=300)[1] is False
+
+
+# -------------------------
+# Delta sync
+# -------------------------
+def arrivals(ids, year=2025, tonnes=10):
+    return [{"id": str(i), "market": f"m{i % 3}", "year": str(year), "tonnes": str(tonnes * i)} for i in ids]
+
+
+def sync(**kwargs):
+    df, _ = fetch_manager.sync_from_api("r1", page_size=4, max_workers=2, **kwargs)
+    return df
+
+
+def rows_of(df):
+    return sorted(tuple(str(v) for v in row) for row in df[["id", "market", "year", "tonnes"]].itertuples(index=False))
+
+
+def expected(rows):
+    return rows_of(pd.DataFrame(rows))
+
+
+def test_offset_sync_fetches_only_new_rows(monkeypatch):
+    fake = use(monkeypatch, arrivals(range(10)))
+    sync()
+    fake.rows = fake.rows + arrivals(range(10, 13))
+    fake.calls.clear()
+    df = sync()
+    assert rows_of(df) == expected(fake.rows)
+    assert min(offset for offset, _ in fake.calls[1:]) == 10
+
+
+def test_offset_overlap_replaces_edited_tail(monkeypatch):
+    monkeypatch.setattr(fetch_manager, "SYNC_OVERLAP_ROWS", 2)
+    fake = use(monkeypatch, arrivals(range(10)))
+    sync()
+    fake.rows = arrivals(range(9)) + arrivals([9], tonnes=7) + arrivals(range(10, 12))
+    df = sync()
+    assert rows_of(df) == expected(fake.rows)
+
+
+def test_keyed_merge_supersedes_corrected_rows(monkeypatch):
+    fake = use(monkeypatch, arrivals(range(10)))
+    sync(key="id")
+    # a correction of id 3 is appended upstream
+    fake.rows = fake.rows + arrivals([3], tonnes=7) + arrivals([10])
+    df = sync()
+    assert rows_of(df) == expected(arrivals([i for i in range(11) if i != 3]) + arrivals([3], tonnes=7))
+
+
+def test_overlap_after_keyed_merge_keeps_every_row(monkeypatch):
+    monkeypatch.setattr(fetch_manager, "SYNC_OVERLAP_ROWS", 3)
+    fake = use(monkeypatch, arrivals(range(10)))
+    sync(key="id")
+    # an exact repeat of id 5 adds nothing locally, so local rows no longer line up with upstream offsets
+    fake.rows = fake.rows + arrivals([5]) + arrivals([10])
+    sync()
+    fake.rows = fake.rows + arrivals(range(11, 14))
+    df = sync()
+    assert rows_of(df) == expected(arrivals(range(14)))
+
+
+def test_unaligned_copy_without_key_downloads_again(monkeypatch):
+    fake = use(monkeypatch, arrivals(range(10)))
+    sync()
+    fetch_manager.partition_store.update_state("r1", aligned=False)
+    fake.rows = fake.rows + arrivals(range(10, 12))
+    fake.calls.clear()
+    df = sync()
+    assert rows_of(df) == expected(fake.rows)
+    assert (0, {}) in fake.calls[1:]
+
+
+def test_watermark_sync_refetches_the_current_period(monkeypatch):
+    fake = use(monkeypatch, arrivals(range(6), year=2024) + arrivals(range(6, 8), year=2025))
+    sync(watermark="year")
+    # more 2025 rows, one 2025 row revised, and a new year
+    fake.rows = (arrivals(range(6), year=2024) + arrivals([6], year=2025, tonnes=7)
+                 + arrivals(range(7, 10), year=2025) + arrivals([10], year=2026))
+    fake.calls.clear()
+    df = sync()
+    assert rows_of(df) == expected(fake.rows)
+    assert all(filters for _, filters in fake.calls[1:])
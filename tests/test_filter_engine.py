@@ -0,0 +1,24 @@
+# tests/test_filter_engine.py
+import numpy as np
+import pandas as pd
+
+from src.query_engine.filter_engine import FilterEngine
+
+
+def test_extended_engine_matches_a_fresh_one():
+    base = pd.DataFrame({"state": ["Kerala", "Goa", "kerala "], "jan": ["1", " 12 ", "30"]})
+    # non-breaking and thin spaces are stripped by the index's parser, not by pd.to_numeric
+    delta = pd.DataFrame({"state": ["GOA", "Punjab", None], "jan": ["\xa012\xa0", "1,234", "\u20097"]})
+    df = pd.concat([base, delta], ignore_index=True)
+
+    engine = FilterEngine(base)
+    # build the indexes on the base rows, so extended() has something to carry over
+    engine.apply({"state": ["Goa"]}, {"jan": (0, 100)})
+    extended, fresh = engine.extended(df), FilterEngine(df)
+
+    for categorical, numeric in [({"state": ["goa"]}, {}), ({}, {"jan": (10, 20)}),
+                                 ({"state": ["Kerala"]}, {"jan": (0, 5000)}), ({}, {"jan": (-1, 1e9)})]:
+        got, _ = extended.apply(categorical, numeric)
+        want, _ = fresh.apply(categorical, numeric)
+        assert np.array_equal(got.index, want.index), (categorical, numeric)
+    assert extended.apply(numeric={"jan": (10, 20)})[0].index.tolist() == [1, 3]
@@ -0,0 +1,50 @@
+# tests/test_http_client.py
+import pytest
+import requests
+
+from src.data_handler import http_client
+from src.data_handler.http_client import APIError, get_json
+
+
+class FailingSession:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        raise self.error
+
+
+@pytest.fixture
+def session(monkeypatch):
+    def install(error):
+        fake = FailingSession(error)
+        monkeypatch.setattr(http_client, "_session", fake)
+        monkeypatch.setattr(http_client, "_backoff_delay", lambda attempt, response=None: 0)
+        return fake
+    return install
+
+
+@pytest.mark.parametrize("error", [
+    requests.exceptions.ChunkedEncodingError("connection broken"),
+    requests.exceptions.ContentDecodingError("bad gzip"),
+    requests.ConnectionError("reset"),
+])
+def test_transient_errors_are_retried_then_wrapped(session, error):
+    fake = session(error)
+    with pytest.raises(APIError):
+        get_json("http://example.invalid/resource/x", max_retries=2)
+    assert fake.calls == 3
+
+
+@pytest.mark.parametrize("error", [
+    requests.TooManyRedirects("loop"),
+    requests.exceptions.InvalidURL("bad url"),
+    requests.exceptions.MissingSchema("no scheme"),
+])
+def test_other_request_errors_are_wrapped_at_once(session, error):
+    fake = session(error)
+    with pytest.raises(APIError):
+        get_json("http://example.invalid/resource/x", max_retries=2)
+    assert fake.calls == 1
@@ -0,0 +1,13 @@
+# tests/test_joiner.py
+import pandas as pd
+
+from src.query_engine.joiner import get_join_keys, score_join_keys
+
+
+def test_join_keys_are_cached_per_dataset_pair():
+    left = pd.DataFrame({"State": ["Kerala", "Goa", "Punjab"], "rain": [1.0, 2.0, 3.0]})
+    right = pd.DataFrame({"state": ["Goa", "Kerala"], "crop": ["Rice", "Ragi"]})
+    first = get_join_keys(left, right)
+    assert first == score_join_keys(left, right)
+    assert get_join_keys(left, right) is first
+    assert get_join_keys(right, left) is not first
@@ -0,0 +1,85 @@
+# tests/test_parallel.py
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+from src.data_handler.preprocessor import compact_dataframe
+from src.query_engine import parallel
+from src.query_engine.aggregator import RollupCube
+
+N = 1000
+
+
+@pytest.fixture(scope="module", autouse=True)
+def pool():
+    yield
+    parallel.shutdown_pool()
+
+
+def frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "state": rng.choice(["Kerala", "Punjab", "Goa", None], N),
+        "crop_year": rng.integers(1997, 2015, N),
+        "production": np.where(rng.random(N) < 0.1, np.nan, rng.random(N) * 1000),
+    })
+
+
+def test_parallel_path_is_taken():
+    assert parallel.use_parallel(N)
+    assert len(parallel.partition_bounds(N)) > 1
+
+
+@pytest.mark.parametrize("series", [
+    pd.Series([1, "2", "x", 3.5, " 7 ", None] * (N // 6), dtype=object),
+    pd.Series(["1,5", "12", "-", "3.25"] * (N // 4), dtype="str"),
+])
+def test_to_numeric_matches_pandas(series):
+    expected = pd.to_numeric(series.astype("string").str.strip(), errors="coerce").astype("float64")
+    tm.assert_series_equal(parallel.to_numeric(series), expected, check_names=False)
+
+
+@pytest.mark.parametrize("series", [
+    pd.Series([1.5, 2.5, None] * (N // 3)),
+    pd.Series([3, 1, 3, 2] * (N // 4)),
+    pd.Series(["b", "a", None] * (N // 3), dtype="str"),
+    pd.Series(["x", "y"] * (N // 2), dtype=object),
+    pd.Series([1, "1", None, "b"] * (N // 4), dtype=object),
+])
+def test_factorize_matches_pandas(series):
+    codes, uniques = parallel.factorize(series)
+    expected_codes, expected_uniques = pd.factorize(series, use_na_sentinel=True)
+    np.testing.assert_array_equal(codes, expected_codes)
+    tm.assert_index_equal(uniques, pd.Index(expected_uniques), exact=True)
+
+
+@pytest.mark.parametrize("agg", ["sum", "count", "min", "max", "mean"])
+def test_group_reduce_matches_groupby(agg):
+    df = frame()
+    codes, _ = pd.factorize(df["state"], use_na_sentinel=True)
+    values = df[["production"]]
+    keep = codes >= 0
+    expected = values[keep].groupby(codes[keep], sort=True).agg(agg)
+    result = parallel.group_reduce(values[keep], codes[keep], agg)
+    tm.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_cube_build_parallel_matches_serial():
+    df = frame()
+    serial = RollupCube.build(df, ["state", "crop_year"], ["production"])
+    shared = RollupCube.build_parallel(df, ["state", "crop_year"], ["production"])
+    for agg in ("sum", "count", "min", "max", "mean"):
+        tm.assert_series_equal(
+            shared.query("production", agg, ("state",)).sort_index(),
+            serial.query("production", agg, ("state",)).sort_index(),
+            check_dtype=False,
+        )
+
+
+def test_mixed_object_columns_ingest():
+    # raw API JSON mixes numbers and text in one column; Arrow cannot share that as-is
+    raw = pd.DataFrame({"jan": pd.Series([12, "13.5", "NA", 7] * (N // 4), dtype=object),
+                        "state": ["Kerala", "Goa"] * (N // 2)})
+    df = compact_dataframe(raw)
+    assert len(df) == N
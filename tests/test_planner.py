@@ -0,0 +1,23 @@
+# tests/test_planner.py
+from src.query_engine.planner import plan_filters
+
+OPTIONS = {"state": ["Goa", "Kerala", "KERALA ", "Punjab"]}
+
+
+def test_single_value_is_sent_with_its_upstream_spelling():
+    plan = plan_filters({"state": [" punjab"]}, {"state"}, OPTIONS)
+    assert plan.api_filters == {"state": "Punjab"} and not plan.local_filters
+
+
+def test_value_spelled_several_ways_stays_local():
+    plan = plan_filters({"state": ["Kerala"]}, {"state"}, OPTIONS)
+    assert not plan.api_filters and plan.local_filters == {"state": ["Kerala"]}
+
+
+def test_unexposed_or_multi_value_selections_stay_local():
+    plan = plan_filters({"state": ["Goa", "Punjab"], "crop": ["Rice"]}, {"state"}, OPTIONS)
+    assert not plan.api_filters and set(plan.local_filters) == {"state", "crop"}
+
+
+def test_without_known_values_the_trimmed_value_is_pushed():
+    assert plan_filters({"state": ["Goa "]}, {"state"}).api_filters == {"state": "Goa"}
@@ -0,0 +1,33 @@
+# tests/test_plotter.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_handler.preprocessor import MONTH_NUMBERS
+from src.visualizer.plotter import MIN_POINTS_PER_SERIES, chart_data
+
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+
+
+def rainfall(num_regions):
+    rng = np.random.default_rng(0)
+    rows = [{"subdivision": f"Region {r}", "year": year, **dict(zip(MONTHS, rng.random(12) * 100))}
+            for r in range(num_regions) for year in range(1901, 2018)]
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize("num_regions", [1, 7, 40])
+def test_chart_never_exceeds_the_point_budget(num_regions):
+    df = rainfall(num_regions)
+    data, total = chart_data(df, "Monthly", [f"Region {r}" for r in range(num_regions)], max_points=4000)
+    assert len(data) <= min(4000, total)
+
+
+def test_too_many_regions_for_one_chart():
+    df = rainfall(2)
+    with pytest.raises(ValueError):
+        chart_data(df, "Monthly", ["Region 0", "Region 1"], max_points=MIN_POINTS_PER_SERIES)
+
+
+def test_month_table_covers_all_months():
+    assert sorted(set(MONTH_NUMBERS.values())) == list(range(1, 13))
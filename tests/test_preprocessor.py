@@ -0,0 +1,33 @@
+# tests/test_preprocessor.py
+import pandas as pd
+import pytest
+from pandas.api.types import is_numeric_dtype
+
+from src.data_handler.preprocessor import compact_dataframe, infer_column
+
+
+def raw(values):
+    return pd.Series(values, dtype="object")
+
+
+def test_thousands_separators_are_parsed():
+    result = infer_column(raw(["1,234", "12,34,567", "89.5", "NA"]), "production")
+    assert result.tolist()[:3] == [1234, 1234567, 89.5]
+    assert pd.isna(result.iloc[3])
+
+
+@pytest.mark.parametrize("values", [
+    ["12", "13.5", "n.a. (revised)"],  # one value that is not a number keeps the column as text
+    ["007", "012", "120"],  # codes with leading zeros
+    ["2014-15", "2015-16", "2016-17"],  # year ranges
+    ["1,5", "2,25"],  # commas that are not thousands separators
+])
+def test_columns_that_do_not_fully_parse_stay_text(values):
+    result = infer_column(raw(values * 10), "jan")
+    assert not is_numeric_dtype(result)
+    assert result.astype(str).tolist() == values * 10
+
+
+def test_missing_markers_do_not_block_conversion():
+    df = compact_dataframe(pd.DataFrame({"jun": raw(["12.5", "-", "", "NA", "7"])}))
+    assert is_numeric_dtype(df["jun"]) and df["jun"].isna().sum() == 3
@@ -0,0 +1,34 @@
+# tests/test_schema_registry.py
+import time
+
+from src.data_handler.schema_registry import SchemaRegistry
+
+
+def metadata(title):
+    return {"title": title, "total": 10, "field": [{"id": "state"}], "field_exposed": []}
+
+
+def test_schemas_written_elsewhere_are_seen_and_kept(tmp_path):
+    path = tmp_path / "schemas.json"
+    app, cli = SchemaRegistry(path), SchemaRegistry(path)
+    app.record("r1", metadata("one"))
+    assert cli.get("r1", fetch=False)["title"] == "one"
+
+    cli.record("r2", metadata("two"))
+    app.record("r3", metadata("three"))
+    fresh = SchemaRegistry(path)
+    assert {r: fresh.get(r, fetch=False)["title"] for r in ("r1", "r2", "r3")} == \
+        {"r1": "one", "r2": "two", "r3": "three"}
+
+
+def test_newer_copy_wins_when_saving(tmp_path):
+    path = tmp_path / "schemas.json"
+    app, cli = SchemaRegistry(path), SchemaRegistry(path)
+    app.record("r1", metadata("old"))
+    app._load()
+    time.sleep(0.01)
+    cli.record("r1", metadata("new"))
+    # app saves a change of its own from its now outdated copy
+    app._schemas["r2"] = dict(app._schemas["r1"], title="other")
+    app._save()
+    assert SchemaRegistry(path).get("r1", fetch=False)["title"] == "new"
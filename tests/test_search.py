@@ -0,0 +1,38 @@
+# tests/test_search.py
+import pandas as pd
+
+from src.query_engine.search import SearchIndex
+
+
+def crops(version):
+    return pd.DataFrame({
+        "state": pd.Series(["Karnataka", "Kerala", f"State {version}"], dtype="category"),
+        "crop": pd.Series(["Ragi", "Rice", f"Crop{version}"], dtype="category"),
+    })
+
+
+def test_reindexing_does_not_grow_the_index():
+    index = SearchIndex()
+    index.update("r1", crops(0), name="Crops")
+    index.update("r2", crops(0), name="Other crops")
+    sizes = None
+    for version in range(1, 50):
+        index.update("r1", crops(version), name="Crops")
+        live = sum(e is not None for e in index._entries)
+        assert len(index._entries) <= 2 * live + 1
+        sizes = len(index._words)
+    # one stale word per version at most survives until the next compaction
+    assert sizes < 40
+
+
+def test_search_after_compaction_and_prefix_lookup():
+    index = SearchIndex()
+    for version in range(10):
+        index.update("r1", crops(version), name="Crops")
+    index.update("r2", crops(99), name="Other crops")
+    hits = index.search("ragi karnat", sync=False)
+    assert {h.resource_id for h in hits} == {"r1", "r2"}
+    assert all(h.num_rows == 1 for h in hits)
+    assert [h.resource_id for h in index.search("crop9", sync=False)] == ["r1"]
+    index.remove("r1")
+    assert [h.resource_id for h in index.search("ragi", sync=False)] == ["r2"]